@@ -0,0 +1,66 @@
+# app_maker_backend/api/admin.py
+import asyncio
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from core.logging_config import add_log
+from core.state_store import get_all_project_meta
+from core.storage_manager import measure_storage, enforce_venv_quota
+
+router = APIRouter(tags=["Admin"])
+
+class ProjectStorage(BaseModel):
+    project_id: str
+    name: Optional[str] = None
+    venv_bytes: int # Taille du .venv (0 s'il n'existe pas ou a été évincé)
+    files_bytes: int # Code, historique, variantes, logs...
+    last_used_at: Optional[str] = None # Dernier lancement ou préparation de l'environnement
+
+class StorageReport(BaseModel):
+    quota_bytes: int # Quota des .venv (0 = pas de quota)
+    venv_total_bytes: int
+    files_total_bytes: int
+    projects: List[ProjectStorage]
+
+class EvictedEnvironment(BaseModel):
+    project_id: str
+    venv_bytes: int
+    last_used_at: Optional[str] = None
+
+class EvictionResponse(BaseModel):
+    evicted: List[EvictedEnvironment]
+    freed_bytes: int
+
+
+@router.get("/admin/storage", response_model=StorageReport, summary="Espace disque des projets et de leurs environnements virtuels")
+async def storage_report():
+    """
+    Retourne l'espace disque occupé par projet (.venv et autres fichiers) et au total,
+    avec la date de dernière utilisation de chaque environnement et le quota configuré.
+    """
+    try:
+        report = await asyncio.to_thread(measure_storage)
+        names = {project_id: meta["name"] for project_id, meta in (await asyncio.to_thread(get_all_project_meta)).items()}
+    except Exception as e:
+        add_log(f"Erreur lors de la mesure de l'espace disque : {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+    for project in report["projects"]:
+        project["name"] = names.get(project["project_id"])
+    return report
+
+
+@router.post("/admin/storage/evict", response_model=EvictionResponse, summary="Applique immédiatement le quota des environnements virtuels")
+async def evict_environments():
+    """
+    Évince les .venv des projets utilisés le moins récemment jusqu'à repasser sous le quota
+    (sans attendre la vérification périodique). Ils seront recréés au prochain lancement.
+    """
+    add_log("Requête : application du quota des environnements virtuels.")
+    try:
+        evicted = await enforce_venv_quota()
+    except Exception as e:
+        add_log(f"Erreur lors de l'éviction des environnements : {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+    return {"evicted": evicted, "freed_bytes": sum(project["venv_bytes"] for project in evicted)}
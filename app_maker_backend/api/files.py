@@ -1,10 +1,23 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 import os
-from typing import List, Dict
+import asyncio
+import hashlib
+import time
+import mimetypes
+from typing import List, Dict, Optional
 
 # Imports des nouvelles fonctions du project_manager
-from core.project_manager import get_project_files_content, ProjectNotFoundException
+from core.project_manager import (
+    get_project_files_content,
+    get_project_manifest,
+    get_project_file_path,
+    get_project_file_sha256,
+    ProjectNotFoundException
+)
+from core.code_index import search_code
+from core.state_store import get_all_project_meta
 from core.logging_config import add_log
 
 router = APIRouter()
@@ -17,6 +30,42 @@ class FileDetail(BaseModel):
 class ProjectIdRequest(BaseModel):
     project_id: str
 
+class ManifestEntry(BaseModel):
+    path: str
+    size: int
+    mtime: str
+    sha256: str
+
+class ProjectManifestResponse(BaseModel):
+    project_id: str
+    etag: str
+    files: List[ManifestEntry]
+
+class CodeSearchMatch(BaseModel):
+    project_id: str
+    project_name: Optional[str] = None
+    path: str
+    line: int # Numéro de ligne (à partir de 1)
+    column: int # Colonne du début de la correspondance (à partir de 1)
+    text: str # Ligne trouvée (tronquée)
+
+class CodeSearchResponse(BaseModel):
+    matches: List[CodeSearchMatch]
+    truncated: bool # Vrai si d'autres correspondances existent au-delà de `limit`
+    duration_ms: float
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Indique si l'en-tête If-None-Match (liste d'ETags ou '*') correspond à l'ETag courant.
+    Comparaison faible (RFC 7232) : une réponse compressée renvoie l'ETag sous la forme W/"...".
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 # Ancien endpoint pour lister les fichiers, adapté
 @router.get("/files/{project_id}", response_model=Dict[str, str], summary="Liste et retourne le contenu de tous les fichiers d'un projet")
 async def list_project_files_content(project_id: str):
@@ -35,22 +84,81 @@ async def list_project_files_content(project_id: str):
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
 
 
-# Ancien endpoint pour obtenir le contenu d'un fichier spécifique.
-# Cette logique peut être gérée côté frontend en utilisant la réponse de /files/{project_id},
-# ou nous pouvons ajouter une fonction spécifique si vraiment nécessaire.
-# Pour l'instant, je le commente si vous n'avez pas de fonction équivalente.
-# Si vous avez besoin d'un endpoint pour un fichier unique, la logique serait:
-# @router.post("/get_file_content", response_model=FileDetail)
-# async def get_single_file_content(request: FileRequest): # Vous aurez besoin d'un modèle FileRequest
-#     try:
-#         # Nous n'avons pas de fonction directe get_file_content_from_path
-#         # Il faudrait adapter pour lire un fichier spécifique dans le dossier du projet
-#         # Ou bien, le frontend demande tous les fichiers et choisit ensuite.
-#         # Exemple (non testé):
-#         # project_path = _get_project_path(request.project_id) # Nécessite d'importer _get_project_path
-#         # file_path = os.path.join(project_path, request.file_name)
-#         # with open(file_path, 'r', encoding='utf-8') as f:
-#         #    content = f.read()
-#         # return FileDetail(file_name=request.file_name, content=content)
-#     except Exception as e:
-#         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+@router.get("/files/{project_id}/manifest", response_model=ProjectManifestResponse, summary="Liste les fichiers d'un projet avec taille, date et empreinte")
+async def get_files_manifest(project_id: str, request: Request, response: Response):
+    """
+    Retourne chemin, taille, date de modification et SHA-256 de chaque fichier du projet,
+    sans leur contenu. L'ETag (fort) dépend uniquement des contenus : le client renvoie
+    If-None-Match et reçoit 304 si rien n'a changé, puis ne télécharge que les fichiers
+    dont l'empreinte diffère.
+    """
+    try:
+        manifest = get_project_manifest(project_id)
+    except ProjectNotFoundException as e:
+        add_log(f"Projet non trouvé lors du calcul du manifeste: {project_id} - {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors du calcul du manifeste du projet {project_id}: {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+
+    digest = hashlib.sha256("\n".join(f"{entry['path']}:{entry['sha256']}" for entry in manifest).encode("utf-8"))
+    etag = f'"{digest.hexdigest()}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return ProjectManifestResponse(project_id=project_id, etag=etag, files=manifest)
+
+
+@router.get("/files/{project_id}/content/{file_path:path}", summary="Retourne le contenu d'un fichier du projet")
+async def get_single_file_content(project_id: str, file_path: str, request: Request):
+    """
+    Retourne le contenu brut d'un seul fichier du projet, lu en streaming.
+    L'ETag (fort) est le SHA-256 du contenu ; If-None-Match renvoie 304 s'il n'a pas changé.
+    """
+    try:
+        absolute_path = get_project_file_path(project_id, file_path)
+        etag = f'"{await asyncio.to_thread(get_project_file_sha256, absolute_path)}"'
+    except ProjectNotFoundException as e:
+        add_log(f"Fichier non trouvé: {project_id}/{file_path} - {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors de la lecture du fichier {file_path} du projet {project_id}: {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    media_type = mimetypes.guess_type(absolute_path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or absolute_path.endswith((".py", ".json", ".qss")):
+        media_type = f"{media_type if media_type.startswith('text/') else 'text/plain'}; charset=utf-8"
+    return FileResponse(absolute_path, media_type=media_type, headers={"ETag": etag})
+
+
+@router.get("/search/code", response_model=CodeSearchResponse, summary="Recherche dans le code de tous les projets")
+async def search_code_route(
+    q: str = Query(..., min_length=1, description="Texte recherché (ou expression régulière si regex=true)"),
+    regex: bool = False,
+    case_sensitive: bool = False,
+    project_id: Optional[str] = Query(None, description="Limite la recherche à un projet"),
+    path: Optional[str] = Query(None, description="Motif de chemin, ex. '*.py' ou 'widgets/*'"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Recherche un extrait de code dans les fichiers source de tous les projets (hors .venv et
+    artefacts d'exécution), via l'index à trigrammes. Retourne fichier, ligne et colonne de
+    chaque correspondance ; une regex est évaluée ligne par ligne.
+    """
+    start = time.perf_counter()
+    try:
+        result = await asyncio.to_thread(search_code, q, regex, case_sensitive, project_id, path, limit)
+        if result["matches"]:
+            names = {pid: meta["name"] for pid, meta in (await asyncio.to_thread(get_all_project_meta)).items()}
+            for match in result["matches"]:
+                match["project_name"] = names.get(match["project_id"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors de la recherche de code '{q}': {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+    return {**result, "duration_ms": round((time.perf_counter() - start) * 1000, 2)}
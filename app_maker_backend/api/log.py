@@ -1,6 +1,11 @@
 # app_maker_backend/api/logs.py
-from fastapi import APIRouter
-from core.logging_config import get_all_logs
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from core.config import LOG_TAIL_BYTES
+from core.logging_config import get_all_logs, query_logs
 
 router = APIRouter(
     prefix="/api",
@@ -8,8 +13,40 @@ router = APIRouter(
 )
 
 @router.get("/get_logs")
-async def get_logs_route():
+async def get_logs_route(max_bytes: int = Query(LOG_TAIL_BYTES, ge=1, le=LOG_TAIL_BYTES * 8)):
+    """
+    Retourne les logs collectés par le backend pour le frontend : la fin du fichier actif
+    (max_bytes octets au plus), pour un coût de lecture borné.
+    """
+    return {"logs": get_all_logs(max_bytes)}
+
+
+class LogSearchResponse(BaseModel):
+    items: List[Dict[str, Any]] # Enregistrements JSON, du plus récent au plus ancien
+    next_cursor: Optional[int] = None # À repasser dans `cursor` pour la page suivante
+
+
+@router.get("/logs/search", response_model=LogSearchResponse)
+async def search_logs_route(
+    level: Optional[str] = Query(None, description="Niveau minimal (DEBUG, INFO, WARNING, ERROR, CRITICAL)"),
+    project_id: Optional[str] = None,
+    request_id: Optional[str] = None,
+    since: Optional[str] = Query(None, description="Date ISO 8601 de début"),
+    until: Optional[str] = Query(None, description="Date ISO 8601 de fin"),
+    q: Optional[str] = Query(None, description="Texte libre recherché dans les messages"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = None
+):
     """
-    Retourne les logs collectés par le backend pour le frontend.
+    Recherche dans l'index des logs par niveau, projet, requête, période et texte libre,
+    avec pagination par curseur.
     """
-    return {"logs": get_all_logs()}
\ No newline at end of file
+    try:
+        return query_logs(
+            level=level, project_id=project_id, request_id=request_id,
+            since=since, until=until, text=q, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
@@ -1,25 +1,46 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import os
 import shutil
+import asyncio
+import time
 from typing import Dict, List, Optional, Any
 
 # Imports absolus
 from core.llm_service import generate_pyside_code
+from core.code_validator import validate_generated_files, build_validation_problem
+from core.project_export import EXPORT_FORMATS, export_file_name, iter_project_archive
 from core.project_manager import (
     create_new_project,
     update_project_files,
     get_project_files_content,
+    load_project_files,
     delete_project,
-    list_all_projects,
+    list_project_page,
     rename_project,
     get_project_problem,
+    save_project_problem,
     get_project_history, # AJOUTER CET IMPORT
+    save_project_variant,
+    list_project_variants,
+    get_project_variant_files,
+    promote_project_variant,
+    fork_project,
+    resolve_project_history,
     ProjectNotFoundException,
     _get_project_path
 )
+from core.app_runner import get_running_apps
+from core.profiler import get_profile_report, format_profile_for_prompt
+from core.events import event_bus, get_project_version
+from core.json_utils import dumps
+from core.state_store import events_since
 from core.logging_config import add_log
-from core.config import GEMINI_MODELS, OPENAI_MODELS, DEEPSEEK_MODELS, KIMI_MODELS
+from core.config import (
+    GEMINI_MODELS, OPENAI_MODELS, DEEPSEEK_MODELS, KIMI_MODELS, MAX_GENERATION_VARIANTS,
+    LONG_POLL_TIMEOUT_SECONDS, LONG_POLL_MAX_TIMEOUT_SECONDS, SSE_HEARTBEAT_SECONDS
+)
 
 router = APIRouter()
 
@@ -33,10 +54,21 @@ class UpdateProjectRequest(BaseModel):
     prompt: str
     llm_provider: str = "gemini"
     model_name: str = "gemini-1.5-pro"
+    profile_run_id: Optional[str] = None # Rapport de profilage joint au prompt ("latest" pour le plus récent)
 
 class RenameProjectRequest(BaseModel):
     new_name: str
 
+class ForkProjectRequest(BaseModel):
+    new_name: Optional[str] = None
+
+class ForkProjectResponse(BaseModel):
+    project_id: str
+    name: str
+    forked_from: Dict[str, Any]
+    clone_stats: Dict[str, int]
+    duration_seconds: float
+
 class FileContent(BaseModel):
     file_name: str
     content: str
@@ -44,18 +76,71 @@ class FileContent(BaseModel):
 class ProjectInfo(BaseModel):
     project_id: str
     name: str
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    last_prompt_at: Optional[str] = None
+    turn_count: int = 0
+    file_count: Optional[int] = None
+    last_run_state: Optional[str] = None # starting, running, stopped, crashed
+
+class ProjectListResponse(BaseModel):
+    items: List[ProjectInfo]
+    next_cursor: Optional[str] = None # À repasser dans `cursor` pour la page suivante ; None à la dernière page
 
 class ProjectFilesResponse(BaseModel):
     project_id: str
     files: Dict[str, str]
+    validation: Optional[Dict[str, Any]] = None # Résultat de la validation statique du code généré
+    assets: List[Dict[str, Any]] = [] # Fichiers non chargés (binaires, trop volumineux) : descriptif seulement
+
+class PromoteVariantResponse(ProjectFilesResponse):
+    removed_files: List[str] = [] # Fichiers de la variante précédente retirés du projet
+    extra_files: List[str] = [] # Fichiers hors variante conservés dans le projet
 
 class ProblemStatusResponse(BaseModel):
     problem: Optional[Dict[str, Any]]
+    version: int = 0 # Version du projet (à repasser dans `since` pour attendre le changement suivant)
 
 # NOUVEAU : Modèle pour la réponse de l'historique du projet
 class ProjectHistoryResponse(BaseModel):
     history: Dict[str, Any] # L'historique est un dictionnaire
 
+class VariantSpec(BaseModel):
+    llm_provider: str = "gemini"
+    model_name: str = "gemini-1.5-pro"
+    temperature: Optional[float] = None
+
+class GenerateVariantsRequest(BaseModel):
+    prompt: str
+    variants: List[VariantSpec]
+
+class VariantResult(BaseModel):
+    variant_id: str
+    llm_provider: str
+    model_name: str
+    temperature: Optional[float] = None
+    status: str # "success" ou "error"
+    error: Optional[str] = None
+    duration_seconds: float
+    files: Dict[str, str] = {}
+    validation: Optional[Dict[str, Any]] = None
+
+class VariantsGenerationResponse(BaseModel):
+    project_id: str
+    active_variant_id: str
+    variants: List[VariantResult]
+
+class ProjectVariantsResponse(BaseModel):
+    project_id: str
+    active_variant_id: Optional[str]
+    variants: List[Dict[str, Any]]
+
+def _save_validation_problem(project_id: str, validation: Dict[str, Any]):
+    """Enregistre dans problem.json les erreurs de validation statique, s'il y en a."""
+    problem = build_validation_problem(validation)
+    if problem:
+        save_project_problem(project_id, problem)
+
 @router.post("/projects/", response_model=ProjectFilesResponse, summary="Crée un nouveau projet PySide6 basé sur un prompt initial")
 async def create_project(request: GenerateProjectRequest):
     """
@@ -74,20 +159,157 @@ async def create_project(request: GenerateProjectRequest):
         if not initial_generated_files:
             raise HTTPException(status_code=500, detail="Le LLM n'a pas généré de fichiers.")
 
-        project_id = create_new_project(request.prompt, initial_generated_files)
+        # Validation statique avant l'écriture : les erreurs sont détectées sans lancer l'application
+        validation = await validate_generated_files(initial_generated_files)
+
+        # Les écritures (fsync) se font hors de la boucle d'événements
+        project_id = await asyncio.to_thread(create_new_project, request.prompt, initial_generated_files)
+        await asyncio.to_thread(_save_validation_problem, project_id, validation)
 
-        return ProjectFilesResponse(project_id=project_id, files=initial_generated_files)
+        return ProjectFilesResponse(project_id=project_id, files=initial_generated_files, validation=validation)
 
     except Exception as e:
         add_log(f"Erreur lors de la création du projet: {e}", level="ERROR")
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
 
+async def _generate_variant(variant_id: str, prompt: str, spec: VariantSpec) -> VariantResult:
+    """Exécute une génération pour une variante et capture son résultat ou son erreur."""
+    start = time.perf_counter()
+    try:
+        files = await generate_pyside_code(
+            prompt,
+            current_files_context={},
+            llm_provider=spec.llm_provider,
+            model_name=spec.model_name,
+            temperature=spec.temperature
+        )
+        if not files:
+            raise ValueError("Le LLM n'a pas généré de fichiers.")
+        validation = await validate_generated_files(files)
+        status, error = "success", None
+    except Exception as e:
+        files = {}
+        validation = None
+        status = "error"
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        add_log(f"Échec de la variante {variant_id} ({spec.llm_provider}/{spec.model_name}): {error}", level="WARNING")
+
+    return VariantResult(
+        variant_id=variant_id,
+        llm_provider=spec.llm_provider,
+        model_name=spec.model_name,
+        temperature=spec.temperature,
+        status=status,
+        error=error,
+        duration_seconds=round(time.perf_counter() - start, 3),
+        files=files,
+        validation=validation
+    )
+
+@router.post("/projects/variants", response_model=VariantsGenerationResponse, summary="Génère plusieurs variantes d'un nouveau projet en parallèle")
+async def create_project_variants(request: GenerateVariantsRequest):
+    """
+    Lance N générations simultanées pour un même prompt (fournisseurs, modèles et températures mixables),
+    dans la limite de concurrence de chaque fournisseur. Chaque résultat est enregistré comme variante
+    d'un seul projet ; la première variante réussie devient le code actif et les autres peuvent être promues.
+    """
+    if not request.variants:
+        raise HTTPException(status_code=400, detail="Au moins une variante doit être demandée.")
+    if len(request.variants) > MAX_GENERATION_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Au plus {MAX_GENERATION_VARIANTS} variantes peuvent être générées à la fois.")
+
+    add_log(f"Requête: Génération de {len(request.variants)} variantes avec prompt: {request.prompt[:100]}...")
+    results = await asyncio.gather(*(
+        _generate_variant(f"v{index + 1}", request.prompt, spec)
+        for index, spec in enumerate(request.variants)
+    ))
+
+    successful = [result for result in results if result.status == "success"]
+    if not successful:
+        errors = "; ".join(f"{r.variant_id}: {r.error}" for r in results)
+        add_log(f"Aucune variante n'a abouti: {errors}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Aucune variante n'a pu être générée: {errors}")
+
+    try:
+        # La première variante sans erreur de validation devient active (à défaut, la première réussie)
+        active = next((result for result in successful if result.validation["valid"]), successful[0])
+        project_id = await asyncio.to_thread(create_new_project, request.prompt, active.files)
+        await asyncio.to_thread(_save_validation_problem, project_id, active.validation)
+        for result in successful:
+            metadata = result.model_dump(include={"llm_provider", "model_name", "temperature", "duration_seconds", "validation"})
+            await asyncio.to_thread(
+                save_project_variant,
+                project_id,
+                result.variant_id,
+                result.files,
+                metadata,
+                active=result is active
+            )
+        return VariantsGenerationResponse(project_id=project_id, active_variant_id=active.variant_id, variants=results)
+    except Exception as e:
+        add_log(f"Erreur lors de l'enregistrement des variantes: {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+
+@router.get("/projects/{project_id}/variants", response_model=ProjectVariantsResponse, summary="Liste les variantes d'un projet")
+async def get_project_variants(project_id: str):
+    """
+    Retourne les métadonnées des variantes d'un projet et l'ID de la variante active.
+    """
+    add_log(f"Requête: Liste des variantes du projet {project_id}.")
+    try:
+        index = list_project_variants(project_id)
+        return ProjectVariantsResponse(project_id=project_id, active_variant_id=index["active_variant_id"], variants=index["variants"])
+    except ProjectNotFoundException as e:
+        add_log(f"Projet non trouvé lors de la liste des variantes: {project_id} - {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors de la liste des variantes du projet {project_id}: {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+
+@router.get("/projects/{project_id}/variants/{variant_id}", response_model=ProjectFilesResponse, summary="Récupère les fichiers d'une variante")
+async def get_project_variant(project_id: str, variant_id: str):
+    """
+    Retourne le contenu des fichiers d'une variante, sans modifier le projet.
+    """
+    add_log(f"Requête: Récupération de la variante {variant_id} du projet {project_id}.")
+    try:
+        files = get_project_variant_files(project_id, variant_id)
+        return ProjectFilesResponse(project_id=project_id, files=files)
+    except ProjectNotFoundException as e:
+        add_log(f"Variante non trouvée: {project_id}/{variant_id} - {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors de la récupération de la variante {variant_id} du projet {project_id}: {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+
+@router.post("/projects/{project_id}/variants/{variant_id}/promote", response_model=PromoteVariantResponse, summary="Promeut une variante comme code actif du projet")
+async def promote_variant(project_id: str, variant_id: str):
+    """
+    Remplace le code du projet par celui de la variante choisie.
+    Les fichiers hors variante conservés dans le projet sont listés dans `extra_files`.
+    """
+    add_log(f"Requête: Promotion de la variante {variant_id} du projet {project_id}.")
+    try:
+        promotion = await asyncio.to_thread(promote_project_variant, project_id, variant_id)
+        final_project_files = await asyncio.to_thread(get_project_files_content, project_id)
+        return PromoteVariantResponse(
+            project_id=project_id, files=final_project_files,
+            removed_files=promotion["removed_files"], extra_files=promotion["extra_files"]
+        )
+    except ProjectNotFoundException as e:
+        add_log(f"Variante non trouvée lors de la promotion: {project_id}/{variant_id} - {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors de la promotion de la variante {variant_id} du projet {project_id}: {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+
 @router.post("/projects/{project_id}/generate", response_model=ProjectFilesResponse, summary="Génère ou met à jour le code d'un projet existant PySide6")
 async def generate_code_for_project(project_id: str, request: UpdateProjectRequest):
     """
     Prend un prompt et un ID de projet existant.
     Le LLM reçoit le code actuel du projet comme contexte et génère
     les modifications ou le nouveau code. Les fichiers du projet sont mis à jour.
+    Avec `profile_run_id`, le rapport de profilage correspondant est joint au prompt envoyé au LLM.
     """
     add_log(f"Requête: Génération de code pour le projet {project_id} avec prompt: {request.prompt[:100]}... utilisant {request.llm_provider}/{request.model_name}")
     try:
@@ -95,8 +317,13 @@ async def generate_code_for_project(project_id: str, request: UpdateProjectReque
         if not current_project_files:
             add_log(f"Aucun fichier trouvé pour le projet {project_id}, le LLM commencera à partir de zéro.", level="WARNING")
 
+        llm_prompt = request.prompt
+        if request.profile_run_id:
+            report = await asyncio.to_thread(get_profile_report, project_id, request.profile_run_id)
+            llm_prompt = f"{request.prompt}\n\n{format_profile_for_prompt(report)}"
+
         updated_generated_files = await generate_pyside_code(
-            request.prompt,
+            llm_prompt,
             current_files_context=current_project_files,
             llm_provider=request.llm_provider,
             model_name=request.model_name
@@ -105,10 +332,20 @@ async def generate_code_for_project(project_id: str, request: UpdateProjectReque
         if not updated_generated_files:
             raise HTTPException(status_code=500, detail="Le LLM n'a pas généré de fichiers pour la mise à jour.")
 
-        update_project_files(project_id, updated_generated_files, prompt=request.prompt, llm_response=updated_generated_files)
+        validation = await validate_generated_files(updated_generated_files, existing_files=current_project_files)
 
-        final_project_files = get_project_files_content(project_id)
-        return ProjectFilesResponse(project_id=project_id, files=final_project_files)
+        # Sérialisé par projet dans update_project_files ; les autres projets ne sont pas bloqués
+        await asyncio.to_thread(
+            update_project_files,
+            project_id,
+            updated_generated_files,
+            prompt=request.prompt,
+            llm_response=updated_generated_files
+        )
+        await asyncio.to_thread(_save_validation_problem, project_id, validation)
+
+        final_project_files, assets = load_project_files(project_id)
+        return ProjectFilesResponse(project_id=project_id, files=final_project_files, validation=validation, assets=assets)
 
     except ProjectNotFoundException as e:
         add_log(f"Projet non trouvé: {project_id} - {e}", level="WARNING")
@@ -117,15 +354,23 @@ async def generate_code_for_project(project_id: str, request: UpdateProjectReque
         add_log(f"Erreur lors de la génération de code pour le projet {project_id}: {e}", level="ERROR")
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
 
-@router.get("/projects/", response_model=List[ProjectInfo], summary="Liste tous les projets existants")
-async def get_projects():
+@router.get("/projects/", response_model=ProjectListResponse, summary="Liste paginée des projets existants")
+async def get_projects(
+    sort: str = Query("updated", description="Tri : name, created ou updated"),
+    order: str = Query("desc", description="Ordre : asc ou desc"),
+    q: Optional[str] = Query(None, description="Filtre sur le nom (sous-chaîne, insensible à la casse)"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente")
+):
     """
-    Retourne une liste de tous les projets enregistrés, incluant leur ID et un nom.
+    Retourne une page de projets avec leur résumé (dates, nombre de tours et de fichiers,
+    état de la dernière exécution), lue dans la base d'état partagée.
     """
-    add_log("Requête: Liste de tous les projets.")
+    add_log("Requête: Liste des projets.", sort=sort, order=order, q=q, cursor=bool(cursor))
     try:
-        projects = list_all_projects()
-        return projects
+        return await asyncio.to_thread(list_project_page, sort, order, q, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         add_log(f"Erreur lors de la récupération de la liste des projets: {e}", level="ERROR")
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
@@ -133,12 +378,13 @@ async def get_projects():
 @router.get("/projects/{project_id}/files", response_model=ProjectFilesResponse, summary="Récupère tous les fichiers d'un projet spécifique")
 async def get_project_files(project_id: str):
     """
-    Retourne le contenu de tous les fichiers Python d'un projet donné par son ID.
+    Retourne le contenu des fichiers texte d'un projet donné par son ID ; les fichiers binaires
+    ou trop volumineux sont listés dans `assets` (contenu via /files/{project_id}/content/...).
     """
     add_log(f"Requête: Récupération des fichiers pour le projet {project_id}.")
     try:
-        files_content = get_project_files_content(project_id)
-        return ProjectFilesResponse(project_id=project_id, files=files_content)
+        files_content, assets = load_project_files(project_id)
+        return ProjectFilesResponse(project_id=project_id, files=files_content, assets=assets)
     except ProjectNotFoundException as e:
         add_log(f"Projet non trouvé lors de la récupération des fichiers: {project_id} - {e}", level="WARNING")
         raise HTTPException(status_code=404, detail=str(e))
@@ -147,14 +393,26 @@ async def get_project_files(project_id: str):
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
 
 @router.get("/projects/{project_id}/problem_status", response_model=ProblemStatusResponse, summary="Récupère l'état du problème pour un projet PySide6")
-async def get_project_problem_status(project_id: str):
+async def get_project_problem_status(
+    project_id: str,
+    since: Optional[int] = Query(None, ge=0, description="Version connue : la réponse attend un changement (long-polling)"),
+    timeout: float = Query(LONG_POLL_TIMEOUT_SECONDS, gt=0, le=LONG_POLL_MAX_TIMEOUT_SECONDS)
+):
     """
-    Retourne les données du problème (problem.json) pour un projet donné, ou null s'il n'y a pas de problème.
+    Retourne les données du problème (problem.json) pour un projet donné, ou null s'il n'y a pas de problème,
+    avec la version du projet. Avec `since`, la réponse est différée jusqu'à ce que la version dépasse
+    `since` (ou jusqu'à `timeout` secondes, version inchangée).
     """
-    add_log(f"Requête: Récupération du statut du problème pour le projet {project_id}.")
+    add_log(f"Requête: Récupération du statut du problème pour le projet {project_id}.", level="DEBUG")
     try:
-        problem_data = get_project_problem(project_id)
-        return {"problem": problem_data}
+        if since is not None:
+            if not os.path.isdir(_get_project_path(project_id)):
+                raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+            version = await event_bus.wait_for_change(project_id, since, timeout)
+        else:
+            version = await asyncio.to_thread(get_project_version, project_id)
+        problem_data = await asyncio.to_thread(get_project_problem, project_id)
+        return {"problem": problem_data, "version": version}
     except ProjectNotFoundException as e:
         add_log(f"Projet non trouvé lors de la récupération du statut du problème: {project_id} - {e}", level="WARNING")
         raise HTTPException(status_code=404, detail=str(e))
@@ -162,15 +420,66 @@ async def get_project_problem_status(project_id: str):
         add_log(f"Erreur lors de la récupération du statut du problème pour {project_id}: {e}", level="ERROR")
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
 
+
+def _sse_message(seq: int, kind: str, data: Any) -> str:
+    """Formate un événement Server-Sent Events ; `data` contient la version et la charge utile."""
+    return f"id: {seq}\nevent: {kind}\ndata: {dumps({'version': seq, kind: data})}\n\n"
+
+
+def _project_run_state(project_id: str) -> Dict[str, Any]:
+    app = next((app for app in get_running_apps() if app["project_id"] == project_id), None)
+    return {"state": "running", "pid": app["pid"]} if app else {"state": "stopped"}
+
+
+@router.get("/projects/{project_id}/events", summary="Flux SSE des changements de problème et d'exécution d'un projet")
+async def project_events(project_id: str, last_event_id: Optional[int] = Header(None)):
+    """
+    Flux text/event-stream : événements `problem` (problem.json enregistré ou effacé) et `run`
+    (starting, running, stopped, crashed). À la connexion, l'état courant est envoyé ; à une
+    reconnexion (en-tête Last-Event-ID), les événements manqués sont rejoués.
+    """
+    if not os.path.isdir(_get_project_path(project_id)):
+        raise HTTPException(status_code=404, detail=f"Projet avec l'ID {project_id} non trouvé.")
+    add_log(f"Requête: Abonnement aux événements du projet {project_id}.", level="DEBUG")
+
+    async def stream():
+        async with event_bus.subscribe(project_id) as queue:
+            if last_event_id is not None:
+                missed = await asyncio.to_thread(events_since, last_event_id, project_id)
+                last_sent = last_event_id
+                for event in missed:
+                    last_sent = event["seq"]
+                    yield _sse_message(event["seq"], event["kind"], event["data"])
+            else:
+                last_sent = await asyncio.to_thread(get_project_version, project_id)
+                yield _sse_message(last_sent, "problem", await asyncio.to_thread(get_project_problem, project_id))
+                yield _sse_message(last_sent, "run", await asyncio.to_thread(_project_run_state, project_id))
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event["seq"] > last_sent:
+                    last_sent = event["seq"]
+                    yield _sse_message(event["seq"], event["kind"], event["data"])
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # NOUVELLE ROUTE : Récupère l'historique d'un projet
 @router.get("/projects/{project_id}/history", response_model=ProjectHistoryResponse, summary="Récupère l'historique des prompts et réponses LLM pour un projet")
 async def get_project_history_route(project_id: str):
     """
     Retourne le contenu du fichier history.json pour un projet donné.
+    Pour un fork, l'historique du projet source jusqu'au fork est inclus.
     """
     add_log(f"Requête: Récupération de l'historique pour le projet {project_id}.")
     try:
-        history_data = get_project_history(project_id) # Appel à la fonction de project_manager
+        history_data = resolve_project_history(project_id) # Appel à la fonction de project_manager
         return {"history": history_data}
     except ProjectNotFoundException as e:
         add_log(f"Projet non trouvé lors de la récupération de l'historique: {project_id} - {e}", level="WARNING")
@@ -180,6 +489,31 @@ async def get_project_history_route(project_id: str):
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
 
 
+@router.get("/projects/{project_id}/export", summary="Télécharge le projet sous forme d'archive (zip ou tar.gz) en streaming")
+async def export_project(project_id: str, format: str = Query("zip", description="Format de l'archive : zip ou tar.gz")):
+    """
+    Envoie l'archive du projet au fur et à mesure de sa construction (StreamingResponse) :
+    les fichiers sont lus par blocs et les artefacts d'exécution (.venv, historique, logs...)
+    sont exclus selon les mêmes règles que le contexte LLM.
+    """
+    add_log(f"Requête: Export du projet {project_id} au format {format}.")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format d'export '{format}' non supporté (zip ou tar.gz).")
+    try:
+        history = get_project_history(project_id)
+    except ProjectNotFoundException as e:
+        add_log(f"Projet non trouvé lors de l'export: {project_id} - {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception:
+        history = {}
+
+    file_name = export_file_name(history.get("project_name", ""), project_id, format)
+    return StreamingResponse(
+        iter_project_archive(project_id, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
 # L'ancienne route /run_logs (si tu veux la garder pour d'autres usages, sinon elle peut être supprimée)
 @router.get("/projects/{project_id}/run_logs", summary="Récupère les logs bruts d'exécution de l'application PySide6 d'un projet")
 async def get_project_run_logs(project_id: str):
@@ -210,7 +544,7 @@ async def delete_single_project(project_id: str):
     """
     add_log(f"Requête: Suppression du projet {project_id}.")
     try:
-        delete_project(project_id)
+        await asyncio.to_thread(delete_project, project_id)
         return {"message": "Project deleted successfully"}
     except ProjectNotFoundException as e:
         add_log(f"Projet non trouvé lors de la suppression: {project_id} - {e}", level="WARNING")
@@ -219,6 +553,24 @@ async def delete_single_project(project_id: str):
         add_log(f"Erreur lors de la suppression du projet {project_id}: {e}", level="ERROR")
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
 
+@router.post("/projects/{project_id}/fork", response_model=ForkProjectResponse, summary="Duplique un projet existant (fork)")
+async def fork_single_project(project_id: str, request: Optional[ForkProjectRequest] = None):
+    """
+    Crée un nouveau projet à partir d'un projet existant, sans recopier le .venv :
+    reflinks quand le système de fichiers le permet, liens durs pour le venv, copie sinon.
+    L'historique du fork référence celui du projet source.
+    """
+    new_name = request.new_name if request else None
+    add_log(f"Requête: Fork du projet {project_id}.")
+    try:
+        return await asyncio.to_thread(fork_project, project_id, new_name)
+    except ProjectNotFoundException as e:
+        add_log(f"Projet non trouvé lors du fork: {project_id} - {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors du fork du projet {project_id}: {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur: {e}")
+
 @router.put("/projects/{project_id}/rename", summary="Renomme un projet existant")
 async def rename_single_project(project_id: str, request: RenameProjectRequest):
     """
@@ -226,7 +578,7 @@ async def rename_single_project(project_id: str, request: RenameProjectRequest):
     """
     add_log(f"Requête: Renommage du projet {project_id} en '{request.new_name}'.")
     try:
-        rename_project(project_id, request.new_name)
+        await asyncio.to_thread(rename_project, project_id, request.new_name)
         return {"message": f"Project {project_id} renamed to '{request.new_name}' successfully"}
     except ProjectNotFoundException as e:
         add_log(f"Projet non trouvé lors du renommage: {project_id} - {e}", level="WARNING")
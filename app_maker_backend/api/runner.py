@@ -1,15 +1,70 @@
 # app_maker_backend/api/runner.py
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
+from typing import List, Optional
 
-from core.app_runner import run_pyside_application, stop_pyside_application
-from core.logging_config import add_log
+import os
+import asyncio
+
+from core.app_runner import run_pyside_application, stop_pyside_application, get_running_apps
+from core.auto_fixer import make_project_run
+from core.profiler import profile_project, list_profile_reports, get_profile_report
+from core.smoke_runner import smoke_test_projects
+from core.config import (
+    AUTOFIX_DEFAULT_CANDIDATES,
+    AUTOFIX_MAX_CANDIDATES,
+    AUTOFIX_DEFAULT_MAX_ITERATIONS,
+    AUTOFIX_DEFAULT_TIME_BUDGET_SECONDS,
+    SMOKE_TEST_TIMEOUT_SECONDS,
+    PROFILE_DEFAULT_SECONDS,
+    PROFILE_MAX_SECONDS
+)
+from core.logging_config import add_log, log_context
 from core.project_manager import ProjectNotFoundException, _get_project_path
+from core.state_store import get_environment_state
 
 router = APIRouter()
 
 class RunProjectRequest(BaseModel):
     project_id: str
+    profile: bool = False # Lancement sous le profileur, attend la fin de la mesure et retourne le rapport
+    profile_seconds: float = PROFILE_DEFAULT_SECONDS
+    headless: bool = False # Profilage sans affichage (Qt offscreen)
+
+class AutoFixRequest(BaseModel):
+    project_id: str
+    llm_provider: str = "gemini"
+    model_name: str = "gemini-1.5-pro"
+    candidates: int = AUTOFIX_DEFAULT_CANDIDATES
+    max_iterations: int = AUTOFIX_DEFAULT_MAX_ITERATIONS
+    time_budget_seconds: float = AUTOFIX_DEFAULT_TIME_BUDGET_SECONDS
+
+class SmokeTestRequest(BaseModel):
+    project_ids: Optional[List[str]] = None # Tous les projets si omis
+    timeout_seconds: float = SMOKE_TEST_TIMEOUT_SECONDS
+    workers: Optional[int] = None # Nombre de cœurs par défaut
+    prepare_environments: bool = False
+
+class RunningApp(BaseModel):
+    project_id: str
+    pid: int
+    worker_pid: int # Worker uvicorn qui a lancé l'application
+    command: str
+    started_at: str
+    stopping: bool
+    local: bool # Lancée par le worker qui répond
+
+class RunnerStatusResponse(BaseModel):
+    running: bool
+    apps: List[RunningApp]
+
+class EnvironmentStatusResponse(BaseModel):
+    project_id: str
+    state: str # none, preparing, ready, failed, pending (préparation interrompue)
+    packages: List[str] = [] # Paquets déduits des imports, absents de requirements.txt
+    missing_packages: List[str] = [] # Modules importés hors liste blanche : à déclarer dans requirements.txt, jamais installés d'office
+    error: Optional[str] = None
+    updated_at: Optional[str] = None
 
 
 @router.post("/runner/run", summary="Lance une application PySide6 pour un projet donné")
@@ -17,8 +72,13 @@ async def run_project(request: RunProjectRequest, background_tasks: BackgroundTa
     """
     Lance l’application PySide6 associée au projet spécifié.
     Le fichier d’entrée est automatiquement détecté via # ENTRYPOINT, main.py, run.py ou premier .py trouvé.
+    Avec `profile`, l'application tourne au plus `profile_seconds` secondes sous le profileur
+    (durée des imports, délai jusqu'à la boucle d'événements, fonctions les plus coûteuses) ;
+    le rapport est enregistré et retourné.
     """
     add_log(f"Requête : lancement de l’application pour le projet {request.project_id}")
+    if request.profile:
+        return await _profile_project(request)
     try:
         project_path = _get_project_path(request.project_id)
         background_tasks.add_task(run_pyside_application, project_path)
@@ -31,6 +91,45 @@ async def run_project(request: RunProjectRequest, background_tasks: BackgroundTa
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
 
 
+async def _profile_project(request: RunProjectRequest):
+    if not 0 < request.profile_seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"profile_seconds doit être compris entre 0 et {PROFILE_MAX_SECONDS}.")
+    try:
+        with log_context(project_id=request.project_id):
+            report = await profile_project(request.project_id, seconds=request.profile_seconds, headless=request.headless)
+        return {"message": f"Profilage du projet {request.project_id} terminé.", "report": report}
+    except ProjectNotFoundException as e:
+        add_log(f"Projet non trouvé : {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        add_log(f"Erreur lors du profilage : {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
+
+
+@router.get("/runner/profiles/{project_id}", summary="Rapports de profilage d'un projet")
+async def profile_reports(project_id: str):
+    """
+    Retourne le résumé des rapports de profilage conservés pour le projet, du plus récent au plus ancien.
+    """
+    try:
+        return await asyncio.to_thread(list_profile_reports, project_id)
+    except ProjectNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/runner/profiles/{project_id}/{run_id}", summary="Rapport de profilage complet")
+async def profile_report(project_id: str, run_id: str):
+    """
+    Retourne un rapport de profilage (`latest` pour le plus récent).
+    """
+    try:
+        return await asyncio.to_thread(get_profile_report, project_id, run_id)
+    except ProjectNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.post("/runner/stop", summary="Arrête l’application PySide6 en cours d’exécution")
 async def stop_project():
     """
@@ -42,4 +141,89 @@ async def stop_project():
         return {"message": "Application PySide6 arrêtée."}
     except Exception as e:
         add_log(f"Erreur lors de l’arrêt : {e}", level="ERROR")
-        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
+
+
+@router.get("/runner/status", response_model=RunnerStatusResponse, summary="Applications PySide6 en cours d'exécution (tous workers)")
+async def runner_status():
+    """
+    Retourne les applications lancées, quel que soit le worker qui les a démarrées
+    (état partagé dans la base d'état).
+    """
+    try:
+        apps = await asyncio.to_thread(get_running_apps)
+        return {"running": bool(apps), "apps": apps}
+    except Exception as e:
+        add_log(f"Erreur lors de la lecture de l'état du runner : {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
+
+
+@router.get("/runner/environment/{project_id}", response_model=EnvironmentStatusResponse, summary="État de l'environnement virtuel d'un projet")
+async def environment_status(project_id: str):
+    """
+    Retourne l'état de la préparation de l'environnement virtuel du projet (lancée en
+    arrière-plan à chaque enregistrement du code), tous workers confondus.
+    """
+    if not os.path.isdir(_get_project_path(project_id)):
+        raise HTTPException(status_code=404, detail=f"Projet avec l'ID {project_id} non trouvé.")
+    try:
+        status = await asyncio.to_thread(get_environment_state, project_id)
+    except Exception as e:
+        add_log(f"Erreur lors de la lecture de l'état de l'environnement du projet {project_id} : {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
+    return status or {"project_id": project_id, "state": "none"}
+
+
+@router.post("/runner/autofix", summary="Lance, diagnostique et corrige automatiquement une application jusqu'à ce qu'elle démarre")
+async def autofix_project(request: AutoFixRequest):
+    """
+    Mode "make it run" : l'application est lancée sans affichage ; en cas d'échec, plusieurs
+    corrections candidates sont demandées au LLM en parallèle et validées chacune dans une copie
+    isolée du projet. La première qui démarre est enregistrée. Retourne le rapport des itérations.
+    """
+    add_log(f"Requête : correction automatique du projet {request.project_id}")
+    if not 1 <= request.candidates <= AUTOFIX_MAX_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"Le nombre de candidats doit être compris entre 1 et {AUTOFIX_MAX_CANDIDATES}.")
+    if request.max_iterations < 1 or request.time_budget_seconds <= 0:
+        raise HTTPException(status_code=400, detail="max_iterations et time_budget_seconds doivent être positifs.")
+    try:
+        with log_context(project_id=request.project_id):
+            return await make_project_run(
+                request.project_id,
+                llm_provider=request.llm_provider,
+                model_name=request.model_name,
+                candidates=request.candidates,
+                max_iterations=request.max_iterations,
+                time_budget_seconds=request.time_budget_seconds
+            )
+    except ProjectNotFoundException as e:
+        add_log(f"Projet non trouvé : {e}", level="WARNING")
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        add_log(f"Erreur lors de la correction automatique : {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
+
+
+
+@router.post("/runner/smoke_test", summary="Teste sans affichage un ensemble de projets et retourne un rapport réussite/échec")
+async def smoke_test(request: SmokeTestRequest):
+    """
+    Lance chaque application en mode headless (Qt offscreen) avec un délai ; une application
+    toujours vivante à l'échéance sans trace d'exception est considérée comme fonctionnelle.
+    Les lancements sont répartis sur un pool dimensionné au nombre de cœurs.
+    """
+    add_log(f"Requête : smoke test de {len(request.project_ids) if request.project_ids is not None else 'tous les'} projets")
+    if request.timeout_seconds <= 0:
+        raise HTTPException(status_code=400, detail="timeout_seconds doit être positif.")
+    try:
+        return await smoke_test_projects(
+            project_ids=request.project_ids,
+            timeout=request.timeout_seconds,
+            workers=request.workers,
+            prepare_environments=request.prepare_environments
+        )
+    except Exception as e:
+        add_log(f"Erreur lors du smoke test : {e}", level="ERROR")
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {e}")
@@ -0,0 +1,3 @@
+# app_maker_backend/benchmarks
+# Scripts de mesure de performance, à lancer depuis app_maker_backend :
+#   python -m benchmarks.bench_serialization
@@ -0,0 +1,111 @@
+# app_maker_backend/benchmarks/bench_serialization.py
+"""
+Compare la sérialisation JSON d'origine (json + indent=4 pour history.json, JSONResponse pour
+les réponses) à core.json_utils, et mesure la taille des réponses avant/après compression.
+Exemple : python -m benchmarks.bench_serialization --files 200 --file-kb 8 --prompts 100
+"""
+import argparse
+import gzip
+import json
+import time
+from typing import Any, Callable, Dict
+
+from fastapi.responses import JSONResponse
+
+from core.compression import brotli, compress_body
+from core.json_utils import HAS_ORJSON, FastJSONResponse, dumps_bytes, loads
+
+
+def _synthetic_files(file_count: int, file_kb: int) -> Dict[str, str]:
+    """Fichiers Python factices d'environ file_kb Ko chacun."""
+    line = "    self.label.setText(\"Résultat : {}\".format(value))  # mise à jour de l'interface\n"
+    body = line * max(1, (file_kb * 1024) // len(line))
+    return {f"module_{index:04d}.py": f"# module {index}\n{body}" for index in range(file_count)}
+
+
+def _synthetic_history(files: Dict[str, str], prompt_count: int) -> Dict[str, Any]:
+    """Historique factice : chaque prompt embarque une réponse LLM modifiant quelques fichiers."""
+    names = sorted(files)
+    prompts = []
+    for index in range(prompt_count):
+        changed = {name: files[name] for name in names[index % len(names):][:3]}
+        prompts.append({
+            "prompt": f"Ajoute la fonctionnalité numéro {index} à l'application.",
+            "llm_response": changed,
+            "timestamp": "2026-01-01T12:00:00"
+        })
+    return {"project_id": "bench", "initial_prompt": "Application de test", "prompts": prompts}
+
+
+def _timed(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Meilleur temps et temps médian (ms) sur `repeat` exécutions."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {"best_ms": round(durations[0], 3), "median_ms": round(durations[len(durations) // 2], 3)}
+
+
+def run(file_count: int, file_kb: int, prompt_count: int, repeat: int) -> Dict[str, Any]:
+    files = _synthetic_files(file_count, file_kb)
+    history = _synthetic_history(files, prompt_count)
+    response_content = {"project_id": "bench", "files": files, "validation": None, "assets": []}
+
+    old_history = json.dumps(history, indent=4, ensure_ascii=False).encode("utf-8")
+    new_history = dumps_bytes(history)
+    old_response = JSONResponse(response_content).body
+    new_response = FastJSONResponse(response_content).body
+
+    results: Dict[str, Any] = {
+        "parameters": {"files": file_count, "file_kb": file_kb, "prompts": prompt_count, "repeat": repeat, "orjson": HAS_ORJSON},
+        "history_write": {
+            "before": {**_timed(lambda: json.dumps(history, indent=4, ensure_ascii=False).encode("utf-8"), repeat), "bytes": len(old_history)},
+            "after": {**_timed(lambda: dumps_bytes(history), repeat), "bytes": len(new_history)}
+        },
+        "history_read": {
+            "before": _timed(lambda: json.loads(old_history.decode("utf-8")), repeat),
+            "after": _timed(lambda: loads(new_history), repeat)
+        },
+        "files_response": {
+            "before": {**_timed(lambda: JSONResponse(response_content), repeat), "bytes": len(old_response)},
+            "after": {**_timed(lambda: FastJSONResponse(response_content), repeat), "bytes": len(new_response)}
+        },
+        "compression": {
+            "gzip": {**_timed(lambda: compress_body(new_response, "gzip"), repeat), "bytes": len(gzip.compress(new_response, 6))}
+        }
+    }
+    if brotli is not None:
+        results["compression"]["br"] = {
+            **_timed(lambda: compress_body(new_response, "br"), repeat),
+            "bytes": len(compress_body(new_response, "br"))
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sérialisation JSON et de la compression des réponses.")
+    parser.add_argument("--files", type=int, default=200, help="Nombre de fichiers du projet synthétique.")
+    parser.add_argument("--file-kb", type=int, default=8, help="Taille de chaque fichier (Ko).")
+    parser.add_argument("--prompts", type=int, default=100, help="Nombre d'entrées dans l'historique.")
+    parser.add_argument("--repeat", type=int, default=10, help="Nombre de répétitions par mesure.")
+    parser.add_argument("--output", help="Fichier JSON où écrire les résultats.")
+    args = parser.parse_args()
+
+    results = run(args.files, args.file_kb, args.prompts, args.repeat)
+    for name in ("history_write", "history_read", "files_response"):
+        before, after = results[name]["before"], results[name]["after"]
+        speedup = before["median_ms"] / after["median_ms"] if after["median_ms"] else float("inf")
+        print(f"{name:15s} {before['median_ms']:9.2f} ms -> {after['median_ms']:9.2f} ms  (x{speedup:.1f})"
+              + (f"  {before['bytes']} -> {after['bytes']} octets" if "bytes" in before else ""))
+    for encoding, stats in results["compression"].items():
+        print(f"compression {encoding:4s} {stats['median_ms']:9.2f} ms  {results['files_response']['after']['bytes']} -> {stats['bytes']} octets")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
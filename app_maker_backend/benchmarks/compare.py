@@ -0,0 +1,46 @@
+# app_maker_backend/benchmarks/compare.py
+"""
+Compare deux fichiers de résultats de run_suite (ex. avant/après un commit) sur la médiane.
+Code de sortie 1 si un benchmark régresse au-delà du seuil.
+Exemple : python -m benchmarks.compare before.json after.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare deux résultats de benchmarks.")
+    parser.add_argument("baseline", help="Résultats de référence (JSON).")
+    parser.add_argument("candidate", help="Résultats à comparer (JSON).")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Régression tolérée (0.10 = +10 %%).")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    print(f"Référence : {baseline['meta'].get('git_revision')}   Candidat : {candidate['meta'].get('git_revision')}\n")
+    regressions = 0
+    for name, stats in candidate["benchmarks"].items():
+        before = baseline["benchmarks"].get(name, {}).get("median_ms")
+        after = stats.get("median_ms")
+        if before is None or after is None:
+            print(f"{name:40s} {'(nouveau)' if before is None else '(absent)'}")
+            continue
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  RÉGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "  amélioration"
+        print(f"{name:40s} {before:10.2f} ms -> {after:10.2f} ms  (x{ratio:.2f}){flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# app_maker_backend/benchmarks/fake_llm.py
+"""
+LLM factice en mémoire pour les scénarios HTTP : remplace l'appel au fournisseur
+(core.llm_service._generate_pyside_code) en conservant le sémaphore par fournisseur
+et la construction du contexte, avec une latence simulée.
+"""
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from core import llm_service
+
+_FAKE_MAIN = '''# ENTRYPOINT
+import sys
+from PySide6.QtWidgets import QApplication, QLabel
+
+
+def main():
+    app = QApplication(sys.argv)
+    label = QLabel("{text}")
+    label.show()
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+@contextmanager
+def fake_llm(latency_seconds: float = 0.05):
+    """Active le LLM factice le temps du bloc `with`."""
+    original = llm_service._generate_pyside_code
+
+    async def _fake_generate(
+        prompt: str,
+        current_files_context: Optional[Dict[str, str]],
+        llm_provider: str,
+        model_name: str,
+        temperature: Optional[float]
+    ) -> Dict[str, str]:
+        # Le contexte est construit comme pour un vrai fournisseur (coût mesuré)
+        llm_service._build_user_prompt(prompt, current_files_context)
+        await asyncio.sleep(latency_seconds)
+        return {"main.py": _FAKE_MAIN.format(text=prompt[:40].replace('"', "'"))}
+
+    llm_service._generate_pyside_code = _fake_generate
+    try:
+        yield
+    finally:
+        llm_service._generate_pyside_code = original
@@ -0,0 +1,280 @@
+# app_maker_backend/benchmarks/run_suite.py
+"""
+Suite de benchmarks reproductible : magasin de projets, construction du contexte LLM,
+/api/get_logs sur un fichier de log croissant, et charge HTTP de bout en bout avec un LLM factice.
+Tout s'exécute dans un dossier temporaire (APP_MAKER_PROJECTS_DIR / APP_MAKER_LOGS_DIR / APP_MAKER_STATE_DIR) :
+les vrais projets et logs ne sont pas touchés.
+
+Exemples (depuis app_maker_backend) :
+  python -m benchmarks.run_suite --output bench_results.json
+  python -m benchmarks.run_suite --projects 5000 --history 200 --output after.json
+  python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+def summarize(durations_ms: List[float]) -> Dict[str, Any]:
+    """Statistiques (ms) d'une série de mesures ; clés communes à tous les benchmarks."""
+    if not durations_ms:
+        return {"count": 0}
+    ordered = sorted(durations_ms)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "median_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1], 3)
+    }
+
+
+def time_calls(function: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Chronomètre `repeat` appels de function (setup, non mesuré, est appelé avant chacun)."""
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return summarize(durations)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_store(args, project_ids: List[str]) -> Dict[str, Any]:
+    """Magasin de projets : listing, lecture des fichiers, mises à jour et historique."""
+    from core.project_manager import (
+        list_all_projects, list_project_page, get_project_files_content, update_project_files,
+        get_project_history, save_project_history
+    )
+
+    results = {}
+    results["store.list_all_projects"] = time_calls(list_all_projects, args.repeat)
+    # Première page de la barre latérale : indépendante du nombre de projets
+    results["store.list_project_page"] = time_calls(lambda: list_project_page(limit=50), args.repeat)
+    # Le premier projet possède un faux .venv (venv_every) : son parcours doit l'ignorer
+    results["store.get_project_files_content"] = time_calls(lambda: get_project_files_content(project_ids[0]), args.repeat)
+
+    target = project_ids[-1]
+    files = get_project_files_content(target)
+    counter = iter(range(10 ** 9))
+    results["store.update_project_files"] = time_calls(
+        lambda: update_project_files(target, {"main.py": files["main.py"] + f"# tour {next(counter)}\n"},
+                                     prompt="Modification de benchmark", llm_response={"main.py": files["main.py"]}),
+        args.repeat
+    )
+    history = get_project_history(target)
+    results["store.save_project_history"] = {
+        **time_calls(lambda: save_project_history(target, history), args.repeat),
+        "history_entries": len(history["prompts"])
+    }
+    return results
+
+
+def bench_llm_context(args, project_ids: List[str]) -> Dict[str, Any]:
+    """Filtrage et assemblage du contexte envoyé au LLM (generate_pyside_code)."""
+    from core.llm_service import _build_user_prompt
+    from core.project_manager import get_project_files_content
+
+    context = get_project_files_content(project_ids[0])
+    # Fichiers exclus par LLM_CONTEXT_EXCLUSIONS, pour mesurer aussi le filtrage
+    context.update({f"notes_{n}.md": "# note\n" * 100 for n in range(20)})
+    return {
+        "llm.build_user_prompt": {
+            **time_calls(lambda: _build_user_prompt("Ajoute un bouton", context), args.repeat),
+            "context_files": len(context)
+        }
+    }
+
+
+async def _timed_request(client, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return (time.perf_counter() - start) * 1000, response
+
+
+async def bench_logs(args) -> Dict[str, Any]:
+    """/api/get_logs pour des fichiers de log de tailles croissantes."""
+    import httpx
+    from core import logging_config
+    from benchmarks.synthetic import grow_log_file
+    from main import app
+
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for size_mb in args.log_sizes_mb:
+            grow_log_file(logging_config.log_file_path, size_mb * 1024 * 1024)
+            durations = []
+            response_bytes = 0
+            for _ in range(args.repeat):
+                duration, response = await _timed_request(client, "GET", "/api/get_logs")
+                durations.append(duration)
+                response_bytes = len(response.content)
+            results[f"http.get_logs.{size_mb}mb"] = {**summarize(durations), "response_bytes": response_bytes}
+    return results
+
+
+async def bench_http_load(args, project_ids: List[str]) -> Dict[str, Any]:
+    """
+    Charge HTTP de bout en bout (ASGI en mémoire) : listing, lecture des fichiers et génération
+    avec le LLM factice, `concurrency` clients en parallèle.
+    """
+    import httpx
+    from benchmarks.fake_llm import fake_llm
+    from main import app
+
+    scenario = [
+        ("list_projects", "GET", lambda i: "/api/projects/", None),
+        ("project_files", "GET", lambda i: f"/api/projects/{project_ids[i % len(project_ids)]}/files", None),
+        ("generate", "POST", lambda i: f"/api/projects/{project_ids[i % len(project_ids)]}/generate",
+         {"prompt": "Ajoute un bouton", "llm_provider": "gemini", "model_name": "gemini-1.5-flash"}),
+    ]
+    durations: Dict[str, List[float]] = {name: [] for name, *_ in scenario}
+    errors: Dict[str, int] = {name: 0 for name, *_ in scenario}
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.http_requests):
+        queue.put_nowait((i, scenario[i % len(scenario)]))
+
+    async def worker(client):
+        while True:
+            try:
+                i, (name, method, url, body) = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            duration, response = await _timed_request(client, method, url(i), json=body)
+            durations[name].append(duration)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    with fake_llm(args.llm_latency):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    results = {f"http.load.{name}": {**summarize(values), "errors": errors[name]} for name, values in durations.items()}
+    results["http.load.total"] = {
+        **summarize([d for values in durations.values() for d in values]),
+        "errors": sum(errors.values()),
+        "concurrency": args.concurrency,
+        "throughput_rps": round(args.http_requests / elapsed, 2) if elapsed else None
+    }
+    return results
+
+
+def run_suite(args) -> Dict[str, Any]:
+    """Prépare l'arborescence synthétique puis exécute les benchmarks demandés."""
+    import logging
+    from benchmarks.synthetic import generate_projects_tree
+    from core import logging_config
+    from core.config import BASE_PROJECTS_DIR
+    from core.json_utils import HAS_ORJSON
+
+    # La console ne garde que les avertissements : les logs INFO fausseraient les mesures
+    logging_config.console_handler.setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    project_ids = generate_projects_tree(
+        BASE_PROJECTS_DIR, args.projects,
+        file_count=args.files, file_lines=args.file_lines, history_length=args.history,
+        venv_every=args.venv_every, venv_packages=args.venv_packages, seed=args.seed
+    )
+    setup_seconds = round(time.perf_counter() - start, 3)
+
+    benchmarks: Dict[str, Any] = {}
+    selected = set(args.only or ["store", "llm", "logs", "http"])
+    if "store" in selected:
+        benchmarks.update(bench_store(args, project_ids))
+    if "llm" in selected:
+        benchmarks.update(bench_llm_context(args, project_ids))
+    if "logs" in selected:
+        benchmarks.update(asyncio.run(bench_logs(args)))
+    if "http" in selected:
+        benchmarks.update(asyncio.run(bench_http_load(args, project_ids)))
+
+    return {
+        "meta": {
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "orjson": HAS_ORJSON,
+            "cpu_count": os.cpu_count(),
+            "started_at": datetime.now().isoformat(),
+            "setup_seconds": setup_seconds
+        },
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output", "work_dir", "keep")
+        },
+        "benchmarks": benchmarks
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Suite de benchmarks d'app_maker_backend.")
+    parser.add_argument("--projects", type=int, default=1000, help="Nombre de projets synthétiques.")
+    parser.add_argument("--files", type=int, default=6, help="Fichiers par projet.")
+    parser.add_argument("--file-lines", type=int, default=200, help="Lignes par fichier.")
+    parser.add_argument("--history", type=int, default=50, help="Tours (prompt + réponse) par historique.")
+    parser.add_argument("--venv-every", type=int, default=10, help="Un faux .venv tous les N projets (0 : aucun).")
+    parser.add_argument("--venv-packages", type=int, default=50, help="Paquets par faux .venv.")
+    parser.add_argument("--seed", type=int, default=42, help="Graine de génération.")
+    parser.add_argument("--repeat", type=int, default=20, help="Répétitions par mesure.")
+    parser.add_argument("--log-sizes-mb", type=int, nargs="+", default=[1, 10, 50], help="Tailles successives du fichier de log.")
+    parser.add_argument("--http-requests", type=int, default=300, help="Requêtes du scénario de charge HTTP.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clients HTTP simultanés.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Latence simulée du LLM factice (secondes).")
+    parser.add_argument("--only", nargs="+", choices=["store", "llm", "logs", "http"], help="Limite la suite à ces groupes.")
+    parser.add_argument("--work-dir", help="Dossier de travail (temporaire par défaut).")
+    parser.add_argument("--keep", action="store_true", help="Conserve le dossier de travail.")
+    parser.add_argument("--output", help="Fichier JSON où écrire les résultats.")
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="app_maker_bench_")
+    # Avant tout import de core : config et logging_config lisent ces variables au chargement
+    os.environ["APP_MAKER_PROJECTS_DIR"] = os.path.join(work_dir, "generated_projects")
+    os.environ["APP_MAKER_LOGS_DIR"] = os.path.join(work_dir, "logs")
+    os.environ["APP_MAKER_STATE_DIR"] = os.path.join(work_dir, "state")
+
+    try:
+        results = run_suite(args)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for name, stats in results["benchmarks"].items():
+        if stats.get("count"):
+            print(f"{name:40s} médiane {stats['median_ms']:10.2f} ms   p95 {stats['p95_ms']:10.2f} ms   (n={stats['count']})")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nRésultats écrits dans {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# app_maker_backend/benchmarks/synthetic.py
+"""
+Génération d'arborescences generated_projects synthétiques : nombreux projets, historiques
+longs et faux .venv. Les fichiers sont écrits directement (sans fsync ni verrous) pour que
+la préparation de milliers de projets reste rapide ; le format est celui de project_manager.
+"""
+import json
+import os
+import random
+import uuid
+from typing import Dict, List
+
+_MAIN_TEMPLATE = '''# ENTRYPOINT
+import sys
+from PySide6.QtWidgets import QApplication
+from window_{index} import MainWindow
+
+
+def main():
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+_WINDOW_LINE = "        self.label_{n} = QLabel(\"Élément {n}\")  # ligne générée pour le benchmark\n"
+
+
+def synthetic_files(index: int, file_count: int, file_lines: int) -> Dict[str, str]:
+    """Fichiers d'un projet synthétique : main.py, une fenêtre et des modules utilitaires."""
+    window_body = "".join(_WINDOW_LINE.format(n=n) for n in range(file_lines))
+    files = {
+        "main.py": _MAIN_TEMPLATE.format(index=index),
+        f"window_{index}.py": (
+            "from PySide6.QtWidgets import QLabel, QMainWindow\n\n\n"
+            "class MainWindow(QMainWindow):\n    def __init__(self):\n        super().__init__()\n" + window_body
+        ),
+        "style.qss": "QLabel { color: #333; }\n" * 20,
+        "requirements.txt": "PySide6\n",
+    }
+    for module in range(max(0, file_count - len(files))):
+        files[f"utils/helpers_{module}.py"] = "".join(f"def helper_{n}(value):\n    return value * {n}\n\n" for n in range(file_lines // 2))
+    return files
+
+
+def synthetic_history(project_name: str, files: Dict[str, str], history_length: int) -> Dict:
+    """Historique alternant prompts utilisateur et réponses LLM (quelques fichiers par tour)."""
+    names = sorted(files)
+    prompts: List[Dict] = []
+    for turn in range(history_length):
+        prompts.append({"type": "user", "content": f"Modification numéro {turn} de l'application", "timestamp": "2026-01-01T12:00:00"})
+        changed = {name: files[name] for name in names[turn % len(names):][:2]}
+        prompts.append({"type": "llm_response", "content": changed, "timestamp": "2026-01-01T12:00:01"})
+    return {"project_name": project_name, "prompts": prompts}
+
+
+def _write(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _write_fake_venv(project_path: str, package_count: int):
+    """Faux .venv : arborescence site-packages de petits fichiers (à ignorer par les parcours)."""
+    site_packages = os.path.join(project_path, ".venv", "lib", "python3.11", "site-packages")
+    for package in range(package_count):
+        package_dir = os.path.join(site_packages, f"fakepkg_{package}")
+        for module in range(5):
+            _write(os.path.join(package_dir, f"module_{module}.py"), "VALUE = 1\n" * 50)
+    _write(os.path.join(project_path, ".venv", "pyvenv.cfg"), "home = /usr/bin\n")
+
+
+def generate_projects_tree(
+    base_dir: str,
+    project_count: int,
+    file_count: int = 6,
+    file_lines: int = 200,
+    history_length: int = 20,
+    venv_every: int = 10,
+    venv_packages: int = 50,
+    seed: int = 42
+) -> List[str]:
+    """
+    Crée project_count projets dans base_dir. Un projet sur venv_every reçoit un faux .venv.
+    Retourne les IDs créés (déterministes pour une graine donnée).
+    """
+    rng = random.Random(seed)
+    project_ids = []
+    for index in range(project_count):
+        project_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        project_path = os.path.join(base_dir, project_id)
+        files = synthetic_files(index, file_count, file_lines)
+        for name, content in files.items():
+            _write(os.path.join(project_path, name), content)
+        history = synthetic_history(f"Projet synthétique {index}", files, history_length)
+        _write(os.path.join(project_path, "history.json"), json.dumps(history, ensure_ascii=False))
+        if venv_every and index % venv_every == 0:
+            _write_fake_venv(project_path, venv_packages)
+        project_ids.append(project_id)
+    return project_ids
+
+
+def grow_log_file(log_path: str, size_bytes: int):
+    """Complète le fichier de log jusqu'à size_bytes avec des enregistrements au format JSON du logger."""
+    line = json.dumps({
+        "timestamp": "2026-01-01T12:00:00.000",
+        "level": "INFO",
+        "message": "Requête: Récupération des fichiers pour le projet 00000000-0000-4000-8000-000000000000.",
+        "request_id": "0123456789abcdef0123456789abcdef",
+        "project_id": "00000000-0000-4000-8000-000000000000"
+    }, ensure_ascii=False) + "\n"
+    current = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+    missing = size_bytes - current
+    if missing > 0:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(line * (missing // len(line.encode("utf-8")) + 1))
@@ -5,15 +5,94 @@ import sys
 import asyncio
 import json
 import re
+import signal
+import time
 from datetime import datetime
+from typing import Any, Dict, List
 from fastapi import HTTPException
-from core.logging_config import add_log
+from core.config import SMOKE_TEST_TIMEOUT_SECONDS
+from core.logging_config import add_log, log_context
+from core.tracing import span
+from core.metrics import RUNNER_STAGE_DURATION, RUNNER_STAGE_ERRORS, gauge
+from core.env_manager import ensure_project_environment
+from core.events import publish_project_event
 from core.project_manager import save_project_problem, clear_project_problem
+from core.state_store import (
+    register_running_app, list_running_apps, get_running_app, mark_running_app_stopping, remove_running_app
+)
 import glob
 
-# Variable globale pour stocker le processus de l'application PySide6
+# Processus de l'application PySide6 lancée par CE worker (lecture de stdout/stderr).
+# La liste partagée des applications lancées (tous workers) est dans state_store.
 pyside_app_process = None
 
+# Délai laissé à une application pour s'arrêter après SIGTERM, avant SIGKILL
+STOP_TIMEOUT_SECONDS = 5
+
+
+def _pid_alive(pid: int) -> bool:
+    """Indique si un processus existe encore (quel que soit le worker qui l'a lancé)."""
+    if sys.platform == "win32":
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # Sous Linux, on vérifie que le PID n'a pas été réattribué à un autre programme
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            if f.read().rsplit(b")", 1)[-1].split()[0] == b"Z":
+                return False  # zombie : terminé, pas encore récupéré par son parent
+    except OSError:
+        pass
+    return True
+
+
+def _command_matches(pid: int, command: str) -> bool:
+    """Sous Linux, vérifie que le PID exécute bien la commande enregistrée (PID réattribué sinon)."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read().replace(b"\0", b" ").decode("utf-8", errors="replace").strip()
+    except OSError:
+        return True  # pas de /proc (macOS, Windows) : on se fie au PID
+    return cmdline == command
+
+
+def get_running_apps() -> List[Dict[str, Any]]:
+    """
+    Applications lancées, tous workers confondus : projet, PID, worker propriétaire, commande,
+    date de lancement. Les entrées des autres workers dont le processus a disparu sont retirées au passage.
+    """
+    apps = []
+    for app in list_running_apps():
+        local = app["worker_pid"] == os.getpid()
+        if _pid_alive(app["pid"]) and _command_matches(app["pid"], app["command"]):
+            apps.append({**app, "stopping": bool(app["stopping"]), "local": local})
+        elif not local:
+            # Les entrées de ce worker sont retirées par watch_exit (qui distingue arrêt et plantage)
+            remove_running_app(app["project_id"], app["pid"])
+    return apps
+
+
+def _count_running_apps() -> int:
+    """Nombre d'applications lancées encore vivantes, en lecture seule (le nettoyage reste à get_running_apps)."""
+    return sum(1 for app in list_running_apps() if _pid_alive(app["pid"]) and _command_matches(app["pid"], app["command"]))
+
+
+RUNNING_APPS = gauge(
+    "app_maker_running_apps", "Applications PySide6 lancées par l'utilisateur en cours d'exécution (tous workers).",
+    callback=lambda: {(): _count_running_apps()}
+)
+
 
 def _detect_entrypoint(project_path: str) -> str:
     """
@@ -45,105 +124,186 @@ def _detect_entrypoint(project_path: str) -> str:
     return candidates[0]
 
 
+# Délai de lecture de la fin de stderr après l'arrêt d'un lancement sans affichage
+STDERR_DRAIN_TIMEOUT_SECONDS = 5
+
+
+def _kill_process_group(process):
+    """
+    Tue un processus lancé avec start_new_session=True et tous ses descendants (groupe de
+    processus) : un sous-processus qui garderait le tube stderr ouvert bloquerait sa lecture.
+    """
+    if sys.platform == "win32":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _wait_process_exit(process, timeout: float):
+    """
+    Attend la sortie du processus, sans attendre la fermeture de ses tubes (process.wait() les
+    attend aussi, or un sous-processus peut les garder ouverts). Lève asyncio.TimeoutError à l'échéance.
+    """
+    deadline = time.monotonic() + timeout
+    waiter = asyncio.ensure_future(process.wait())
+    try:
+        while process.returncode is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            await asyncio.wait({waiter}, timeout=min(0.1, remaining))
+    finally:
+        waiter.cancel()
+
+
+async def _read_chunks(stream: asyncio.StreamReader, chunks: List[bytes]):
+    while chunk := await stream.read(65536):
+        chunks.append(chunk)
+
+
+async def _drain_stderr(stderr_task: asyncio.Task, chunks: List[bytes]) -> str:
+    """Sortie d'erreur lue jusqu'à la fermeture du tube, ou ce qui en a été reçu après STDERR_DRAIN_TIMEOUT_SECONDS."""
+    try:
+        await asyncio.wait_for(stderr_task, timeout=STDERR_DRAIN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+    return b"".join(chunks).decode("utf-8", errors="replace")
+
+
+async def smoke_run_project(project_path: str, python_executable: str, timeout: float = SMOKE_TEST_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """
+    Lance le point d'entrée d'un projet sans affichage (plateforme Qt "offscreen") pendant au plus
+    `timeout` secondes. Le test réussit si l'application est toujours vivante à l'échéance
+    (ou s'est terminée avec le code 0) sans trace d'exception sur stderr.
+    Ne touche ni à problem.json ni à l'application lancée par l'utilisateur.
+    """
+    start = time.perf_counter()
+    try:
+        entry_file = _detect_entrypoint(project_path)
+    except FileNotFoundError as e:
+        return {"passed": False, "reason": "no_entrypoint", "returncode": None, "stderr": str(e),
+                "duration_seconds": round(time.perf_counter() - start, 3)}
+
+    env = {**os.environ, "QT_QPA_PLATFORM": "offscreen", "PYTHONUNBUFFERED": "1"}
+    process = await asyncio.create_subprocess_exec(
+        python_executable, entry_file,
+        cwd=project_path,
+        env=env,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True  # groupe de processus propre : les sous-processus sont tués avec l'application
+    )
+    stderr_chunks: List[bytes] = []
+    stderr_task = asyncio.create_task(_read_chunks(process.stderr, stderr_chunks))
+
+    still_alive = False
+    try:
+        await _wait_process_exit(process, timeout)
+    except asyncio.TimeoutError:
+        still_alive = True
+        _kill_process_group(process)
+        await _wait_process_exit(process, STOP_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        # Candidat abandonné (ex. un autre a déjà réussi) : on ne laisse pas de processus orphelin
+        _kill_process_group(process)
+        stderr_task.cancel()
+        raise
+    if not still_alive:
+        _kill_process_group(process)  # sous-processus restés en vie après la sortie de l'application
+
+    stderr_output = await _drain_stderr(stderr_task, stderr_chunks)
+    has_traceback = "Traceback (most recent call last)" in stderr_output
+
+    if has_traceback:
+        passed, reason = False, "traceback"
+    elif still_alive:
+        passed, reason = True, "alive_at_deadline"
+    elif process.returncode == 0:
+        passed, reason = True, "clean_exit"
+    else:
+        passed, reason = False, "exit_code"
+
+    return {
+        "passed": passed,
+        "reason": reason,
+        "returncode": None if still_alive else process.returncode,
+        "stderr": stderr_output,
+        "duration_seconds": round(time.perf_counter() - start, 3)
+    }
+
+
 async def run_pyside_application(project_path_absolute: str):
     """
     Lance l'application PySide6 générée dans un processus séparé.
     Capture stdout et stderr pour détecter les erreurs et les enregistrer dans problem.json.
+    Les logs (y compris la sortie de l'application) portent le project_id.
     """
+    with log_context(project_id=os.path.basename(project_path_absolute)):
+        await _run_pyside_application(project_path_absolute)
+
+
+async def _run_pyside_application(project_path_absolute: str):
+    """Implémentation de run_pyside_application, exécutée dans le contexte de log du projet."""
     global pyside_app_process
 
-    # Arrêt propre d’un éventuel processus déjà en cours
-    if pyside_app_process and pyside_app_process.poll() is None:
+    # Arrêt propre d’une éventuelle application déjà en cours (lancée par n'importe quel worker)
+    if await asyncio.to_thread(get_running_apps):
         add_log("Une application PySide6 est déjà en cours. Tentative de l'arrêter...", level="WARNING")
-        pyside_app_process.terminate()
-        try:
-            await asyncio.to_thread(pyside_app_process.wait, timeout=5)
-            add_log("Application précédente terminée avec succès.", level="INFO")
-        except subprocess.TimeoutExpired:
-            pyside_app_process.kill()
-            add_log("Application précédente forcée à quitter.", level="WARNING")
-        pyside_app_process = None
+        await _stop_running_apps()
 
     project_id = os.path.basename(project_path_absolute)
-    clear_project_problem(project_id)
+    await asyncio.to_thread(clear_project_problem, project_id)
     add_log(f"Problème précédent effacé pour le projet {project_id}.", level="INFO")
 
-    venv_path = os.path.join(project_path_absolute, ".venv")
-
     # Détection du point d’entrée
     try:
         entry_file = _detect_entrypoint(project_path_absolute)
     except FileNotFoundError as e:
         error_message = str(e)
         add_log(error_message, level="ERROR")
-        save_project_problem(project_id, {"type": "no_entrypoint", "message": error_message})
+        await asyncio.to_thread(save_project_problem, project_id, {"type": "no_entrypoint", "message": error_message})
         raise HTTPException(status_code=404, detail=error_message)
 
-    if sys.platform == "win32":
-        python_executable = os.path.join(venv_path, "Scripts", "python.exe")
-    else:
-        python_executable = os.path.join(venv_path, "bin", "python")
-
-    # Création venv si besoin
-    if not os.path.exists(python_executable):
-        add_log(f"Environnement virtuel non trouvé dans {venv_path}. Création...", level="INFO")
-        try:
-            subprocess.run([sys.executable, "-m", "venv", venv_path], check=True)
-            add_log("Environnement virtuel créé avec succès.", level="INFO")
-        except subprocess.CalledProcessError as e:
-            error_message = f"Erreur lors de la création de l'environnement virtuel : {e}"
-            add_log(error_message, level="ERROR")
-            save_project_problem(project_id, {"type": "venv_creation_error", "message": error_message, "details": str(e)})
-            raise HTTPException(status_code=500, detail=error_message)
-
-    # Vérification / installation PySide6
+    await asyncio.to_thread(publish_project_event, project_id, "run", {"state": "starting"})
+    # Attend la préparation anticipée en cours (env_manager) ; rien à refaire si l'environnement est prêt
     try:
-        subprocess.run([python_executable, "-c", "import PySide6"], check=True, capture_output=True, text=True)
-        add_log("PySide6 est déjà installé dans l'environnement virtuel.", level="INFO")
-    except subprocess.CalledProcessError:
-        add_log("PySide6 non trouvé dans l'environnement virtuel. Installation...", level="INFO")
-        pip_executable = os.path.join(venv_path, "bin", "pip") if sys.platform != "win32" else os.path.join(venv_path, "Scripts", "pip.exe")
-        try:
-            subprocess.run([pip_executable, "install", "PySide6"], check=True, capture_output=True, text=True)
-            add_log("PySide6 installé avec succès.", level="INFO")
-        except subprocess.CalledProcessError as e:
-            error_message = f"Erreur lors de l'installation de PySide6 : {e.stderr}"
-            add_log(error_message, level="ERROR")
-            save_project_problem(project_id, {"type": "pyside6_install_error", "message": error_message, "details": e.stderr})
-            raise HTTPException(status_code=500, detail=error_message)
-
-    # Installation requirements.txt
-    requirements_file_path = os.path.join(project_path_absolute, "requirements.txt")
-    if os.path.exists(requirements_file_path):
-        add_log("Fichier requirements.txt trouvé. Installation des dépendances...", level="INFO")
-        pip_executable = os.path.join(venv_path, "bin", "pip") if sys.platform != "win32" else os.path.join(venv_path, "Scripts", "pip.exe")
-        try:
-            subprocess.run([pip_executable, "install", "-r", requirements_file_path], check=True, capture_output=True, text=True)
-            add_log("Dépendances installées avec succès.", level="INFO")
-        except subprocess.CalledProcessError as e:
-            error_message = f"Erreur lors de l'installation des dépendances : {e.stderr}"
-            add_log(error_message, level="ERROR")
-            save_project_problem(project_id, {"type": "requirements_install_error", "message": error_message, "details": e.stderr})
-            raise HTTPException(status_code=500, detail=error_message)
+        python_executable = await ensure_project_environment(project_path_absolute)
+    except asyncio.CancelledError:
+        await asyncio.shield(asyncio.to_thread(publish_project_event, project_id, "run", {"state": "stopped"}))
+        raise
+    except Exception as e:
+        # État terminal publié : les abonnés SSE et la liste des projets ne restent pas à "starting"
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        await asyncio.to_thread(publish_project_event, project_id, "run", {"state": "failed", "error": error})
+        raise
 
     # Lancement effectif
     command = [python_executable, entry_file]
     add_log(f"Commande d'exécution : {' '.join(command)}", level="INFO")
 
     try:
-        pyside_app_process = subprocess.Popen(
-            command,
-            cwd=project_path_absolute,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
-        )
+        with RUNNER_STAGE_DURATION.time(stage="spawn"), span("runner.spawn"):
+            pyside_app_process = subprocess.Popen(
+                command,
+                cwd=project_path_absolute,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1
+            )
         add_log(f"Application PySide6 lancée. PID : {pyside_app_process.pid}", level="INFO")
+        await asyncio.to_thread(register_running_app, project_id, pyside_app_process.pid, " ".join(command))
+        await asyncio.to_thread(publish_project_event, project_id, "run", {"state": "running", "pid": pyside_app_process.pid})
     except Exception as e:
+        RUNNER_STAGE_ERRORS.inc(stage="spawn")
         error_message = f"Erreur lors du lancement : {e}"
         add_log(error_message, level="ERROR")
-        save_project_problem(project_id, {"type": "launch_error", "message": error_message, "details": str(e)})
+        await asyncio.to_thread(save_project_problem, project_id, {"type": "launch_error", "message": error_message, "details": str(e)})
+        await asyncio.to_thread(publish_project_event, project_id, "run", {"state": "failed", "error": error_message})
         raise HTTPException(status_code=500, detail=error_message)
 
     # Lecture asynchrone des logs
@@ -159,37 +319,108 @@ async def run_pyside_application(project_path_absolute: str):
             add_log(f"App Output ({log_level}): {line.strip()}", level=log_level.upper())
         stream.close()
 
+    async def watch_exit(process, started_at, stderr_task):
+        # Plantage : sortie en erreur sans arrêt demandé (par ce worker ou un autre), à tout moment
+        returncode = await asyncio.to_thread(process.wait)
+        entry = await asyncio.to_thread(get_running_app, project_id)
+        stopped_by_user = getattr(process, "stopped_by_user", False) or entry is None or entry["pid"] != process.pid or entry["stopping"]
+        await asyncio.to_thread(remove_running_app, project_id, process.pid)
+        crashed = returncode != 0 and not stopped_by_user
+        if crashed:
+            RUNNER_STAGE_DURATION.observe(time.perf_counter() - started_at, stage="time_to_crash")
+            try:
+                await asyncio.wait_for(asyncio.shield(stderr_task), timeout=STOP_TIMEOUT_SECONDS)  # fin de stderr
+            except asyncio.TimeoutError:
+                pass
+            error_message = f"L'application s'est arrêtée avec une erreur (code {returncode})"
+            add_log(error_message, level="ERROR")
+            # save_project_problem publie l'événement "problem" : l'interface est notifiée aussitôt
+            await asyncio.to_thread(save_project_problem, project_id, {
+                "type": "runtime_error",
+                "message": error_message,
+                "details": "".join(full_stderr_output),
+                "timestamp": datetime.now().isoformat()
+            })
+        await asyncio.to_thread(
+            publish_project_event, project_id, "run",
+            {"state": "crashed" if crashed else "stopped", "pid": process.pid, "returncode": returncode}
+        )
+
     asyncio.create_task(read_stream(pyside_app_process.stdout, full_stdout_output, "info"))
-    asyncio.create_task(read_stream(pyside_app_process.stderr, full_stderr_output, "error"))
-
-    await asyncio.sleep(2)  # captures rapides
-
-    if pyside_app_process.poll() is not None and pyside_app_process.returncode != 0:
-        error_message = f"Erreur au démarrage (code {pyside_app_process.returncode})"
-        stderr_content = "".join(full_stderr_output)
-        save_project_problem(project_id, {
-            "type": "runtime_error",
-            "message": error_message,
-            "details": stderr_content,
-            "timestamp": datetime.now().isoformat()
-        })
-        add_log(error_message, level="ERROR")
+    stderr_task = asyncio.create_task(read_stream(pyside_app_process.stderr, full_stderr_output, "error"))
+    asyncio.create_task(watch_exit(pyside_app_process, time.perf_counter(), stderr_task))
+
+
+async def _terminate_pid(pid: int) -> bool:
+    """Arrête un processus lancé par un autre worker (SIGTERM puis SIGKILL). Retourne False s'il a dû être tué."""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return True
+    deadline = time.monotonic() + STOP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if not _pid_alive(pid):
+            return True
+        await asyncio.sleep(0.1)
+    try:
+        os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+    except ProcessLookupError:
+        pass
+    return False
 
 
-async def stop_pyside_application():
+async def _stop_running_apps(local_only: bool = False) -> int:
     """
-    Arrête le processus de l'application PySide6 si elle est en cours d'exécution.
+    Arrête les applications lancées (celles de ce worker seulement si local_only).
+    Retourne le nombre d'applications arrêtées.
     """
     global pyside_app_process
+    stopped = 0
+
+    # Application de ce worker : on garde le contrôle du Popen (attente, lecture des flux)
     if pyside_app_process and pyside_app_process.poll() is None:
-        add_log("Arrêt de l'application PySide6...", level="INFO")
-        pyside_app_process.terminate()
+        process = pyside_app_process
+        process.stopped_by_user = True
+        entry = next((app for app in await asyncio.to_thread(list_running_apps) if app["pid"] == process.pid), None)
+        if entry:
+            await asyncio.to_thread(mark_running_app_stopping, entry["project_id"], process.pid)
+        process.terminate()
         try:
-            await asyncio.to_thread(pyside_app_process.wait, timeout=5)
-            add_log("Application arrêtée avec succès.", level="INFO")
+            await asyncio.to_thread(process.wait, timeout=STOP_TIMEOUT_SECONDS)
+            add_log("Application arrêtée avec succès.", level="INFO", pid=process.pid)
         except subprocess.TimeoutExpired:
-            pyside_app_process.kill()
-            add_log("Application forcée à quitter.", level="WARNING")
-        pyside_app_process = None
-    else:
-        add_log("Aucune application PySide6 n'était en cours d'exécution.", level="INFO")
\ No newline at end of file
+            process.kill()
+            add_log("Application forcée à quitter.", level="WARNING", pid=process.pid)
+        if entry:
+            await asyncio.to_thread(remove_running_app, entry["project_id"], process.pid)
+        stopped += 1
+    pyside_app_process = None
+
+    if local_only:
+        return stopped
+
+    # Applications lancées par d'autres workers : arrêt par PID
+    for app in await asyncio.to_thread(get_running_apps):
+        if app["local"]:
+            continue
+        await asyncio.to_thread(mark_running_app_stopping, app["project_id"], app["pid"])
+        if await _terminate_pid(app["pid"]):
+            add_log("Application arrêtée avec succès.", level="INFO", pid=app["pid"], owner_worker_pid=app["worker_pid"])
+        else:
+            add_log("Application forcée à quitter.", level="WARNING", pid=app["pid"], owner_worker_pid=app["worker_pid"])
+        await asyncio.to_thread(remove_running_app, app["project_id"], app["pid"])
+        if not _pid_alive(app["worker_pid"]):
+            # Worker propriétaire disparu : personne d'autre ne publiera la fin de l'application
+            await asyncio.to_thread(publish_project_event, app["project_id"], "run", {"state": "stopped", "pid": app["pid"]})
+        stopped += 1
+    return stopped
+
+
+async def stop_pyside_application(local_only: bool = False):
+    """
+    Arrête l'application PySide6 en cours d'exécution, quel que soit le worker qui l'a lancée.
+    Avec local_only (arrêt d'un worker), seule l'application lancée par ce worker est arrêtée.
+    """
+    add_log("Arrêt de l'application PySide6...", level="INFO")
+    if not await _stop_running_apps(local_only=local_only):
+        add_log("Aucune application PySide6 n'était en cours d'exécution.", level="INFO")
@@ -0,0 +1,289 @@
+# app_maker_backend/core/auto_fixer.py
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from core.app_runner import smoke_run_project
+from core.env_manager import ensure_project_environment
+from core.code_validator import validate_generated_files
+from core.llm_service import generate_pyside_code
+from core.logging_config import add_log
+from core.tracing import span
+from core.project_manager import (
+    _get_project_path,
+    get_project_files_content,
+    update_project_files,
+    save_project_problem,
+    clear_project_problem,
+    ProjectNotFoundException,
+    VARIANTS_DIR_NAME,
+    PROFILES_DIR_NAME
+)
+
+# Nombre de caractères de stderr envoyés au LLM et renvoyés dans le rapport
+STDERR_TAIL_CHARS = 8000
+REPORT_STDERR_TAIL_CHARS = 2000
+
+# Artefacts d'exécution non copiés dans les copies de travail des candidats
+_SCRATCH_IGNORED = shutil.ignore_patterns(".venv", VARIANTS_DIR_NAME, PROFILES_DIR_NAME, "__pycache__", "history.json", "problem.json", "app_run.log")
+
+
+def _candidate_temperature(index: int, count: int) -> Optional[float]:
+    """Répartit les températures des candidats entre 0.2 et 1.0 pour diversifier les corrections."""
+    if count <= 1:
+        return None
+    return round(0.2 + 0.8 * index / (count - 1), 2)
+
+
+def _error_signature(smoke_result: Dict[str, Any]) -> str:
+    """Résume un échec par la dernière ligne non vide de stderr (ex. 'NameError: ...')."""
+    lines = [line for line in smoke_result.get("stderr", "").splitlines() if line.strip()]
+    return lines[-1].strip() if lines else f"{smoke_result.get('reason')}:{smoke_result.get('returncode')}"
+
+
+def _summarize_smoke_result(smoke_result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Version allégée d'un résultat de smoke run pour le rapport (stderr tronqué)."""
+    if smoke_result is None:
+        return None
+    return {**smoke_result, "stderr": smoke_result.get("stderr", "")[-REPORT_STDERR_TAIL_CHARS:]}
+
+
+def _build_fix_prompt(smoke_result: Dict[str, Any]) -> str:
+    """Construit le prompt de correction à partir de l'échec observé (le code est envoyé comme contexte)."""
+    return (
+        "L'application a rencontré un problème lors d'un lancement sans affichage (QT_QPA_PLATFORM=offscreen).\n\n"
+        "--- LOGS D'ERREUR ---\n"
+        f"Type de problème: {smoke_result.get('reason')}\n"
+        f"Code de sortie: {smoke_result.get('returncode')}\n"
+        f"Détails:\n{smoke_result.get('stderr', '')[-STDERR_TAIL_CHARS:] or 'Aucun détail supplémentaire.'}\n\n"
+        "Veuillez analyser ces informations et fournir les modifications nécessaires aux fichiers pour corriger le problème. "
+        "Retournez SEULEMENT les fichiers modifiés/créés/supprimés dans le format JSON spécifié."
+    )
+
+
+def _make_scratch_copy(project_path: str, base_files: Dict[str, str], changes: Dict[str, str]) -> str:
+    """
+    Crée une copie de travail isolée du projet (sans .venv ni artefacts) et y applique
+    la base courante puis les modifications du candidat. Retourne le chemin de la copie.
+    """
+    scratch_root = tempfile.mkdtemp(prefix=f"autofix_{os.path.basename(project_path)[:8]}_")
+    scratch_path = os.path.join(scratch_root, "project")
+    shutil.copytree(project_path, scratch_path, ignore=_SCRATCH_IGNORED)
+    real_scratch_path = os.path.realpath(scratch_path)
+    for file_name, content in {**base_files, **changes}.items():
+        # Noms venant du LLM : même contrôle que get_project_file_path, rien n'est écrit hors de la copie
+        file_path = os.path.join(scratch_path, file_name)
+        if os.path.isabs(file_name) or ".." in file_name.replace("\\", "/").split("/") \
+                or not os.path.realpath(file_path).startswith(real_scratch_path + os.sep):
+            shutil.rmtree(scratch_root, ignore_errors=True)
+            raise ValueError(f"Chemin de fichier refusé (hors du projet) : {file_name}")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+    return scratch_path
+
+
+async def _evaluate_candidate(
+    index: int,
+    project_path: str,
+    python_executable: str,
+    base_files: Dict[str, str],
+    fix_prompt: str,
+    llm_provider: str,
+    model_name: str,
+    temperature: Optional[float]
+) -> Dict[str, Any]:
+    """
+    Demande une correction au LLM, la valide statiquement, puis par un smoke run
+    dans une copie isolée du projet.
+    """
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"candidate": index, "temperature": temperature, "passed": False, "changes": {}, "smoke": None, "error": None}
+    try:
+        changes = await generate_pyside_code(
+            fix_prompt,
+            current_files_context=base_files,
+            llm_provider=llm_provider,
+            model_name=model_name,
+            temperature=temperature
+        )
+        if not changes:
+            raise ValueError("Le LLM n'a proposé aucune modification.")
+        result["changes"] = changes
+
+        # Pré-filtre statique : un candidat qui ne compile pas n'est pas lancé
+        validation = await validate_generated_files(changes, existing_files=base_files)
+        if not validation["valid"]:
+            result["error"] = f"Validation statique: {validation['errors']} erreur(s) - " + "; ".join(
+                issue["message"] for issue in validation["issues"] if issue["severity"] == "error"
+            )
+            result["duration_seconds"] = round(time.perf_counter() - start, 3)
+            return result
+
+        scratch_path = await asyncio.to_thread(_make_scratch_copy, project_path, base_files, changes)
+        try:
+            with span("autofix.smoke_run", candidate=index):
+                smoke = await smoke_run_project(scratch_path, python_executable)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, os.path.dirname(scratch_path), True)
+        result["smoke"] = smoke
+        result["passed"] = smoke["passed"]
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        result["error"] = e.detail if isinstance(e, HTTPException) else str(e)
+        add_log(f"Candidat de correction {index} en échec: {result['error']}", level="WARNING")
+
+    result["duration_seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _candidate_report(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Entrée de rapport d'un candidat (sans le contenu des fichiers)."""
+    return {
+        "candidate": result["candidate"],
+        "temperature": result["temperature"],
+        "passed": result["passed"],
+        "files": sorted(result["changes"].keys()),
+        "smoke": _summarize_smoke_result(result["smoke"]),
+        "error": result["error"],
+        "duration_seconds": result["duration_seconds"]
+    }
+
+
+async def make_project_run(
+    project_id: str,
+    llm_provider: str,
+    model_name: str,
+    candidates: int,
+    max_iterations: int,
+    time_budget_seconds: float
+) -> Dict[str, Any]:
+    """
+    Mode "make it run" : lance l'application sans affichage, et tant qu'elle échoue, demande
+    `candidates` corrections en parallèle au LLM, valide chacune dans une copie isolée et
+    enregistre la première qui passe. Si aucun candidat ne passe mais que l'un d'eux change
+    l'erreur, il sert de base (non enregistrée) à l'itération suivante.
+    Retourne un rapport détaillé ; le statut vaut already_running, fixed,
+    max_iterations_reached ou time_budget_exceeded.
+    """
+    project_path = _get_project_path(project_id)
+    if not os.path.exists(project_path):
+        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+
+    start = time.monotonic()
+    deadline = start + time_budget_seconds
+    add_log(f"Correction automatique du projet {project_id}: {candidates} candidats, {max_iterations} itérations max, budget {time_budget_seconds}s.")
+
+    # Préparation de l'environnement et premier lancement comptent dans le budget
+    try:
+        python_executable = await asyncio.wait_for(ensure_project_environment(project_path), timeout=max(0, deadline - time.monotonic()))
+        base_files = await asyncio.to_thread(get_project_files_content, project_id)
+        failure = await asyncio.wait_for(smoke_run_project(project_path, python_executable), timeout=max(0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        add_log(f"Correction automatique du projet {project_id}: budget épuisé avant le premier lancement.", level="WARNING")
+        return {
+            "project_id": project_id,
+            "status": "time_budget_exceeded",
+            "initial_run": None,
+            "iterations": [],
+            "committed_files": [],
+            "elapsed_seconds": round(time.monotonic() - start, 3)
+        }
+
+    report: Dict[str, Any] = {
+        "project_id": project_id,
+        "status": "max_iterations_reached",
+        "initial_run": _summarize_smoke_result(failure),
+        "iterations": [],
+        "committed_files": []
+    }
+
+    if failure["passed"]:
+        await asyncio.to_thread(clear_project_problem, project_id)
+        report["status"] = "already_running"
+        report["elapsed_seconds"] = round(time.monotonic() - start, 3)
+        return report
+
+    pending_changes: Dict[str, str] = {}
+    for iteration in range(1, max_iterations + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            report["status"] = "time_budget_exceeded"
+            break
+
+        fix_prompt = _build_fix_prompt(failure)
+        tasks = [
+            asyncio.create_task(_evaluate_candidate(
+                index, project_path, python_executable, base_files, fix_prompt,
+                llm_provider, model_name, _candidate_temperature(index, candidates)
+            ))
+            for index in range(candidates)
+        ]
+
+        results: List[Dict[str, Any]] = []
+        winner = None
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=remaining):
+                result = await next_done
+                results.append(result)
+                if result["passed"]:
+                    winner = result
+                    break
+        except asyncio.TimeoutError:
+            report["status"] = "time_budget_exceeded"
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        report["iterations"].append({
+            "iteration": iteration,
+            "error": _error_signature(failure),
+            "candidates": [_candidate_report(r) for r in results]
+        })
+
+        if winner:
+            pending_changes.update(winner["changes"])
+            await asyncio.to_thread(
+                update_project_files,
+                project_id,
+                pending_changes,
+                prompt=fix_prompt,
+                llm_response=pending_changes
+            )
+            report["status"] = "fixed"
+            report["committed_files"] = sorted(pending_changes.keys())
+            report["elapsed_seconds"] = round(time.monotonic() - start, 3)
+            add_log(f"Correction automatique réussie pour le projet {project_id} (itération {iteration}, candidat {winner['candidate']}).")
+            return report
+
+        if report["status"] == "time_budget_exceeded":
+            break
+
+        # Aucun candidat ne passe : on retient celui qui fait progresser l'erreur, s'il existe
+        progress = next(
+            (r for r in results if r["smoke"] and _error_signature(r["smoke"]) != _error_signature(failure)),
+            None
+        )
+        if progress:
+            base_files = {**base_files, **progress["changes"]}
+            pending_changes.update(progress["changes"])
+            failure = progress["smoke"]
+
+    await asyncio.to_thread(save_project_problem, project_id, {
+        "type": "runtime_error",
+        "message": f"Correction automatique sans succès ({report['status']})",
+        "details": failure.get("stderr", ""),
+        "timestamp": datetime.now().isoformat()
+    })
+    report["elapsed_seconds"] = round(time.monotonic() - start, 3)
+    add_log(f"Correction automatique sans succès pour le projet {project_id}: {report['status']}.", level="WARNING")
+    return report
@@ -0,0 +1,242 @@
+# app_maker_backend/core/code_index.py
+"""
+Index de recherche du code de tous les projets : le contenu des fichiers source (hors
+artefacts d'exécution, .venv compris) est stocké dans une base SQLite partagée avec un index
+FTS5 à trigrammes. Une recherche (littérale ou regex) ne lit que les fichiers qui contiennent
+tous les trigrammes requis, puis vérifie ligne par ligne. L'index est tenu à jour de façon
+incrémentale (taille et date de modification) par le magasin de projets.
+"""
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+from core.config import CODE_INDEX_DB_PATH, MAX_FILE_CONTENT_BYTES, BINARY_SNIFF_BYTES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    UNIQUE (project_id, path)
+);
+CREATE TABLE IF NOT EXISTS indexed_projects (
+    project_id TEXT PRIMARY KEY
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    content, content='files', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO files_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+# Longueur maximale d'une ligne renvoyée dans un résultat
+MAX_MATCH_LINE_CHARS = 300
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def _connection() -> sqlite3.Connection:
+    global _schema_ready
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        with _schema_lock:
+            if not _schema_ready:
+                os.makedirs(os.path.dirname(CODE_INDEX_DB_PATH), exist_ok=True)
+                setup = sqlite3.connect(CODE_INDEX_DB_PATH, timeout=10)
+                try:
+                    setup.execute("PRAGMA journal_mode=WAL")
+                    setup.executescript(_SCHEMA)
+                finally:
+                    setup.close()
+                _schema_ready = True
+        connection = sqlite3.connect(CODE_INDEX_DB_PATH, timeout=10)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        _local.connection = connection
+    return connection
+
+
+def _read_source(absolute_path: str) -> Optional[str]:
+    """Contenu texte d'un fichier, ou None s'il est binaire, trop volumineux ou illisible."""
+    try:
+        with open(absolute_path, "rb") as f:
+            data = f.read(MAX_FILE_CONTENT_BYTES + 1)
+        if len(data) > MAX_FILE_CONTENT_BYTES or b"\0" in data[:BINARY_SNIFF_BYTES]:
+            return None
+        return data.decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+# --- Mise à jour de l'index ---
+
+def refresh_project(project_id: str, files: Iterable[Tuple[str, str]]) -> int:
+    """
+    Met l'index d'un projet en accord avec ses fichiers (couples chemin relatif, chemin absolu) :
+    seuls les fichiers dont la taille ou la date de modification a changé sont relus, les
+    fichiers disparus sont retirés. Retourne le nombre de fichiers (ré)indexés.
+    """
+    connection = _connection()
+    indexed = {
+        path: (size, mtime_ns)
+        for path, size, mtime_ns in connection.execute(
+            "SELECT path, size, mtime_ns FROM files WHERE project_id = ?", (project_id,)
+        )
+    }
+    changed, present = [], set()
+    for relative_path, absolute_path in files:
+        try:
+            stat = os.stat(absolute_path)
+        except FileNotFoundError:
+            continue
+        if indexed.get(relative_path) == (stat.st_size, stat.st_mtime_ns):
+            present.add(relative_path)
+            continue
+        content = _read_source(absolute_path)
+        if content is not None:
+            present.add(relative_path)
+            changed.append((project_id, relative_path, stat.st_size, stat.st_mtime_ns, content))
+
+    with connection:
+        connection.executemany(
+            """
+            INSERT INTO files (project_id, path, size, mtime_ns, content) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (project_id, path) DO UPDATE SET
+                size = excluded.size, mtime_ns = excluded.mtime_ns, content = excluded.content
+            """,
+            changed
+        )
+        connection.executemany(
+            "DELETE FROM files WHERE project_id = ? AND path = ?",
+            [(project_id, path) for path in set(indexed) - present]
+        )
+        connection.execute("INSERT OR IGNORE INTO indexed_projects (project_id) VALUES (?)", (project_id,))
+    return len(changed)
+
+
+def remove_projects(project_ids: Iterable[str]):
+    """Retire les projets donnés de l'index."""
+    rows = [(project_id,) for project_id in project_ids]
+    with _connection() as connection:
+        connection.executemany("DELETE FROM files WHERE project_id = ?", rows)
+        connection.executemany("DELETE FROM indexed_projects WHERE project_id = ?", rows)
+
+
+def indexed_project_ids() -> Set[str]:
+    """Projets présents dans l'index."""
+    return {row[0] for row in _connection().execute("SELECT project_id FROM indexed_projects")}
+
+
+# --- Recherche ---
+
+def _required_literals(parsed) -> List[str]:
+    """
+    Fragments littéraux qu'une correspondance de la regex contient forcément : suites de
+    caractères littéraux au premier niveau, dans les groupes et dans les répétitions d'au moins
+    une occurrence. Une alternative ou une classe de caractères interrompt le fragment.
+    """
+    fragments, current = [], []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        fragments.append("".join(current))
+        current = []
+        if op is sre_parse.SUBPATTERN:
+            fragments.extend(_required_literals(av[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            fragments.extend(_required_literals(av[2]))
+    fragments.append("".join(current))
+    return fragments
+
+
+def _fts_prefilter(query: str, regex: bool) -> Optional[str]:
+    """
+    Requête FTS5 (trigrammes, insensible à la casse) sélectionnant les fichiers candidats,
+    ou None si la recherche ne permet pas de filtrer (fragments de moins de 3 caractères).
+    """
+    if regex:
+        fragments = _required_literals(sre_parse.parse(query))
+    else:
+        fragments = [query]
+    phrases = ['"' + fragment.replace('"', '""') + '"' for fragment in fragments if len(fragment) >= 3]
+    return " AND ".join(phrases) or None
+
+
+def search_code(
+    query: str,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    project_id: Optional[str] = None,
+    path_glob: Optional[str] = None,
+    limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Recherche `query` (texte littéral, ou expression régulière si `regex`) dans le code indexé,
+    ligne par ligne, dans l'ordre d'indexation des fichiers. Filtres optionnels : un projet,
+    un motif de chemin (glob SQLite, ex. '*.py').
+    Retourne {"matches": [{project_id, path, line, column, text}], "truncated": bool}.
+    Lève ValueError si la regex est invalide.
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    try:
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        prefilter = _fts_prefilter(query, regex)
+    except re.error as e:
+        raise ValueError(f"Expression régulière invalide : {e}") from e
+
+    conditions, params = [], []
+    sql = "SELECT files.project_id, files.path, files.content FROM files"
+    if prefilter:
+        sql += " JOIN files_fts ON files_fts.rowid = files.id"
+        conditions.append("files_fts MATCH ?")
+        params.append(prefilter)
+    if project_id:
+        conditions.append("files.project_id = ?")
+        params.append(project_id)
+    if path_glob:
+        conditions.append("files.path GLOB ?")
+        params.append(path_glob)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    # Ordre d'indexation : FTS5 produit les candidats dans cet ordre, sans tri de l'ensemble
+    # (la recherche s'arrête dès `limit` correspondances, même pour un terme très fréquent)
+    sql += " ORDER BY files_fts.rowid" if prefilter else " ORDER BY files.id"
+
+    matches: List[Dict[str, Any]] = []
+    cursor = _connection().execute(sql, params)
+    for file_project_id, path, content in cursor:
+        for line_number, line in enumerate(content.splitlines(), start=1):
+            match = pattern.search(line)
+            if match is None:
+                continue
+            if len(matches) == limit:
+                cursor.close()
+                return {"matches": matches, "truncated": True}
+            matches.append({
+                "project_id": file_project_id,
+                "path": path,
+                "line": line_number,
+                "column": match.start() + 1,
+                "text": line[:MAX_MATCH_LINE_CHARS]
+            })
+    return {"matches": matches, "truncated": False}
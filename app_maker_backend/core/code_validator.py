@@ -0,0 +1,459 @@
+# app_maker_backend/core/code_validator.py
+import os
+import re
+import ast
+import sys
+import time
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import IMPORT_TO_PACKAGE, INFERRED_PACKAGE_ALLOWLIST, VALIDATION_MAX_WORKERS, VALIDATION_TIMEOUT_SECONDS
+from core.logging_config import add_log
+
+# Pool de processus partagé (créé à la première validation) et cache des analyses par contenu
+_validation_pool: Optional[ProcessPoolExecutor] = None
+_analysis_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_ANALYSIS_CACHE_SIZE = 2048
+
+# Modules PySide6 déjà importés dans le processus courant (worker du pool)
+_pyside_modules: Dict[str, Any] = {}
+_pyside_available: Optional[bool] = None
+
+_PYSIDE_ROOTS = ("PySide6", "shiboken6")
+
+
+# --- Analyse d'un fichier (exécutée dans un worker du pool) ---
+
+def _collect_defined_names(body: List[ast.stmt], names: set) -> bool:
+    """
+    Collecte les noms définis au niveau module (fonctions, classes, affectations, imports),
+    y compris dans les blocs if/try/with. Retourne True si le module fait un import '*'.
+    """
+    has_star_import = False
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for sub in ast.walk(target):
+                    if isinstance(sub, ast.Name):
+                        names.add(sub.id)
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name == "*":
+                    has_star_import = True
+                else:
+                    names.add(alias.asname or alias.name)
+        elif isinstance(node, (ast.If, ast.Try, ast.With, ast.For, ast.While)):
+            for block in ("body", "orelse", "finalbody"):
+                has_star_import |= _collect_defined_names(getattr(node, block, []), names)
+            for handler in getattr(node, "handlers", []):
+                has_star_import |= _collect_defined_names(handler.body, names)
+    return has_star_import
+
+
+def _load_pyside_module(module_name: str):
+    """Importe (avec cache) un module PySide6 ; None s'il n'existe pas."""
+    if module_name not in _pyside_modules:
+        try:
+            _pyside_modules[module_name] = importlib.import_module(module_name)
+        except ImportError:
+            _pyside_modules[module_name] = None
+    return _pyside_modules[module_name]
+
+
+def _check_pyside_names(tree: ast.AST) -> Dict[str, Any]:
+    """
+    Vérifie que les noms importés depuis PySide6 (from PySide6.QtX import Nom, QtX.Nom) existent.
+    La vérification n'a lieu que si PySide6 est importable dans le processus du backend.
+    """
+    global _pyside_available
+    if _pyside_available is None:
+        _pyside_available = importlib.util.find_spec("PySide6") is not None
+    if not _pyside_available:
+        return {"checked": False, "issues": []}
+
+    references = []  # (module, nom, ligne)
+    module_aliases = {}  # nom local -> module PySide6
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            if node.module == "PySide6":
+                for alias in node.names:
+                    module_aliases[alias.asname or alias.name] = f"PySide6.{alias.name}"
+                    references.append(("PySide6", alias.name, node.lineno))
+            elif node.module.startswith("PySide6."):
+                references.extend((node.module, alias.name, node.lineno) for alias in node.names if alias.name != "*")
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.startswith("PySide6."):
+                    references.append(("PySide6", alias.name.split(".")[1], node.lineno))
+                    if alias.asname:
+                        module_aliases[alias.asname] = alias.name
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id in module_aliases:
+            references.append((module_aliases[node.value.id], node.attr, node.lineno))
+
+    issues = []
+    for module_name, name, line in sorted(set(references), key=lambda ref: ref[2]):
+        if module_name == "PySide6":
+            if _load_pyside_module(f"PySide6.{name}") is None:
+                issues.append({"line": line, "code": "pyside_unknown_module", "message": f"Le module PySide6.{name} n'existe pas."})
+            continue
+        module = _load_pyside_module(module_name)
+        if module is None:
+            issues.append({"line": line, "code": "pyside_unknown_module", "message": f"Le module {module_name} n'existe pas."})
+        elif not hasattr(module, name):
+            issues.append({"line": line, "code": "pyside_unknown_name", "message": f"'{name}' n'existe pas dans {module_name}."})
+    return {"checked": True, "issues": issues}
+
+
+def _analyze_file(file_name: str, content: str) -> Dict[str, Any]:
+    """
+    Compile un fichier Python et en extrait les imports, les noms définis au niveau module,
+    la présence du marqueur # ENTRYPOINT et les noms PySide6 inexistants.
+    """
+    first_line = content.split("\n", 1)[0].strip()
+    analysis = {
+        "file": file_name,
+        "syntax_error": None,
+        "imports": [],
+        "defined_names": [],
+        "has_star_import": False,
+        "entrypoint_marker": first_line == "# ENTRYPOINT",
+        "pyside": {"checked": False, "issues": []}
+    }
+    try:
+        tree = ast.parse(content, filename=file_name)
+        compile(tree, file_name, "exec")
+    except SyntaxError as e:
+        analysis["syntax_error"] = {"line": e.lineno, "message": e.msg}
+        return analysis
+    except ValueError as e:  # ex. octets nuls dans le source
+        analysis["syntax_error"] = {"line": None, "message": str(e)}
+        return analysis
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                analysis["imports"].append({"module": alias.name, "names": None, "level": 0, "line": node.lineno})
+        elif isinstance(node, ast.ImportFrom):
+            analysis["imports"].append({
+                "module": node.module or "",
+                "names": [alias.name for alias in node.names],
+                "level": node.level,
+                "line": node.lineno
+            })
+
+    defined_names: set = set()
+    analysis["has_star_import"] = _collect_defined_names(tree.body, defined_names)
+    analysis["defined_names"] = sorted(defined_names)
+    analysis["pyside"] = _check_pyside_names(tree)
+    return analysis
+
+
+# --- Résolution inter-fichiers (processus principal) ---
+
+def _module_name(file_name: str) -> Optional[str]:
+    """Convertit un chemin relatif de fichier .py en nom de module ('pkg/mod.py' -> 'pkg.mod')."""
+    path = file_name.replace(os.sep, "/")
+    if not path.endswith(".py"):
+        return None
+    parts = path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts) if parts else None
+
+
+def _normalize_package_name(name: str) -> str:
+    """Normalise un nom de paquet pip (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _declared_requirements(files: Dict[str, str]) -> set:
+    """Retourne les noms (normalisés) des paquets déclarés dans requirements.txt."""
+    declared = set()
+    for line in files.get("requirements.txt", "").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        match = re.match(r"[A-Za-z0-9_.\-]+", line)
+        if match:
+            declared.add(_normalize_package_name(match.group(0)))
+    return declared
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    """Le bloc except intercepte ImportError (ou ModuleNotFoundError, ou toute exception)."""
+    if handler.type is None:
+        return True
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    names = {node.id if isinstance(node, ast.Name) else getattr(node, "attr", None) for node in types}
+    return bool(names & {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"})
+
+
+def _is_type_checking_test(test: ast.expr) -> bool:
+    return (isinstance(test, ast.Name) and test.id == "TYPE_CHECKING") \
+        or (isinstance(test, ast.Attribute) and test.attr == "TYPE_CHECKING")
+
+
+def _required_imports(nodes):
+    """
+    Imports dont le module est requis à l'exécution : ceux d'un bloc try dont l'ImportError est
+    interceptée (import optionnel) ou d'un bloc `if TYPE_CHECKING:` sont ignorés.
+    """
+    for node in nodes:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+        elif isinstance(node, ast.Try) and any(_catches_import_error(handler) for handler in node.handlers):
+            yield from _required_imports([statement for handler in node.handlers for statement in handler.body])
+            yield from _required_imports(node.orelse + node.finalbody)
+        elif isinstance(node, ast.If) and _is_type_checking_test(node.test):
+            yield from _required_imports(node.orelse)
+        else:
+            yield from _required_imports(ast.iter_child_nodes(node))
+
+
+def infer_missing_packages(files: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """
+    Imports tiers du code (analyse AST, dans le processus courant) absents de requirements.txt :
+    hors bibliothèque standard, PySide6, modules du projet, imports optionnels (try/except
+    ImportError) et `if TYPE_CHECKING:`. Les fichiers dont la syntaxe est invalide sont ignorés.
+    Retourne (paquets pip de la liste blanche INFERRED_PACKAGE_ALLOWLIST, installables ;
+    modules inconnus, seulement signalés comme manquants).
+    """
+    local_names = set()
+    for file_name in files:
+        module = _module_name(file_name)
+        if module:
+            local_names.add(module.split(".")[0])
+    stdlib = set(sys.stdlib_module_names) | {"__future__"}
+    declared = _declared_requirements(files)
+
+    packages, missing = set(), set()
+    for file_name, content in files.items():
+        if not file_name.endswith(".py"):
+            continue
+        try:
+            tree = ast.parse(content, filename=file_name)
+        except (SyntaxError, ValueError):
+            continue
+        for node in _required_imports(tree.body):
+            if isinstance(node, ast.Import):
+                tops = [alias.name.split(".")[0] for alias in node.names]
+            elif node.level == 0 and node.module:
+                tops = [node.module.split(".")[0]]
+            else:
+                continue
+            for top in tops:
+                if top in stdlib or top in _PYSIDE_ROOTS or top in local_names:
+                    continue
+                package = INFERRED_PACKAGE_ALLOWLIST.get(top)
+                if _normalize_package_name(package or top) in declared:
+                    continue
+                if package is None:
+                    missing.add(top)
+                else:
+                    packages.add(package)
+    return sorted(packages), sorted(missing)
+
+
+def _issue(file_name: str, line: Optional[int], severity: str, code: str, message: str) -> Dict[str, Any]:
+    return {"file": file_name, "line": line, "severity": severity, "code": code, "message": message}
+
+
+def _resolve_project(files: Dict[str, str], analyses: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Vérifie les imports entre modules du projet, les dépendances tierces et le point d'entrée."""
+    issues = []
+    modules = {}
+    for file_name, analysis in analyses.items():
+        module = _module_name(file_name)
+        if module:
+            modules[module] = analysis
+    packages = set()
+    for module in modules:
+        parts = module.split(".")
+        packages.update(".".join(parts[:i]) for i in range(1, len(parts)))
+    top_level_names = {name.split(".")[0] for name in modules} | {name.split(".")[0] for name in packages}
+    declared = _declared_requirements(files)
+    stdlib = set(sys.stdlib_module_names) | {"__future__"}
+
+    for file_name, analysis in analyses.items():
+        if analysis["syntax_error"]:
+            error = analysis["syntax_error"]
+            issues.append(_issue(file_name, error["line"], "error", "syntax_error", f"Erreur de syntaxe : {error['message']}"))
+            continue
+
+        for pyside_issue in analysis["pyside"]["issues"]:
+            issues.append(_issue(file_name, pyside_issue["line"], "error", pyside_issue["code"], pyside_issue["message"]))
+
+        current_module = _module_name(file_name) or ""
+        is_package = file_name.replace(os.sep, "/").endswith("__init__.py")
+        for imported in analysis["imports"]:
+            line = imported["line"]
+            if imported["level"]:
+                base_parts = current_module.split(".") if is_package else current_module.split(".")[:-1]
+                if imported["level"] - 1 > len(base_parts):
+                    issues.append(_issue(file_name, line, "error", "unresolved_import", "Import relatif au-delà de la racine du projet."))
+                    continue
+                base_parts = base_parts[:len(base_parts) - (imported["level"] - 1)]
+                target = ".".join(part for part in base_parts + [imported["module"]] if part)
+            else:
+                target = imported["module"]
+
+            top = target.split(".")[0] if target else ""
+            if imported["level"] or top in top_level_names:
+                if target and target not in modules and target not in packages:
+                    issues.append(_issue(file_name, line, "error", "unresolved_import", f"Le module '{target}' est introuvable dans le projet."))
+                    continue
+                for name in imported["names"] or []:
+                    if name == "*":
+                        continue
+                    qualified = f"{target}.{name}" if target else name
+                    if qualified in modules or qualified in packages:
+                        continue
+                    target_analysis = modules.get(target)
+                    if target_analysis and target_analysis["syntax_error"]:
+                        break  # déjà signalé comme erreur de syntaxe dans le module cible
+                    if target_analysis and (name in target_analysis["defined_names"] or target_analysis["has_star_import"]):
+                        continue
+                    issues.append(_issue(file_name, line, "error", "unresolved_import", f"'{name}' n'est pas défini dans le module '{target or '.'}'."))
+            elif top in stdlib or top in _PYSIDE_ROOTS:
+                continue
+            else:
+                package = IMPORT_TO_PACKAGE.get(top, top)
+                if _normalize_package_name(package) not in declared:
+                    issues.append(_issue(
+                        file_name, line, "warning", "undeclared_dependency",
+                        f"Le module tiers '{top}' n'est pas déclaré dans requirements.txt (paquet '{package}')."
+                    ))
+
+    top_level_scripts = sorted(name for name in analyses if "/" not in name.replace(os.sep, "/"))
+    markers = [name for name in top_level_scripts if analyses[name]["entrypoint_marker"]]
+    if not top_level_scripts:
+        issues.append(_issue(None, None, "error", "missing_entrypoint", "Aucun fichier .py à la racine du projet : aucun point d'entrée."))
+    elif len(markers) > 1:
+        issues.append(_issue(None, None, "warning", "multiple_entrypoints", f"Plusieurs fichiers portent le marqueur # ENTRYPOINT : {', '.join(markers)}."))
+    elif not markers and not {"main.py", "run.py"} & set(top_level_scripts):
+        issues.append(_issue(None, None, "warning", "no_entrypoint_marker", f"Aucun marqueur # ENTRYPOINT ni main.py/run.py : {top_level_scripts[0]} sera lancé."))
+    return issues
+
+
+def _get_validation_pool() -> ProcessPoolExecutor:
+    """Retourne le pool de processus de validation (créé à la demande, démarrage 'spawn')."""
+    global _validation_pool
+    if _validation_pool is None:
+        _validation_pool = ProcessPoolExecutor(
+            max_workers=max(1, VALIDATION_MAX_WORKERS),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _validation_pool
+
+
+def shutdown_validation_pool():
+    """Arrête le pool de processus de validation (appelé à l'arrêt du serveur)."""
+    global _validation_pool
+    if _validation_pool is not None:
+        _validation_pool.shutdown(wait=False, cancel_futures=True)
+        _validation_pool = None
+
+
+async def _analyze_files(files: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Analyse les fichiers .py dans le pool ; les contenus déjà analysés sont servis depuis le cache."""
+    analyses = {}
+    pending = {}
+    for file_name, content in files.items():
+        if not file_name.endswith(".py"):
+            continue
+        key = (file_name, hashlib.sha256(content.encode("utf-8")).hexdigest())
+        cached = _analysis_cache.get(key)
+        if cached is not None:
+            _analysis_cache.move_to_end(key)
+            analyses[file_name] = cached
+        else:
+            pending[key] = content
+
+    if pending:
+        loop = asyncio.get_running_loop()
+        keys = list(pending)
+        try:
+            pool = _get_validation_pool()
+            results = await asyncio.wait_for(
+                asyncio.gather(*(loop.run_in_executor(pool, _analyze_file, key[0], pending[key]) for key in keys)),
+                timeout=VALIDATION_TIMEOUT_SECONDS
+            )
+        except (BrokenProcessPool, RuntimeError) as e:
+            # Pool inutilisable (worker tué, démarrage impossible) : on le recrée à la prochaine
+            # validation et on analyse cette fois dans un thread.
+            add_log(f"Pool de validation indisponible ({e}), analyse dans le processus courant.", level="WARNING")
+            shutdown_validation_pool()
+            results = await asyncio.wait_for(
+                asyncio.to_thread(lambda: [_analyze_file(key[0], pending[key]) for key in keys]),
+                timeout=VALIDATION_TIMEOUT_SECONDS
+            )
+        for key, analysis in zip(keys, results):
+            analyses[key[0]] = analysis
+            _analysis_cache[key] = analysis
+            if len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+    return analyses
+
+
+async def validate_generated_files(new_files: Dict[str, str], existing_files: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Valide statiquement le projet tel qu'il sera après l'écriture de new_files :
+    compilation de chaque fichier, imports entre modules du projet, dépendances tierces
+    non déclarées, point d'entrée et noms PySide6 inexistants.
+    Retourne {"valid", "errors", "warnings", "issues", "pyside_checked", "duration_ms"}.
+    """
+    start = time.perf_counter()
+    merged_files = {**(existing_files or {}), **new_files}
+    try:
+        analyses = await _analyze_files(merged_files)
+    except Exception as e:
+        # La validation ne doit jamais empêcher l'enregistrement du code généré
+        add_log(f"Validation statique impossible: {e}", level="WARNING")
+        return {"valid": True, "errors": 0, "warnings": 0, "issues": [], "pyside_checked": False,
+                "skipped": str(e), "duration_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    issues = _resolve_project(merged_files, analyses)
+    errors = sum(1 for issue in issues if issue["severity"] == "error")
+    result = {
+        "valid": errors == 0,
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "issues": issues,
+        "pyside_checked": any(analysis["pyside"]["checked"] for analysis in analyses.values()),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+    add_log(f"Validation statique: {len(analyses)} fichiers, {errors} erreurs, {result['warnings']} avertissements en {result['duration_ms']} ms.")
+    return result
+
+
+def build_validation_problem(validation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Construit l'entrée problem.json correspondant aux erreurs de validation (None si aucune)."""
+    if validation["valid"]:
+        return None
+    details = "\n".join(
+        f"{issue['file'] or '<projet>'}:{issue['line'] or '-'} [{issue['severity']}] {issue['message']}"
+        for issue in validation["issues"]
+    )
+    return {
+        "type": "validation_error",
+        "message": f"Le code généré contient {validation['errors']} erreur(s) détectée(s) avant exécution.",
+        "details": details,
+        "issues": validation["issues"],
+        "timestamp": datetime.now().isoformat()
+    }
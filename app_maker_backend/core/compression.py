@@ -0,0 +1,112 @@
+# app_maker_backend/core/compression.py
+"""
+Middleware ASGI de compression des réponses, négociée via Accept-Encoding :
+brotli (si le paquet optionnel `brotli` est installé) puis gzip. Seules les réponses
+complètes (non streamées) d'un type compressible et d'une taille >= minimum_size sont
+compressées ; les exports, déjà compressés, et les flux (SSE) passent tels quels.
+"""
+import gzip
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def _parse_accept_encoding(header_value: str) -> List[Tuple[str, float]]:
+    """Analyse un en-tête Accept-Encoding en liste (encodage, q) triée par préférence."""
+    encodings = []
+    for part in header_value.split(","):
+        fields = [field.strip() for field in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        encodings.append((fields[0].lower(), q))
+    return sorted(encodings, key=lambda item: item[1], reverse=True)
+
+
+def negotiate_encoding(header_value: str) -> Optional[str]:
+    """Choisit "br" ou "gzip" selon Accept-Encoding (à q égal, brotli est préféré)."""
+    available = {"gzip"} | ({"br"} if brotli is not None else set())
+    accepted = {name: q for name, q in _parse_accept_encoding(header_value) if q > 0}
+    if "*" in accepted:
+        for name in available:
+            accepted.setdefault(name, accepted["*"])
+    candidates = [name for name in ("br", "gzip") if name in available and name in accepted]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda name: accepted[name])
+
+
+def compress_body(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """Compresse un corps de réponse avec l'encodage choisi."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            compressible = (
+                not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and len(body) >= self.minimum_size
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if compressible:
+                body = compress_body(body, encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                # Un ETag fort désigne une représentation précise : on l'affaiblit une fois compressé
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                message = {**message, "body": body}
+            if content_type.startswith(COMPRESSIBLE_TYPES):
+                headers.add_vary_header("Accept-Encoding")
+            passthrough = True
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -13,8 +13,21 @@ KIMI_API_KEY = os.getenv("KIMI_API_KEY")          # <-- AJOUT
 # Chemin de base pour les projets générés
 CURRENT_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 # Remonte d'un niveau (core) puis d'un niveau (app_maker_backend)
-BASE_PROJECTS_DIR = os.path.abspath(os.path.join(CURRENT_BACKEND_DIR, "..", "generated_projects"))
-os.makedirs(BASE_PROJECTS_DIR, exist_ok=True)  # S'assurer que le dossier existe
+# APP_MAKER_PROJECTS_DIR permet de pointer vers un autre dossier (benchmarks, tests)
+BASE_PROJECTS_DIR = os.path.abspath(
+    os.getenv("APP_MAKER_PROJECTS_DIR") or os.path.join(CURRENT_BACKEND_DIR, "..", "generated_projects")
+)
+# Le dossier est créé au démarrage du serveur (project_manager.init_project_store), pas à l'import
+
+# État partagé entre les workers (base SQLite des métadonnées et des applications lancées,
+# fichiers de verrou des projets). APP_MAKER_STATE_DIR permet de le déplacer (benchmarks, tests)
+STATE_DIR = os.path.abspath(
+    os.getenv("APP_MAKER_STATE_DIR") or os.path.join(CURRENT_BACKEND_DIR, "..", "state")
+)
+STATE_DB_PATH = os.path.join(STATE_DIR, "app_maker_state.sqlite3")
+PROJECT_LOCKS_DIR = os.path.join(STATE_DIR, "locks")
+# Index de recherche du code des projets (FTS5 à trigrammes), partagé entre les workers
+CODE_INDEX_DB_PATH = os.path.join(STATE_DIR, "code_index.sqlite3")
 
 # Modèles disponibles pour chaque fournisseur de LLM
 GEMINI_MODELS = ["gemini-1.5-flash", "gemini-1.5-pro", "gemini-1.0-pro"]
@@ -22,15 +35,146 @@ OPENAI_MODELS = ["gpt-3.5-turbo", "gpt-4-turbo", "gpt-4o"]
 DEEPSEEK_MODELS = ["deepseek-coder", "deepseek-chat"]  # Exemple
 KIMI_MODELS = ["moonshotai/kimi-k2:free"]             
 
-# --- NOUVEAU : Patterns de fichiers/dossiers à exclure lors de l'envoi du contexte au LLM ---
-LLM_CONTEXT_EXCLUSIONS = [
+# Nombre maximal d'appels simultanés par fournisseur de LLM (limites de débit des API)
+LLM_PROVIDER_CONCURRENCY = {
+    "gemini": int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "4")),
+    "deepseek": int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "2")),
+    "kimi": int(os.getenv("KIMI_MAX_CONCURRENCY", "2")),
+}
+DEFAULT_LLM_PROVIDER_CONCURRENCY = 2
+# Relances ciblées au plus par génération quand la réponse du LLM est tronquée (fichiers manquants seulement)
+LLM_MAX_FOLLOWUP_REQUESTS = int(os.getenv("LLM_MAX_FOLLOWUP_REQUESTS", "2"))
+
+# Nombre maximal de variantes générées en parallèle pour un même prompt
+MAX_GENERATION_VARIANTS = int(os.getenv("MAX_GENERATION_VARIANTS", "8"))
+
+# Durée (secondes) pendant laquelle une application lancée sans affichage doit survivre pour être considérée fonctionnelle
+SMOKE_TEST_TIMEOUT_SECONDS = float(os.getenv("SMOKE_TEST_TIMEOUT_SECONDS", "5"))
+# Nombre d'applications testées simultanément en mode batch (par défaut : nombre de cœurs)
+SMOKE_TEST_WORKERS = int(os.getenv("SMOKE_TEST_WORKERS", str(os.cpu_count() or 1)))
+
+# Mode profilage (/runner/run avec profile=true) : durée d'exécution par défaut et maximale,
+# intervalle d'échantillonnage de la pile, nombre de rapports conservés par projet (.profiles/)
+PROFILE_DEFAULT_SECONDS = float(os.getenv("PROFILE_DEFAULT_SECONDS", "10"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_REPORTS_KEPT = int(os.getenv("PROFILE_REPORTS_KEPT", "10"))
+
+# Boucle de correction automatique ("make it run")
+AUTOFIX_DEFAULT_CANDIDATES = int(os.getenv("AUTOFIX_DEFAULT_CANDIDATES", "3"))
+AUTOFIX_MAX_CANDIDATES = int(os.getenv("AUTOFIX_MAX_CANDIDATES", "6"))
+AUTOFIX_DEFAULT_MAX_ITERATIONS = int(os.getenv("AUTOFIX_DEFAULT_MAX_ITERATIONS", "3"))
+AUTOFIX_DEFAULT_TIME_BUDGET_SECONDS = float(os.getenv("AUTOFIX_DEFAULT_TIME_BUDGET_SECONDS", "300"))
+
+# Validation statique du code généré (pool de processus)
+VALIDATION_MAX_WORKERS = int(os.getenv("VALIDATION_MAX_WORKERS", str(os.cpu_count() or 2)))
+VALIDATION_TIMEOUT_SECONDS = float(os.getenv("VALIDATION_TIMEOUT_SECONDS", "30"))
+
+# Correspondance nom d'import -> paquet pip, quand ils diffèrent
+IMPORT_TO_PACKAGE = {
+    "PIL": "Pillow",
+    "cv2": "opencv-python",
+    "yaml": "PyYAML",
+    "sklearn": "scikit-learn",
+    "skimage": "scikit-image",
+    "bs4": "beautifulsoup4",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+    "serial": "pyserial",
+    "usb": "pyusb",
+    "Crypto": "pycryptodome",
+    "jwt": "PyJWT",
+    "magic": "python-magic",
+    "docx": "python-docx",
+    "pptx": "python-pptx",
+    "fitz": "PyMuPDF",
+    "OpenGL": "PyOpenGL",
+    "win32api": "pywin32",
+    "qdarkstyle": "QDarkStyle",
+    "shiboken6": "PySide6",
+}
+# Liste blanche des paquets installés automatiquement quand ils sont déduits des imports du code
+# (nom d'import -> paquet pip). Un import absent de cette liste et de requirements.txt n'est jamais
+# installé : le code généré peut citer un module inventé, et le paquet homonyme sur PyPI
+# exécuterait son code d'installation sur la machine. Il est signalé comme manquant.
+INFERRED_PACKAGE_ALLOWLIST = {
+    **{name: name for name in (
+        "numpy", "pandas", "scipy", "matplotlib", "seaborn", "plotly", "pyqtgraph", "sympy", "networkx",
+        "requests", "httpx", "aiohttp", "psutil", "openpyxl", "xlsxwriter", "reportlab", "qrcode",
+        "markdown", "pygments", "jinja2", "sqlalchemy", "pyperclip", "pytz", "tqdm", "lxml",
+        "qtawesome", "pyttsx3", "pygame", "cryptography", "keyring", "tabulate", "pyqtdarktheme"
+    )},
+    **IMPORT_TO_PACKAGE,
+    **{name: name for name in os.getenv("INFERRED_PACKAGE_ALLOWLIST_EXTRA", "").split(",") if name.strip()},
+}
+
+# Préparation anticipée des environnements virtuels : dès l'enregistrement du code, les
+# dépendances déduites des imports sont installées en arrière-plan (au plus N installations à la fois)
+ENV_PREP_SPECULATIVE = os.getenv("ENV_PREP_SPECULATIVE", "1") not in ("0", "false", "False")
+ENV_PREP_MAX_CONCURRENCY = int(os.getenv("ENV_PREP_MAX_CONCURRENCY", "2"))
+# Quota disque des environnements virtuels (tous projets) : au-delà, les .venv des projets
+# lancés le moins récemment sont supprimés (recréés au prochain lancement). 0 = pas de quota
+VENV_QUOTA_BYTES = int(float(os.getenv("VENV_QUOTA_GB", "20")) * 1024 ** 3)
+# Intervalle entre deux vérifications du quota (mesure des .venv modifiés, éviction)
+STORAGE_CHECK_INTERVAL_SECONDS = float(os.getenv("STORAGE_CHECK_INTERVAL_SECONDS", "300"))
+
+# --- Artefacts d'exécution d'un projet : jamais lus comme code, ni envoyés au LLM, ni exportés ---
+PROJECT_RUNTIME_EXCLUSIONS = [
     ".venv/",          # Exclure l'environnement virtuel
     "__pycache__/",    # Exclure les caches Python
+    ".variants/",      # Exclure les variantes générées en parallèle
+    ".profiles/",      # Exclure les rapports de profilage
     "history.json",    # Exclure le fichier d'historique du projet
-    "*.log",           # Exclure les fichiers de log
+    "problem.json",    # Exclure le fichier de problème du projet
+    "*.log",           # Exclure les fichiers de log (dont app_run.log)
+]
+
+# --- NOUVEAU : Patterns de fichiers/dossiers à exclure lors de l'envoi du contexte au LLM ---
+LLM_CONTEXT_EXCLUSIONS = PROJECT_RUNTIME_EXCLUSIONS + [
     "*.txt",           # Exclure les fichiers texte génériques (si non pertinents)
     "*.md",            # Exclure les fichiers Markdown (si non pertinents)
     # Ajoutez d'autres patterns si nécessaire.
     # Les patterns peuvent être des noms de fichiers exacts, des dossiers (finissant par '/'),
     # ou des wildcards (ex: '*.json' si vous ne voulez aucun fichier JSON)
-]
\ No newline at end of file
+]
+
+# Limites de chargement du contenu des fichiers (réponses /files et contexte LLM).
+# Au-delà, ou pour un fichier binaire, seul un descriptif (chemin, taille, type) est renvoyé ;
+# le contenu reste accessible par la route par fichier.
+MAX_FILE_CONTENT_BYTES = int(os.getenv("MAX_FILE_CONTENT_BYTES", str(512 * 1024)))
+MAX_PROJECT_CONTENT_BYTES = int(os.getenv("MAX_PROJECT_CONTENT_BYTES", str(8 * 1024 * 1024)))
+# Nombre d'octets inspectés pour détecter un fichier binaire
+BINARY_SNIFF_BYTES = 8192
+
+# Compression des réponses HTTP (gzip, ou brotli si le paquet est installé)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_COMPRESSION_LEVEL = int(os.getenv("GZIP_COMPRESSION_LEVEL", "6"))
+BROTLI_COMPRESSION_QUALITY = int(os.getenv("BROTLI_COMPRESSION_QUALITY", "5"))
+
+# Taille des blocs lus lors de l'export d'un projet (octets)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", str(64 * 1024)))
+
+# Rotation du log du backend : à minuit ou au-delà de LOG_MAX_BYTES, archives gzip conservées
+# LOG_RETENTION_DAYS jours (au plus LOG_MAX_ARCHIVES fichiers)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "14"))
+LOG_MAX_ARCHIVES = int(os.getenv("LOG_MAX_ARCHIVES", "60"))
+# Taille maximale renvoyée par /api/get_logs (fin du fichier actif)
+LOG_TAIL_BYTES = int(os.getenv("LOG_TAIL_BYTES", str(512 * 1024)))
+# Index SQLite (FTS5) des logs pour /api/logs/search ; mêmes règles de rétention que les archives
+LOG_INDEX_ENABLED = os.getenv("LOG_INDEX_ENABLED", "1") not in ("0", "false", "False")
+
+# --- Notifications (problem_status en long-polling, flux SSE des événements de projet) ---
+LONG_POLL_TIMEOUT_SECONDS = float(os.getenv("LONG_POLL_TIMEOUT_SECONDS", "25"))
+LONG_POLL_MAX_TIMEOUT_SECONDS = 60
+# Commentaire SSE envoyé en l'absence d'événement (garde la connexion ouverte à travers les proxies)
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# --- Démarrage ---
+# Budget de démarrage à froid (imports + lifespan) : au-delà, le rapport de démarrage est un WARNING
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+# Nombre de workers uvicorn en mode production (python run.py --prod)
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+# Préchargement des SDKs LLM (fournisseurs avec clé) juste après le démarrage du serveur
+LLM_WARMUP_ON_STARTUP = os.getenv("LLM_WARMUP_ON_STARTUP", "0") in ("1", "true", "True")
@@ -0,0 +1,254 @@
+# app_maker_backend/core/env_manager.py
+"""
+Environnements virtuels des projets : création du .venv, installation de PySide6, de
+requirements.txt et des paquets déduits des imports du code (analyse AST, liste blanche).
+
+La préparation est lancée en arrière-plan dès que le magasin de projets enregistre du code
+(au plus ENV_PREP_MAX_CONCURRENCY installations à la fois), pour que l'environnement soit
+prêt quand l'utilisateur lance l'application. Son état (preparing, ready, failed, pending)
+est partagé entre workers dans la base d'état et publié en événement "environment". Le runner
+passe par ensure_project_environment : il attend une préparation en cours (verrou par projet,
+entre workers) et ne refait rien si l'environnement est prêt pour le code actuel.
+"""
+import os
+import sys
+import asyncio
+import hashlib
+import subprocess
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from core.code_validator import infer_missing_packages
+from core.config import ENV_PREP_SPECULATIVE, ENV_PREP_MAX_CONCURRENCY, PROJECT_LOCKS_DIR
+from core.events import publish_project_event
+from core.file_lock import async_interprocess_lock
+from core.logging_config import add_log, log_context
+from core.metrics import RUNNER_STAGE_DURATION, RUNNER_STAGE_ERRORS
+from core.project_manager import _get_project_path, load_project_files, save_project_problem, ProjectNotFoundException
+from core.state_store import set_environment_state, get_environment_state, touch_venv_usage
+from core.tracing import span
+
+# Boucle du serveur (fixée au démarrage) : les enregistrements de code arrivent depuis des threads
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_install_slots: Optional[asyncio.Semaphore] = None
+_speculative_tasks: Dict[str, asyncio.Task] = {}
+_rerun_requested: Set[str] = set()
+_environment_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def _run_stage(stage: str, command, **kwargs) -> subprocess.CompletedProcess:
+    """Exécute une commande d'une étape de préparation dans un thread en mesurant sa durée."""
+    try:
+        with RUNNER_STAGE_DURATION.time(stage=stage), span(f"runner.{stage}"):
+            return await asyncio.to_thread(subprocess.run, command, **kwargs)
+    except subprocess.CalledProcessError:
+        RUNNER_STAGE_ERRORS.inc(stage=stage)
+        raise
+
+
+def _get_venv_executables(venv_path: str) -> Tuple[str, str]:
+    """Retourne les chemins (python, pip) d'un environnement virtuel selon la plateforme."""
+    if sys.platform == "win32":
+        return os.path.join(venv_path, "Scripts", "python.exe"), os.path.join(venv_path, "Scripts", "pip.exe")
+    return os.path.join(venv_path, "bin", "python"), os.path.join(venv_path, "bin", "pip")
+
+
+async def _install_inferred_packages(pip_command: List[str], packages: List[str]):
+    """
+    Installe les paquets déduits des imports (liste blanche INFERRED_PACKAGE_ALLOWLIST seulement).
+    Non bloquant : un paquet non installable est ignoré avec un avertissement.
+    """
+    try:
+        await _run_stage("inferred_packages", [*pip_command, "install", *packages], check=True, capture_output=True, text=True)
+        add_log(f"Paquets déduits des imports installés : {', '.join(packages)}.", level="INFO")
+        return
+    except subprocess.CalledProcessError:
+        if len(packages) == 1:
+            add_log(f"Paquet déduit des imports introuvable ou non installable : {packages[0]}.", level="WARNING")
+            return
+    # Échec groupé : on isole les paquets en cause
+    for package in packages:
+        try:
+            await _run_stage("inferred_packages", [*pip_command, "install", package], check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError:
+            add_log(f"Paquet déduit des imports introuvable ou non installable : {package}.", level="WARNING")
+
+
+async def prepare_project_environment(project_path_absolute: str, packages: Optional[List[str]] = None,
+                                      report_problems: bool = True) -> str:
+    """
+    Prépare l'environnement virtuel d'un projet : création du .venv si besoin,
+    installation de PySide6, de requirements.txt puis des paquets `packages` (déduits des imports).
+    Les sous-processus s'exécutent dans un thread pour ne pas bloquer la boucle d'événements.
+    Un échec est enregistré dans problem.json si report_problems (pas pour une préparation anticipée).
+    Retourne le chemin de l'exécutable Python du venv.
+    """
+    project_id = os.path.basename(project_path_absolute)
+    venv_path = os.path.join(project_path_absolute, ".venv")
+    python_executable, _ = _get_venv_executables(venv_path)
+    # "python -m pip" plutôt que le script pip : son shebang contient un chemin absolu,
+    # faux dans un venv dupliqué par fork_project.
+    pip_command = [python_executable, "-m", "pip"]
+
+    async def fail(problem_type: str, error_message: str, details: str):
+        add_log(error_message, level="ERROR")
+        if report_problems:
+            await asyncio.to_thread(save_project_problem, project_id, {"type": problem_type, "message": error_message, "details": details})
+        raise HTTPException(status_code=500, detail=error_message)
+
+    # Création venv si besoin
+    if not os.path.exists(python_executable):
+        add_log(f"Environnement virtuel non trouvé dans {venv_path}. Création...", level="INFO")
+        try:
+            await _run_stage("venv", [sys.executable, "-m", "venv", venv_path], check=True)
+            add_log("Environnement virtuel créé avec succès.", level="INFO")
+        except subprocess.CalledProcessError as e:
+            await fail("venv_creation_error", f"Erreur lors de la création de l'environnement virtuel : {e}", str(e))
+
+    # Vérification / installation PySide6
+    try:
+        await _run_stage("pyside6_check", [python_executable, "-c", "import PySide6"], check=True, capture_output=True, text=True)
+        add_log("PySide6 est déjà installé dans l'environnement virtuel.", level="INFO")
+    except subprocess.CalledProcessError:
+        add_log("PySide6 non trouvé dans l'environnement virtuel. Installation...", level="INFO")
+        try:
+            await _run_stage("pyside6_install", [*pip_command, "install", "PySide6"], check=True, capture_output=True, text=True)
+            add_log("PySide6 installé avec succès.", level="INFO")
+        except subprocess.CalledProcessError as e:
+            await fail("pyside6_install_error", f"Erreur lors de l'installation de PySide6 : {e.stderr}", e.stderr)
+
+    # Installation requirements.txt
+    requirements_file_path = os.path.join(project_path_absolute, "requirements.txt")
+    if os.path.exists(requirements_file_path):
+        add_log("Fichier requirements.txt trouvé. Installation des dépendances...", level="INFO")
+        try:
+            await _run_stage("requirements", [*pip_command, "install", "-r", requirements_file_path], check=True, capture_output=True, text=True)
+            add_log("Dépendances installées avec succès.", level="INFO")
+        except subprocess.CalledProcessError as e:
+            await fail("requirements_install_error", f"Erreur lors de l'installation des dépendances : {e.stderr}", e.stderr)
+
+    # Imports tiers absents de requirements.txt
+    if packages:
+        await _install_inferred_packages(pip_command, packages)
+
+    return python_executable
+
+
+# --- État et préparation anticipée ---
+
+def _environment_fingerprint(files: Dict[str, str], packages: List[str]) -> str:
+    """Empreinte des dépendances du code : un environnement prêt pour une autre empreinte est à compléter."""
+    digest = hashlib.sha256(files.get("requirements.txt", "").encode("utf-8"))
+    digest.update("\n".join(packages).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def record_environment_state(project_id: str, state: str, **fields):
+    """Enregistre l'état de l'environnement (base partagée) et le publie en événement."""
+    entry = set_environment_state(project_id, state, **fields)
+    publish_project_event(project_id, "environment", {key: entry[key] for key in ("state", "packages", "missing_packages", "error")})
+
+
+@asynccontextmanager
+async def environment_lock(project_id: str):
+    """Une seule opération à la fois sur le .venv d'un projet : coroutines de ce worker, puis autres workers (fichier verrouillé)."""
+    async with _environment_locks.setdefault(project_id, asyncio.Lock()):
+        async with async_interprocess_lock(os.path.join(PROJECT_LOCKS_DIR, f"{project_id}.env.lock")):
+            yield
+
+
+async def ensure_project_environment(project_path_absolute: str, speculative: bool = False) -> str:
+    """
+    Retourne l'exécutable Python d'un environnement prêt pour le code actuel du projet, en
+    attendant la préparation en cours s'il y en a une, ou en la faisant sinon.
+    Lève HTTPException si la préparation échoue.
+    """
+    project_id = os.path.basename(project_path_absolute)
+    python_executable, _ = _get_venv_executables(os.path.join(project_path_absolute, ".venv"))
+    async with environment_lock(project_id):
+        files, _ = await asyncio.to_thread(load_project_files, project_id)
+        # Analyse AST et empreinte de tous les fichiers : hors de la boucle d'événements
+        packages, missing = await asyncio.to_thread(infer_missing_packages, files)
+        fingerprint = await asyncio.to_thread(_environment_fingerprint, files, packages + missing)
+        state = {"fingerprint": fingerprint, "packages": packages, "missing_packages": missing}
+        status = await asyncio.to_thread(get_environment_state, project_id)
+        if status and status["state"] == "ready" and status["fingerprint"] == fingerprint and os.path.exists(python_executable):
+            add_log("Environnement virtuel déjà prêt pour ce code.", level="INFO")
+            await asyncio.to_thread(touch_venv_usage, project_id)
+            return python_executable
+
+        if missing:
+            # Jamais installés sous leur nom d'import (module inventé, paquet homonyme malveillant)
+            add_log(
+                f"Modules importés non installés automatiquement (hors liste blanche, absents de requirements.txt) : {', '.join(missing)}.",
+                level="WARNING"
+            )
+        await asyncio.to_thread(record_environment_state, project_id, "preparing", **state)
+        try:
+            python_executable = await prepare_project_environment(project_path_absolute, packages, report_problems=not speculative)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(record_environment_state, project_id, "pending", **state)
+            raise
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            await asyncio.to_thread(record_environment_state, project_id, "failed", error=error, **state)
+            raise
+        await asyncio.to_thread(record_environment_state, project_id, "ready", **state)
+        # Date d'utilisation : un environnement tout juste préparé n'est pas le premier évincé (storage_manager)
+        await asyncio.to_thread(touch_venv_usage, project_id)
+        return python_executable
+
+
+async def _speculative_prepare(project_id: str):
+    """Préparation anticipée, sous le plafond d'installations ; refaite si le code a changé entre-temps."""
+    global _install_slots
+    if _install_slots is None:
+        _install_slots = asyncio.Semaphore(max(1, ENV_PREP_MAX_CONCURRENCY))
+    with log_context(project_id=project_id):
+        try:
+            async with _install_slots:
+                while True:
+                    _rerun_requested.discard(project_id)
+                    await ensure_project_environment(_get_project_path(project_id), speculative=True)
+                    if project_id not in _rerun_requested:
+                        break
+        except ProjectNotFoundException:
+            pass  # projet supprimé entre-temps
+        except Exception as e:
+            add_log(f"Préparation anticipée de l'environnement du projet {project_id} échouée : {e}", level="WARNING")
+        finally:
+            _speculative_tasks.pop(project_id, None)
+
+
+def _start_speculative_preparation(project_id: str):
+    task = _speculative_tasks.get(project_id)
+    if task is not None and not task.done():
+        _rerun_requested.add(project_id)  # le code a changé pendant la préparation
+        return
+    _speculative_tasks[project_id] = asyncio.create_task(_speculative_prepare(project_id))
+
+
+def schedule_environment_preparation(project_id: str):
+    """
+    Demande la préparation anticipée de l'environnement d'un projet (appelable depuis n'importe
+    quel thread). Sans effet hors du serveur (scripts, benchmarks) ou si ENV_PREP_SPECULATIVE=0.
+    """
+    if not ENV_PREP_SPECULATIVE or _loop is None or _loop.is_closed():
+        return
+    _loop.call_soon_threadsafe(_start_speculative_preparation, project_id)
+
+
+def start_env_manager():
+    """Active la préparation anticipée sur la boucle courante (appelé au démarrage du serveur)."""
+    global _loop
+    _loop = asyncio.get_running_loop()
+
+
+def stop_env_manager():
+    """Annule les préparations anticipées en cours (arrêt du serveur)."""
+    global _loop
+    _loop = None
+    for task in list(_speculative_tasks.values()):
+        task.cancel()
@@ -0,0 +1,107 @@
+# app_maker_backend/core/events.py
+"""
+Bus d'événements des projets : le magasin de projets (problem.json) et le runner publient les
+changements (problème enregistré ou effacé, application lancée, arrêtée ou plantée), les routes
+de long-polling et SSE s'y abonnent. Chaque événement est ajouté au journal de la base d'état :
+son numéro sert de version du projet, commune à tous les workers. Les abonnés du worker qui
+publie sont notifiés immédiatement ; ceux des autres workers via une lecture périodique du journal.
+"""
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Set, Tuple
+
+from core.logging_config import add_log
+from core.state_store import append_event, events_since, latest_event_seq
+
+# Intervalle de lecture du journal pour les événements publiés par d'autres workers
+EVENT_POLL_INTERVAL_SECONDS = 0.5
+
+
+class EventBus:
+    """Diffusion des événements aux abonnés (files asyncio), utilisable depuis n'importe quel thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    def publish(self, project_id: str, kind: str, data: Any) -> int:
+        """Enregistre un événement et le transmet aux abonnés du projet. Retourne la nouvelle version."""
+        event = append_event(project_id, kind, data)
+        self._dispatch(event)
+        return event["seq"]
+
+    def _dispatch(self, event: Dict[str, Any]):
+        with self._lock:
+            targets = list(self._subscribers.get(event["project_id"], ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                pass  # boucle fermée : l'abonné est parti
+
+    @asynccontextmanager
+    async def subscribe(self, project_id: str):
+        """Context manager asynchrone : file recevant les événements du projet pendant le bloc."""
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(entry)
+            if self._poller is None or self._poller.done() or self._poller.get_loop().is_closed():
+                self._poller = asyncio.create_task(self._poll_other_workers())
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(project_id)
+                if subscribers is not None:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        del self._subscribers[project_id]
+
+    async def _poll_other_workers(self):
+        """Relaye les événements publiés par les autres workers, tant qu'il reste des abonnés."""
+        try:
+            cursor = await asyncio.to_thread(latest_event_seq)
+            while self._subscribers:
+                await asyncio.sleep(EVENT_POLL_INTERVAL_SECONDS)
+                for event in await asyncio.to_thread(events_since, cursor):
+                    cursor = event["seq"]
+                    if event["origin_pid"] != os.getpid():
+                        self._dispatch(event)
+        except Exception as e:
+            add_log(f"Erreur lors de la lecture du journal d'événements : {e}", level="ERROR")
+
+    async def wait_for_change(self, project_id: str, since: int, timeout: float) -> int:
+        """
+        Long-polling : attend qu'un projet dépasse la version `since` (au plus `timeout` secondes).
+        Retourne la version courante (inchangée si le délai a expiré).
+        """
+        async with self.subscribe(project_id) as queue:
+            # Abonnement avant la lecture de la version : aucun événement ne peut être manqué entre les deux
+            version = await asyncio.to_thread(latest_event_seq, project_id)
+            if version > since:
+                return version
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=timeout)
+                return max(version, event["seq"])
+            except asyncio.TimeoutError:
+                return version
+
+
+event_bus = EventBus()
+
+
+def publish_project_event(project_id: str, kind: str, data: Any) -> Optional[int]:
+    """Publie un événement de projet ; une erreur du journal est journalisée sans interrompre l'appelant."""
+    try:
+        return event_bus.publish(project_id, kind, data)
+    except Exception as e:
+        add_log(f"Erreur lors de la publication de l'événement {kind} du projet {project_id} : {e}", level="ERROR")
+        return None
+
+
+def get_project_version(project_id: str) -> int:
+    """Version courante d'un projet (numéro de son dernier événement, 0 si aucun)."""
+    return latest_event_seq(project_id)
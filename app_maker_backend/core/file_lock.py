@@ -0,0 +1,72 @@
+# app_maker_backend/core/file_lock.py
+"""
+Verrou exclusif entre processus basé sur un fichier (flock sous POSIX, msvcrt.locking sous
+Windows). Utilisé quand plusieurs workers uvicorn partagent les mêmes projets et logs :
+les verrous threading ne protègent qu'un seul processus.
+"""
+import os
+import sys
+import asyncio
+from contextlib import contextmanager, asynccontextmanager
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _lock(fd: int):
+    if sys.platform == "win32":
+        # LK_LOCK réessaie pendant ~10 s puis échoue : on boucle jusqu'à obtenir le verrou
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock(fd: int):
+    if sys.platform == "win32":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def interprocess_lock(lock_path: str):
+    """
+    Context manager : bloque jusqu'à obtenir le verrou exclusif associé à lock_path (créé si
+    besoin). Le verrou est libéré par le système si le processus meurt. Non réentrant.
+    """
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _lock(fd)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+@asynccontextmanager
+async def async_interprocess_lock(lock_path: str):
+    """
+    Variante asynchrone de interprocess_lock : l'attente du verrou se fait dans un thread.
+    Si la coroutine est annulée pendant l'attente, le verrou est relâché dès qu'il est obtenu.
+    """
+    file_lock = interprocess_lock(lock_path)
+    acquire = asyncio.ensure_future(asyncio.to_thread(file_lock.__enter__))
+    try:
+        await asyncio.shield(acquire)
+    except asyncio.CancelledError:
+        acquire.add_done_callback(lambda future: future.exception() or file_lock.__exit__(None, None, None))
+        raise
+    try:
+        yield
+    finally:
+        file_lock.__exit__(None, None, None)
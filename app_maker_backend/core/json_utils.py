@@ -0,0 +1,53 @@
+# app_maker_backend/core/json_utils.py
+"""
+Sérialisation JSON rapide : orjson si disponible (dépendance optionnelle), sinon le module json
+standard en mode compact. Utilisée pour les corps de réponse de l'API et pour la persistance
+de history.json / problem.json.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def dumps_bytes(data: Any) -> bytes:
+    """Sérialise en JSON compact UTF-8 (sans échappement des caractères non ASCII)."""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS : même tolérance que json pour les clés int/float
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(data: Any) -> str:
+    """Comme dumps_bytes, mais retourne une chaîne."""
+    return dumps_bytes(data).decode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """
+    Désérialise du JSON (str ou bytes). Les erreurs levées sont des json.JSONDecodeError
+    (orjson.JSONDecodeError en hérite).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(path: str) -> Any:
+    """Lit et désérialise un fichier JSON."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON sérialisée avec dumps_bytes (classe de réponse par défaut de l'application)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,232 @@
+# app_maker_backend/core/llm_json.py
+"""
+Extraction tolérante de la réponse JSON du LLM ({"files": {nom: contenu | null}}), commune à
+tous les fournisseurs. Dans l'ordre, tant que la réponse n'est pas lisible :
+1. bloc Markdown ```json et texte autour de l'objet JSON ignorés ;
+2. réparation des chaînes (retours à la ligne et tabulations non échappés, échappements
+   invalides, guillemets non échappés dans le code) et des virgules finales ;
+3. réponse tronquée ou encore mal formée : lecture entrée par entrée, seuls les fichiers
+   complets dont la suite est bien formée sont conservés et le fichier interrompu (ou refermé
+   trop tôt par la réparation) est signalé (le LLM le renvoie à la demande, voir llm_service).
+La lecture entrée par entrée accepte n'importe quel préfixe de la réponse (flux ou coupure).
+L'enveloppe {"files": ...} est obligatoire.
+"""
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class LLMResponseParseError(ValueError):
+    """Aucun objet JSON exploitable dans la réponse du LLM."""
+    pass
+
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?[ \t]*\r?\n?(.*?)(?:```|\Z)", re.DOTALL)
+_FILES_KEY_RE = re.compile(r'"files"\s*:\s*\{')
+# Suite de caractères ordinaires d'une chaîne (ni guillemet, ni antislash, ni caractère de contrôle)
+_PLAIN_STRING_RUN_RE = re.compile(r'[^"\\\x00-\x1f]+')
+_HEX4_RE = re.compile(r"[0-9a-fA-F]{4}")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+# Caractères structurels pouvant suivre la fin d'une chaîne JSON
+_STRING_END_FOLLOWERS = ":,}]"
+_WHITESPACE = " \t\r\n"
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _strip_fence(text: str) -> Tuple[str, bool]:
+    """Contenu du premier bloc Markdown contenant un objet (bloc non refermé accepté : réponse tronquée)."""
+    for match in _FENCE_RE.finditer(text):
+        if "{" in match.group(1):
+            return match.group(1), True
+    return text, False
+
+
+def _repair_json_text(text: str) -> Tuple[str, bool]:
+    """
+    Réécrit le texte pour qu'il soit du JSON valide autant que possible : caractères de contrôle
+    et antislashs isolés échappés dans les chaînes, guillemet interne échappé s'il n'est pas
+    suivi d'un caractère structurel, virgules finales supprimées. Retourne (texte, modifié).
+    """
+    out: List[str] = []
+    changed = False
+    in_string = False
+    pos, length = 0, len(text)
+    while pos < length:
+        char = text[pos]
+        if not in_string:
+            if char == '"':
+                in_string = True
+            elif char == ",":
+                following = _skip_whitespace(text, pos + 1)
+                if following < length and text[following] in "}]":
+                    changed = True
+                    pos += 1
+                    continue
+            out.append(char)
+            pos += 1
+            continue
+
+        run = _PLAIN_STRING_RUN_RE.match(text, pos)
+        if run:
+            out.append(run.group())
+            pos = run.end()
+            continue
+        if char == "\\":
+            following = text[pos + 1:pos + 2]
+            if following == "u" and _HEX4_RE.match(text, pos + 2):
+                out.append(text[pos:pos + 6])
+                pos += 6
+            elif following and following in '"\\/bfnrt':
+                out.append(text[pos:pos + 2])
+                pos += 2
+            elif not following:
+                break  # réponse coupée juste après l'antislash
+            else:
+                out.append("\\\\")
+                changed = True
+                pos += 1
+        elif char == '"':
+            following = _skip_whitespace(text, pos + 1)
+            if following >= length or text[following] in _STRING_END_FOLLOWERS:
+                in_string = False
+                out.append(char)
+            else:
+                out.append('\\"')
+                changed = True
+            pos += 1
+        else:
+            out.append(_CONTROL_ESCAPES.get(char, f"\\u{ord(char):04x}"))
+            changed = True
+            pos += 1
+    return "".join(out), changed
+
+
+def _files_from_object(data: Any) -> Optional[Dict[str, Optional[str]]]:
+    """Dictionnaire des fichiers d'un objet décodé ({"files": {...}} obligatoire : un objet d'erreur n'est pas un fichier)."""
+    if not isinstance(data, dict) or "files" not in data:
+        return None
+    files = data["files"]
+    if not isinstance(files, dict) or not all(isinstance(content, (str, type(None))) for content in files.values()):
+        return None
+    return files
+
+
+def _scan_partial_files(text: str) -> Tuple[Dict[str, Optional[str]], Optional[str], bool]:
+    """
+    Lit les entrées de l'objet "files" une à une sur un préfixe de la réponse.
+    Retourne (fichiers complets, fichier interrompu ou None, objet "files" refermé).
+    Une entrée n'est retenue que si la suite de la réponse est bien formée (virgule puis nom
+    suivi de ":", ou fin de l'objet) : une rupture de structure juste après une chaîne signifie
+    qu'elle a été refermée trop tôt (guillemet interne non échappé), le fichier est alors
+    signalé comme interrompu pour être redemandé.
+    """
+    match = _FILES_KEY_RE.search(text)
+    if match is None:
+        raise LLMResponseParseError("La réponse du LLM ne contient pas d'objet \"files\".")
+    pos = match.end()
+    files: Dict[str, Optional[str]] = {}
+    pending: Optional[Tuple[str, Optional[str]]] = None  # dernière entrée lue, en attente de confirmation
+    while True:
+        pos = _skip_whitespace(text, pos)
+        if pos >= len(text):
+            break  # coupure entre deux entrées
+        if text[pos] == "}":
+            rest = text[pos + 1:].lstrip(_WHITESPACE)
+            if rest and rest[0] not in ",}":
+                return files, pending and pending[0], False
+            if pending:
+                files[pending[0]] = pending[1]
+            return files, None, True
+        if pending:
+            if text[pos] != ",":
+                return files, pending[0], False
+            pos = _skip_whitespace(text, pos + 1)
+            if pos >= len(text):
+                break
+        if text[pos] != '"':
+            return files, pending and pending[0], False
+        try:
+            name, pos = scanstring(text, pos + 1, False)
+        except ValueError:
+            break  # coupé dans le nom : fichier inconnu
+        pos = _skip_whitespace(text, pos)
+        if pos >= len(text):
+            if pending:
+                files[pending[0]] = pending[1]
+            return files, name, False
+        if text[pos] != ":":
+            return files, pending[0] if pending else name, False
+        if pending:
+            files[pending[0]] = pending[1]
+        pending = None
+        pos = _skip_whitespace(text, pos + 1)
+        if text.startswith("null", pos):
+            pending = (name, None)
+            pos += 4
+            continue
+        if pos >= len(text) or text[pos] != '"':
+            return files, name, False
+        try:
+            content, pos = scanstring(text, pos + 1, False)
+        except ValueError:
+            return files, name, False
+        pending = (name, content)
+    if pending:
+        files[pending[0]] = pending[1]
+    return files, None, False
+
+
+def parse_files_response(text: str) -> Dict[str, Any]:
+    """
+    Extrait les fichiers d'une réponse du LLM, en la réparant si besoin.
+    Retourne {"files": {nom: contenu | None}, "complete": bool, "truncated_file": nom | None,
+    "repairs": [...]} ; complete est False si la réponse est coupée (fichiers suivants
+    inconnus, truncated_file éventuellement interrompu). Lève LLMResponseParseError si la
+    réponse ne contient aucun objet JSON avec une clé "files".
+    """
+    repairs: List[str] = []
+    text = (text or "").strip()
+    try:
+        files = _files_from_object(json.loads(text))
+        if files is not None:
+            return {"files": files, "complete": True, "truncated_file": None, "repairs": repairs}
+    except ValueError:
+        pass
+
+    text, fenced = _strip_fence(text)
+    if fenced:
+        repairs.append("markdown_fence")
+    start = text.find("{")
+    if start < 0:
+        raise LLMResponseParseError("Aucun objet JSON dans la réponse du LLM.")
+    if text[:start].strip():
+        repairs.append("leading_text")
+    text = text[start:]
+
+    decoder = json.JSONDecoder()
+    for attempt in ("envelope", "json_syntax"):
+        if attempt == "json_syntax":
+            text, changed = _repair_json_text(text)
+            if not changed:
+                continue
+            repairs.append(attempt)
+        try:
+            data, end = decoder.raw_decode(text)
+        except ValueError:
+            continue
+        files = _files_from_object(data)
+        if files is None:
+            raise LLMResponseParseError("L'objet JSON de la réponse du LLM ne contient pas de fichiers.")
+        if text[end:].strip():
+            repairs.append("trailing_text")
+        return {"files": files, "complete": True, "truncated_file": None, "repairs": repairs}
+
+    files, truncated_file, complete = _scan_partial_files(text)
+    repairs.append("truncated_envelope" if complete else "truncated")
+    return {"files": files, "complete": complete, "truncated_file": truncated_file, "repairs": repairs}
@@ -1,59 +1,105 @@
 # app_maker_backend/core/llm_service.py
 import os
-import json
+import time
+import asyncio
+import threading
 from fastapi import HTTPException
-from dotenv import load_dotenv
-from typing import Dict, Any, List
-import fnmatch  # Pour la correspondance de patterns de fichiers
+from typing import Dict, Any, List, Optional
 
-from core.logging_config import add_log
+from core.logging_config import add_log, log_context
+from core.tracing import span
+from core.project_manager import is_path_excluded
+from core.metrics import LLM_REQUEST_DURATION, LLM_ERRORS, LLM_TOKENS, LLM_QUEUE_DEPTH, LLM_IN_FLIGHT, LLM_RESPONSE_REPAIRS
+from core.llm_json import parse_files_response, LLMResponseParseError
 # Importer la nouvelle liste d'exclusions
 from core.config import (
     GEMINI_API_KEY,
     OPENAI_API_KEY,
     DEEPSEEK_API_KEY,
     KIMI_API_KEY,           # <-- AJOUT
-    LLM_CONTEXT_EXCLUSIONS
+    LLM_CONTEXT_EXCLUSIONS,
+    LLM_PROVIDER_CONCURRENCY,
+    DEFAULT_LLM_PROVIDER_CONCURRENCY,
+    LLM_MAX_FOLLOWUP_REQUESTS,
+    GEMINI_MODELS,
+    OPENAI_MODELS,
+    KIMI_MODELS
 )
 
-# Initialisation des clients LLM (conditionnelle)
+# Clients LLM chargés à la demande : les SDKs (google-generativeai, openai) ne sont importés
+# qu'au premier appel d'un fournisseur (ou par warm_up_providers), pas au démarrage du serveur.
 # Assurez-vous d'avoir installé les SDKs nécessaires :
 # pip install google-generativeai
 # pip install openai
 
-gemini_client_configured = False
-try:
-    import google.generativeai as genai
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_client_configured = True
-    else:
-        add_log("GEMINI_API_KEY non définie. Gemini sera indisponible.", level="WARNING")
-except Exception as e:
-    add_log(f"Erreur lors de l'initialisation de Gemini API: {e}. Gemini sera indisponible.", level="ERROR")
-
-openai_client = None
-try:
-    from openai import OpenAI
-    if OPENAI_API_KEY:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
-    else:
-        add_log("OPENAI_API_KEY non définie. OpenAI sera indisponible.", level="WARNING")
-except Exception as e:
-    add_log(f"Erreur lors de l'initialisation de OpenAI API: {e}. OpenAI sera indisponible.", level="ERROR")
-
-kimi_client = None  # <-- AJOUT
-try:
-    from openai import OpenAI as KimiOpenAI  # Ré-utiliser le client OpenAI pour Moonshot
-    if KIMI_API_KEY:
-        kimi_client = KimiOpenAI(
-            api_key=KIMI_API_KEY,
-            base_url="https://openrouter.ai/api/v1"
-        )
-    else:
-        add_log("KIMI_API_KEY non définie. Kimi sera indisponible.", level="WARNING")
-except Exception as e:
-    add_log(f"Erreur lors de l'initialisation de Kimi API: {e}. Kimi sera indisponible.", level="ERROR")
+# Fournisseur -> client initialisé (module genai pour Gemini, client OpenAI sinon), ou None
+# si le SDK ou la clé manque (l'échec est mémorisé : pas de nouvel import à chaque requête)
+_provider_clients: Dict[str, Any] = {}
+_provider_clients_lock = threading.Lock()
+
+_PROVIDER_KEYS = {
+    "gemini": ("GEMINI_API_KEY", GEMINI_API_KEY),
+    "openai": ("OPENAI_API_KEY", OPENAI_API_KEY),
+    "kimi": ("KIMI_API_KEY", KIMI_API_KEY),
+}
+
+# Modèles connus par fournisseur : seuls eux servent de label de métrique (cardinalité bornée)
+_KNOWN_MODELS = {
+    "gemini": set(GEMINI_MODELS),
+    "openai": set(OPENAI_MODELS),
+    "kimi": set(KIMI_MODELS),
+}
+
+
+def _model_label(llm_provider: str, model_name: str) -> str:
+    """Label "model" des métriques : le nom du modèle s'il est connu, "other" sinon."""
+    return model_name if model_name in _KNOWN_MODELS.get(llm_provider, ()) else "other"
+
+
+def _create_provider_client(llm_provider: str) -> Any:
+    """Importe le SDK d'un fournisseur et construit son client (None si indisponible)."""
+    key_name, api_key = _PROVIDER_KEYS[llm_provider]
+    if not api_key:
+        add_log(f"{key_name} non définie. {llm_provider.capitalize()} sera indisponible.", level="WARNING")
+        return None
+    try:
+        if llm_provider == "gemini":
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            return genai
+        from openai import OpenAI
+        if llm_provider == "kimi":
+            # Ré-utiliser le client OpenAI pour Moonshot (via OpenRouter)
+            return OpenAI(api_key=api_key, base_url="https://openrouter.ai/api/v1")
+        return OpenAI(api_key=api_key)
+    except Exception as e:
+        add_log(f"Erreur lors de l'initialisation de {llm_provider} API: {e}. {llm_provider.capitalize()} sera indisponible.", level="ERROR")
+        return None
+
+
+def _get_provider_client(llm_provider: str) -> Any:
+    """Retourne le client d'un fournisseur, créé au premier appel (thread-safe)."""
+    if llm_provider not in _provider_clients:
+        with _provider_clients_lock:
+            if llm_provider not in _provider_clients:
+                start = time.perf_counter()
+                _provider_clients[llm_provider] = _create_provider_client(llm_provider)
+                add_log(
+                    f"Client {llm_provider} chargé en {(time.perf_counter() - start) * 1000:.0f} ms.",
+                    level="DEBUG",
+                    provider=llm_provider
+                )
+    return _provider_clients[llm_provider]
+
+
+async def warm_up_providers():
+    """
+    Précharge (dans un thread) les SDKs des fournisseurs dont la clé est définie, pour que la
+    première génération ne paie pas le coût des imports. Appelé après le démarrage du serveur.
+    """
+    for llm_provider, (_, api_key) in _PROVIDER_KEYS.items():
+        if api_key:
+            await asyncio.to_thread(_get_provider_client, llm_provider)
 
 #deepseek_client = None
 #try:
@@ -67,18 +113,121 @@ except Exception as e:
 #except Exception as e:
 #    add_log(f"Erreur lors de l'initialisation de DeepSeek API: {e}. DeepSeek sera indisponible.", level="ERROR")
 
+# Sémaphores par fournisseur : limitent le nombre d'appels simultanés vers une même API,
+# quel que soit le nombre de générations lancées en parallèle.
+_provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_provider_semaphore(llm_provider: str) -> asyncio.Semaphore:
+    """Retourne (en le créant si besoin) le sémaphore de concurrence d'un fournisseur."""
+    semaphore = _provider_semaphores.get(llm_provider)
+    if semaphore is None:
+        limit = LLM_PROVIDER_CONCURRENCY.get(llm_provider, DEFAULT_LLM_PROVIDER_CONCURRENCY)
+        semaphore = asyncio.Semaphore(max(1, limit))
+        _provider_semaphores[llm_provider] = semaphore
+    return semaphore
+
+
+def _build_user_prompt(prompt: str, current_files_context: Optional[Dict[str, str]]) -> str:
+    """
+    Construit le message utilisateur envoyé au LLM : la demande puis le code actuel du projet,
+    filtré par LLM_CONTEXT_EXCLUSIONS.
+    """
+    parts = [f"L'utilisateur demande : '{prompt}'"]
+
+    # Filtrage du contexte avant l'envoi au LLM
+    filtered_context_to_send = {}
+    if current_files_context:
+        for file_name, content in current_files_context.items():
+            if not is_path_excluded(file_name, LLM_CONTEXT_EXCLUSIONS):
+                filtered_context_to_send[file_name] = content
+
+        if not filtered_context_to_send:
+            add_log("Contexte LLM: Tous les fichiers ont été exclus ou le contexte était vide après filtrage.", level="WARNING")
+        else:
+            add_log(f"Contexte LLM filtré: {len(filtered_context_to_send)} fichiers pertinents envoyés.", level="INFO")
+
+    # Assemblage par join : la concaténation répétée recopiait tout le contexte à chaque fichier
+    if filtered_context_to_send:
+        parts.append("\n\nVoici le code actuel de l'application (fichiers existants) :\n")
+        for file_name, content in filtered_context_to_send.items():
+            parts.extend((f"\n--- {file_name} ---\n", content, f"\n--- END OF {file_name} ---\n"))
+        parts.append("\n\nModifiez ces fichiers ou créez-en de nouveaux pour répondre à la demande de l'utilisateur. Retournez SEULEMENT les fichiers modifiés/créés/supprimés dans le format JSON spécifié.")
+    else:
+        parts.append("\n\nCréez une nouvelle application PySide6 basée sur cette demande. Retournez les fichiers dans le format JSON spécifié.")
+    return "".join(parts)
+
 
 async def generate_pyside_code(
     prompt: str,
     current_files_context: Dict[str, str] = None, # Contexte des fichiers existants
     llm_provider: str = "gemini", # Fournisseur LLM choisi
-    model_name: str = "gemini-1.5-pro" # Modèle choisi
+    model_name: str = "gemini-1.5-pro", # Modèle choisi
+    temperature: Optional[float] = None # Température d'échantillonnage (None = valeur par défaut du modèle)
 ) -> Dict[str, str]:
     """
     Génère ou modifie le code PySide6 en fonction du prompt et du contexte de fichiers existants,
     en utilisant le LLM et le modèle spécifiés.
+    Les appels sont limités par fournisseur (LLM_PROVIDER_CONCURRENCY).
     Retourne un dictionnaire {nom_fichier: contenu_fichier}.
     """
+    # Fournisseur validé avant le sémaphore et les métriques : une valeur quelconque de la
+    # requête ne crée ni sémaphore ni série de métriques
+    if llm_provider not in _PROVIDER_KEYS:
+        raise HTTPException(status_code=400, detail=f"Fournisseur LLM '{llm_provider}' non supporté.")
+    model_label = _model_label(llm_provider, model_name)
+    with log_context(provider=llm_provider, model=model_name):
+        semaphore = _get_provider_semaphore(llm_provider)
+        queued_at = time.perf_counter()
+        LLM_QUEUE_DEPTH.inc(provider=llm_provider)
+        try:
+            await semaphore.acquire()
+        finally:
+            LLM_QUEUE_DEPTH.dec(provider=llm_provider)
+        queue_wait_ms = round((time.perf_counter() - queued_at) * 1000, 2)
+
+        LLM_IN_FLIGHT.inc(provider=llm_provider)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with span("llm.call", queue_wait_ms=queue_wait_ms, temperature=temperature):
+                files = await _generate_pyside_code(prompt, current_files_context, llm_provider, model_name, temperature)
+            outcome = "success"
+            return files
+        except Exception:
+            LLM_ERRORS.inc(provider=llm_provider, model=model_label)
+            raise
+        finally:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - start, provider=llm_provider, model=model_label, outcome=outcome)
+            LLM_IN_FLIGHT.dec(provider=llm_provider)
+            semaphore.release()
+
+
+def _record_token_usage(llm_provider: str, model_name: str, response: Any):
+    """Comptabilise les jetons d'une réponse (usage_metadata pour Gemini, usage pour l'API OpenAI)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        prompt_tokens = getattr(usage, "prompt_token_count", 0)
+        completion_tokens = getattr(usage, "candidates_token_count", 0)
+    else:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0)
+        completion_tokens = getattr(usage, "completion_tokens", 0)
+    model_label = _model_label(llm_provider, model_name)
+    LLM_TOKENS.inc(prompt_tokens or 0, provider=llm_provider, model=model_label, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens or 0, provider=llm_provider, model=model_label, kind="completion")
+
+
+async def _generate_pyside_code(
+    prompt: str,
+    current_files_context: Optional[Dict[str, str]],
+    llm_provider: str,
+    model_name: str,
+    temperature: Optional[float]
+) -> Dict[str, str]:
+    """Implémentation de generate_pyside_code, appelée sous le sémaphore du fournisseur."""
     add_log(f"Génération du code PySide6 avec {llm_provider}/{model_name} pour le prompt : '{prompt[:100]}...'")
 
     # Instruction système générique pour la génération de code PySide6
@@ -116,55 +265,92 @@ async def generate_pyside_code(
     ```
     """
 
-    user_prompt_content = f"L'utilisateur demande : '{prompt}'"
+    user_prompt_content = _build_user_prompt(prompt, current_files_context)
 
-    # --- NOUVELLE LOGIQUE DE FILTRAGE DU CONTEXTE AVANT L'ENVOI AU LLM ---
-    filtered_context_to_send = {}
-    if current_files_context:
-        for file_name, content in current_files_context.items():
-            should_exclude = False
-            for pattern in LLM_CONTEXT_EXCLUSIONS:
-                if pattern.endswith('/'): # C'est un dossier (ex: ".venv/")
-                    # Vérifier si le chemin du fichier commence par le dossier exclu
-                    # ou contient le dossier exclu comme partie d'un chemin (ex: "src/.venv/file.py")
-                    if file_name.startswith(pattern) or f"/{pattern}" in file_name:
-                        should_exclude = True
-                        break
-                elif '*' in pattern: # C'est un pattern de wildcard (ex: "*.log")
-                    if fnmatch.fnmatch(file_name, pattern):
-                        should_exclude = True
-                        break
-                else: # C'est un nom de fichier exact (ex: "history.json")
-                    if file_name == pattern:
-                        should_exclude = True
-                        break
-            
-            if not should_exclude:
-                filtered_context_to_send[file_name] = content
-        
-        if not filtered_context_to_send:
-            add_log("Contexte LLM: Tous les fichiers ont été exclus ou le contexte était vide après filtrage.", level="WARNING")
-        else:
-            add_log(f"Contexte LLM filtré: {len(filtered_context_to_send)} fichiers pertinents envoyés.", level="INFO")
-            
-    # Utiliser filtered_context_to_send pour construire le prompt
-    if filtered_context_to_send:
-        user_prompt_content += "\n\nVoici le code actuel de l'application (fichiers existants) :\n"
-        for file_name, content in filtered_context_to_send.items():
-            user_prompt_content += f"\n--- {file_name} ---\n"
-            user_prompt_content += content
-            user_prompt_content += "\n--- END OF " + file_name + " ---\n"
-        user_prompt_content += "\n\nModifiez ces fichiers ou créez-en de nouveaux pour répondre à la demande de l'utilisateur. Retournez SEULEMENT les fichiers modifiés/créés/supprimés dans le format JSON spécifié."
+    generated_content = await _call_llm(llm_provider, model_name, system_instruction, user_prompt_content, temperature)
+    parsed = _parse_llm_files(llm_provider, generated_content)
+    generated_files = parsed["files"]
+
+    # Réponse tronquée : relance ciblée sur les fichiers manquants, les fichiers complets sont conservés
+    followups = 0
+    while not parsed["complete"] and followups < LLM_MAX_FOLLOWUP_REQUESTS:
+        followups += 1
+        add_log(
+            f"Réponse du LLM tronquée ({len(generated_files)} fichier(s) complet(s)"
+            f"{', ' + parsed['truncated_file'] + ' interrompu' if parsed['truncated_file'] else ''}) : relance {followups} pour les fichiers manquants.",
+            level="WARNING"
+        )
+        LLM_RESPONSE_REPAIRS.inc(provider=llm_provider, kind="followup")
+        followup_prompt = _build_followup_prompt(user_prompt_content, generated_files, parsed["truncated_file"])
+        generated_content = await _call_llm(llm_provider, model_name, system_instruction, followup_prompt, temperature)
+        parsed = _parse_llm_files(llm_provider, generated_content)
+        for file_name, content in parsed["files"].items():
+            generated_files.setdefault(file_name, content)
+    if not parsed["complete"]:
+        add_log(f"Réponse du LLM toujours incomplète après {followups} relance(s) : seuls les fichiers complets sont conservés.", level="WARNING")
+
+    # Filtrer les fichiers supprimés (contenu null) et s'assurer que seuls les fichiers avec du contenu sont retournés.
+    final_files = {
+        name: content for name, content in generated_files.items()
+        if content is not None
+    }
+
+    # Pour le débogage:
+    if not final_files:
+        add_log("Le LLM n'a généré aucun fichier valide.", level="WARNING")
     else:
-        user_prompt_content += "\n\nCréez une nouvelle application PySide6 basée sur cette demande. Retournez les fichiers dans le format JSON spécifié."
+        for file_name, content in final_files.items():
+            add_log(f"Fichier généré/modifié par LLM: {file_name} (taille: {len(content)} octets)")
 
-    # --- FIN LOGIQUE DE FILTRAGE DU CONTEXTE ---
+    return final_files
 
 
-    # Logique conditionnelle pour appeler le bon LLM
-    # Logique conditionnelle pour appeler le bon LLM
+def _parse_llm_files(llm_provider: str, generated_content: str) -> Dict[str, Any]:
+    """Extrait les fichiers de la réponse (réparée si besoin, voir llm_json) ; HTTPException si elle est illisible."""
+    try:
+        parsed = parse_files_response(generated_content)
+    except LLMResponseParseError as e:
+        add_log(f"Réponse du LLM illisible : {e}", level="ERROR", response_head=(generated_content or "")[:200])
+        raise HTTPException(status_code=500, detail=f"Réponse du service LLM ({llm_provider}) illisible : {e}")
+    for repair in parsed["repairs"]:
+        LLM_RESPONSE_REPAIRS.inc(provider=llm_provider, kind=repair)
+    if parsed["repairs"]:
+        add_log(f"Réponse du LLM réparée : {', '.join(parsed['repairs'])}.", level="INFO")
+    return parsed
+
+
+def _build_followup_prompt(user_prompt_content: str, received_files: Dict[str, Optional[str]], truncated_file: Optional[str]) -> str:
+    """
+    Message de relance après une réponse tronquée : la demande d'origine, les fichiers déjà
+    reçus (pour rester cohérent, sans les renvoyer) et le fichier interrompu à renvoyer en entier.
+    """
+    parts = [user_prompt_content, "\n\nVotre réponse précédente a été interrompue avant la fin."]
+    if received_files:
+        parts.append(" Fichiers déjà reçus, à NE PAS renvoyer :\n")
+        for file_name, content in received_files.items():
+            if content is None:
+                parts.append(f"\n--- {file_name} (supprimé) ---\n")
+            else:
+                parts.extend((f"\n--- {file_name} ---\n", content, f"\n--- END OF {file_name} ---\n"))
+    if truncated_file:
+        parts.append(f"\n\nRetournez le fichier `{truncated_file}` en entier, puis les autres fichiers prévus non encore envoyés,")
+    else:
+        parts.append("\n\nRetournez les fichiers prévus non encore envoyés,")
+    parts.append(" dans le même format JSON. Si tous les fichiers ont été envoyés, retournez {\"files\": {}}.")
+    return "".join(parts)
+
+
+async def _call_llm(
+    llm_provider: str,
+    model_name: str,
+    system_instruction: str,
+    user_prompt_content: str,
+    temperature: Optional[float]
+) -> str:
+    """Envoie la demande au fournisseur choisi et retourne le texte brut de la réponse."""
     if llm_provider == "gemini":
-        if not gemini_client_configured:
+        genai = _get_provider_client("gemini")
+        if genai is None:
             raise HTTPException(status_code=500, detail="Gemini API non configurée ou clé manquante.")
         
         model = genai.GenerativeModel(model_name)
@@ -177,18 +363,12 @@ async def generate_pyside_code(
             response = await model.generate_content_async(
                 messages_gemini,
                 generation_config=genai.types.GenerationConfig(
-                    response_mime_type="application/json" # Demande explicitement du JSON
+                    response_mime_type="application/json", # Demande explicitement du JSON
+                    temperature=temperature
                 )
             )
-            generated_content = response.text
-            
-            # Supprimer le Markdown JSON si présent
-            if generated_content.startswith("```json") and generated_content.endswith("```"):
-                generated_content = generated_content[7:-3].strip()
-
-            # Parse la réponse JSON
-            parsed_response = json.loads(generated_content)
-            generated_files = parsed_response.get("files", {})
+            _record_token_usage(llm_provider, model_name, response)
+            return response.text
 
         except genai.types.BlockedPromptException as e:
             add_log(f"La requête Gemini LLM a été bloquée : {e}", level="ERROR")
@@ -198,7 +378,8 @@ async def generate_pyside_code(
             raise HTTPException(status_code=500, detail=f"Erreur du service LLM (Gemini): {e}")
 
     elif llm_provider == "openai":
-        if not openai_client:
+        openai_client = _get_provider_client("openai")
+        if openai_client is None:
             raise HTTPException(status_code=500, detail="OpenAI API non configurée ou clé manquante.")
 
         messages_openai = [
@@ -206,24 +387,28 @@ async def generate_pyside_code(
             {"role": "user", "content": user_prompt_content}
         ]
 
+        optional_params = {"temperature": temperature} if temperature is not None else {}
+
         try:
-            response = openai_client.chat.completions.create(
+            # Le client OpenAI est synchrone : l'appel est déporté dans un thread pour ne pas
+            # bloquer la boucle d'événements pendant les générations parallèles.
+            response = await asyncio.to_thread(
+                openai_client.chat.completions.create,
                 model=model_name,
                 messages=messages_openai,
-                response_format={ "type": "json_object" } # Demande explicitement du JSON
+                response_format={ "type": "json_object" }, # Demande explicitement du JSON
+                **optional_params
             )
-            generated_content = response.choices[0].message.content
-            
-            # Parse la réponse JSON
-            parsed_response = json.loads(generated_content)
-            generated_files = parsed_response.get("files", {})
+            _record_token_usage(llm_provider, model_name, response)
+            return response.choices[0].message.content
 
         except Exception as e:
             add_log(f"Erreur lors de l'appel à OpenAI LLM: {e}", level="ERROR")
             raise HTTPException(status_code=500, detail=f"Erreur du service LLM (OpenAI): {e}")
 
     elif llm_provider == "kimi":
-        if not kimi_client:
+        kimi_client = _get_provider_client("kimi")
+        if kimi_client is None:
             raise HTTPException(status_code=500, detail="Kimi API non configurée ou clé manquante.")
 
         messages_kimi = [
@@ -231,33 +416,21 @@ async def generate_pyside_code(
             {"role": "user", "content": user_prompt_content}
         ]
 
+        optional_params = {"temperature": temperature} if temperature is not None else {}
+
         try:
-            response = kimi_client.chat.completions.create(
+            response = await asyncio.to_thread(
+                kimi_client.chat.completions.create,
                 model=model_name,
                 messages=messages_kimi,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                **optional_params
             )
-            generated_content = response.choices[0].message.content
-            parsed_response = json.loads(generated_content)
-            generated_files = parsed_response.get("files", {})
+            _record_token_usage(llm_provider, model_name, response)
+            return response.choices[0].message.content
         except Exception as e:
             add_log(f"Erreur lors de l'appel à Kimi LLM: {e}", level="ERROR")
             raise HTTPException(status_code=500, detail=f"Erreur du service LLM (Kimi): {e}")
 
     else:
         raise HTTPException(status_code=400, detail=f"Fournisseur LLM '{llm_provider}' non supporté.")
-
-    # Filtrer les fichiers supprimés (contenu null) et s'assurer que seuls les fichiers avec du contenu sont retournés.
-    final_files = {
-        name: content for name, content in generated_files.items()
-        if content is not None
-    }
-
-    # Pour le débogage:
-    if not final_files:
-        add_log("Le LLM n'a généré aucun fichier valide.", level="WARNING")
-    else:
-        for file_name, content in final_files.items():
-            add_log(f"Fichier généré/modifié par LLM: {file_name} (taille: {len(content)} octets)")
-
-    return final_files
\ No newline at end of file
@@ -0,0 +1,242 @@
+# app_maker_backend/core/log_index.py
+"""
+Index de recherche des logs : un handler de logging pousse chaque enregistrement dans une file,
+un thread d'écriture les insère par lots dans une base SQLite (WAL) avec un index plein texte
+FTS5 sur le message. Les requêtes (niveau, projet, requête, période, texte) utilisent les
+index et ne relisent jamais les fichiers de log bruts.
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    level TEXT NOT NULL,
+    level_no INTEGER NOT NULL,
+    project_id TEXT,
+    request_id TEXT,
+    message TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs (ts);
+CREATE INDEX IF NOT EXISTS idx_logs_project_ts ON logs (project_id, ts);
+CREATE INDEX IF NOT EXISTS idx_logs_request ON logs (request_id);
+CREATE INDEX IF NOT EXISTS idx_logs_level_ts ON logs (level_no, ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+    message, content='logs', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS logs_ai AFTER INSERT ON logs BEGIN
+    INSERT INTO logs_fts (rowid, message) VALUES (new.id, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS logs_ad AFTER DELETE ON logs BEGIN
+    INSERT INTO logs_fts (logs_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END;
+"""
+
+# Taille maximale d'un lot et délai maximal avant écriture
+_BATCH_SIZE = 500
+_FLUSH_INTERVAL_SECONDS = 0.5
+# Intervalle entre deux purges des entrées plus anciennes que la rétention
+_PRUNE_INTERVAL_SECONDS = 3600
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def _fts_query(text: str) -> str:
+    """
+    Convertit un texte libre en requête FTS5 sûre : chaque mot devient une phrase entre
+    guillemets (tous requis) ; un '*' final est conservé pour la recherche par préfixe.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class LogIndexHandler(logging.Handler):
+    """
+    Handler qui indexe les logs dans SQLite sans bloquer l'appelant : file bornée (les
+    enregistrements sont comptés puis abandonnés si elle est pleine) et thread d'écriture
+    démarré au premier log.
+    """
+
+    def __init__(self, db_path: str, entry_builder: Callable[[logging.LogRecord], Dict[str, Any]],
+                 retention_days: int, max_queue: int = 10000):
+        super().__init__()
+        self.db_path = db_path
+        self.entry_builder = entry_builder
+        self.retention_days = retention_days
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="log-indexer", daemon=True)
+                    self._writer.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = self.entry_builder(record)
+            row = (
+                record.created,
+                record.levelname,
+                record.levelno,
+                entry.get("project_id"),
+                entry.get("request_id"),
+                entry.get("message", ""),
+                json.dumps(entry, ensure_ascii=False, default=str)
+            )
+            self._ensure_writer()
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _write_loop(self):
+        try:
+            connection = _connect(self.db_path)
+            connection.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            sys.stderr.write(f"Index des logs indisponible ({self.db_path}) : {e}\n")
+            return
+
+        last_prune = 0.0
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=_FLUSH_INTERVAL_SECONDS)
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                    while len(batch) < _BATCH_SIZE:
+                        item = self._queue.get_nowait()
+                        if item is None:
+                            stopping = True
+                            break
+                        batch.append(item)
+            except queue.Empty:
+                pass
+
+            try:
+                if batch:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO logs (ts, level, level_no, project_id, request_id, message, record) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            batch
+                        )
+                if time.time() - last_prune > _PRUNE_INTERVAL_SECONDS:
+                    last_prune = time.time()
+                    with connection:
+                        connection.execute("DELETE FROM logs WHERE ts < ?", (time.time() - self.retention_days * 86400,))
+            except sqlite3.Error as e:
+                sys.stderr.write(f"Erreur d'écriture dans l'index des logs : {e}\n")
+        connection.close()
+
+    def close(self):
+        """Vide la file puis arrête le thread d'écriture."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+        super().close()
+
+    def wait_until_indexed(self, timeout: float = 5.0):
+        """Attend que les enregistrements en file soient écrits (scripts, benchmarks)."""
+        deadline = time.time() + timeout
+        while not self._queue.empty() and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(_FLUSH_INTERVAL_SECONDS)
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value).timestamp()
+
+
+def search_logs(
+    db_path: str,
+    level: Optional[str] = None,
+    project_id: Optional[str] = None,
+    request_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    text: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Recherche dans l'index, du plus récent au plus ancien. `level` est un niveau minimal
+    (WARNING inclut ERROR et CRITICAL) ; since/until sont des dates ISO 8601 ; `cursor` est
+    la valeur next_cursor d'une page précédente (pagination par clé, stable pendant l'écriture).
+    Retourne {"items": [...], "next_cursor": int | None}.
+    """
+    if not os.path.exists(db_path):
+        return {"items": [], "next_cursor": None}
+
+    conditions, params = [], []
+    if level:
+        level_no = logging.getLevelName(level.upper())
+        if not isinstance(level_no, int):
+            raise ValueError(f"Niveau de log inconnu : {level}")
+        conditions.append("logs.level_no >= ?")
+        params.append(level_no)
+    if project_id:
+        conditions.append("logs.project_id = ?")
+        params.append(project_id)
+    if request_id:
+        conditions.append("logs.request_id = ?")
+        params.append(request_id)
+    since_ts, until_ts = _parse_time(since), _parse_time(until)
+    if since_ts is not None:
+        conditions.append("logs.ts >= ?")
+        params.append(since_ts)
+    if until_ts is not None:
+        conditions.append("logs.ts <= ?")
+        params.append(until_ts)
+    if cursor is not None:
+        conditions.append("logs.id < ?")
+        params.append(cursor)
+
+    query = "SELECT logs.id, logs.record FROM logs"
+    if text and _fts_query(text):
+        query += " JOIN logs_fts ON logs_fts.rowid = logs.id"
+        conditions.append("logs_fts MATCH ?")
+        params.append(_fts_query(text))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY logs.id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    connection = sqlite3.connect(db_path, timeout=5)
+    try:
+        rows = connection.execute(query, params).fetchall()
+    finally:
+        connection.close()
+
+    items: List[Dict[str, Any]] = [{"id": row_id, **json.loads(record)} for row_id, record in rows[:limit]]
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,152 @@
+# app_maker_backend/core/log_rotation.py
+"""
+Rotation du fichier de log du backend : le fichier actif (nom fixe) est archivé à minuit
+ou dès qu'il dépasse une taille maximale. Les archives sont compressées en gzip dans un
+thread (l'écriture des logs n'attend pas la compression) puis purgées selon leur âge et
+leur nombre. Plusieurs workers peuvent partager le même fichier : la rotation se fait sous un
+verrou de fichier et chaque processus rouvre le fichier actif quand un autre l'a archivé.
+"""
+import glob
+import gzip
+import logging
+import logging.handlers
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from core.file_lock import interprocess_lock
+
+# Une seule compression/purge à la fois (rotations rapprochées, balayage au démarrage)
+_archive_lock = threading.Lock()
+# Délai avant compression d'une archive : un autre worker peut encore y terminer une écriture
+# commencée avant de constater la rotation
+ARCHIVE_GRACE_SECONDS = 1.0
+
+
+def _next_midnight(timestamp: float) -> float:
+    day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class RotatingCompressedFileHandler(logging.handlers.BaseRotatingHandler):
+    """
+    Handler de fichier avec rotation quotidienne et par taille. Le fichier actif garde toujours
+    le même chemin (baseFilename) ; les archives sont nommées <nom>_<AAAA-MM-JJ_HHMMSS>.log.gz.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, retention_days: int, max_archives: int):
+        super().__init__(filename, mode="a", encoding="utf-8", delay=False)
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.max_archives = max_archives
+        stem, _ = os.path.splitext(self.baseFilename)
+        self.archive_prefix = stem + "_"
+        self.rotation_lock_path = self.baseFilename + ".lock"
+        self.archive_lock_path = self.baseFilename + ".archive.lock"
+        # Un fichier laissé par une exécution d'un jour précédent est archivé dès le premier log
+        started = os.path.getmtime(self.baseFilename) if os.path.getsize(self.baseFilename) else time.time()
+        self.rollover_at = _next_midnight(started)
+
+    def _replaced_by_other_process(self) -> bool:
+        """Indique si le fichier actif sur disque n'est plus celui ouvert (archivé par un autre worker)."""
+        if self.stream is None:
+            return False
+        try:
+            return not os.path.samestat(os.stat(self.baseFilename), os.fstat(self.stream.fileno()))
+        except FileNotFoundError:
+            return True
+
+    def _reopen(self):
+        if self.stream:
+            self.stream.close()
+        self.stream = self._open()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # Même principe que WatchedFileHandler : on suit le fichier actif après une rotation externe
+        if self._replaced_by_other_process():
+            self._reopen()
+        if time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            message = f"{self.format(record)}{self.terminator}"
+            if self.stream.tell() + len(message.encode("utf-8")) > self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        with interprocess_lock(self.rotation_lock_path):
+            # Un autre worker a pu effectuer la rotation pendant l'attente du verrou
+            if self._replaced_by_other_process():
+                self._reopen()
+            else:
+                if self.stream:
+                    self.stream.close()
+                    self.stream = None
+                if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                    archive_path = f"{self.archive_prefix}{datetime.now():%Y-%m-%d_%H%M%S_%f}.log"
+                    os.replace(self.baseFilename, archive_path)
+                    threading.Thread(target=self._archive_after_grace, name="log-archiver", daemon=True).start()
+                self.stream = self._open()
+        self.rollover_at = _next_midnight(time.time())
+
+    def _archive_after_grace(self):
+        time.sleep(ARCHIVE_GRACE_SECONDS)
+        self.archive_and_prune()
+
+    def _pending_archives(self) -> List[str]:
+        """Archives non encore compressées et sans écriture récente (rotation en cours ou anciens fichiers datés)."""
+        settled_before = time.time() - ARCHIVE_GRACE_SECONDS
+        return [
+            path for path in glob.glob(f"{glob.escape(self.archive_prefix)}*.log")
+            if os.path.abspath(path) != self.baseFilename and os.path.getmtime(path) < settled_before
+        ]
+
+    def archive_and_prune(self):
+        """Compresse les archives en attente puis applique la rétention (âge, nombre)."""
+        with _archive_lock, interprocess_lock(self.archive_lock_path):
+            try:
+                for path in self._pending_archives():
+                    temporary_path = f"{path}.gz.tmp"
+                    with open(path, "rb") as source, gzip.open(temporary_path, "wb", compresslevel=6) as target:
+                        shutil.copyfileobj(source, target, 1024 * 1024)
+                    os.replace(temporary_path, f"{path}.gz")
+                    os.remove(path)
+
+                archives = sorted(glob.glob(f"{glob.escape(self.archive_prefix)}*.log.gz"), key=os.path.getmtime)
+                cutoff = time.time() - self.retention_days * 86400
+                expired = [path for path in archives if os.path.getmtime(path) < cutoff]
+                kept = [path for path in archives if path not in expired]
+                if self.max_archives > 0 and len(kept) > self.max_archives:
+                    expired += kept[:len(kept) - self.max_archives]
+                for path in expired:
+                    os.remove(path)
+            except OSError as e:
+                # Pas de add_log ici : on est dans la chaîne de logging elle-même
+                sys.stderr.write(f"Erreur lors de l'archivage des logs : {e}\n")
+
+    def list_archives(self) -> List[str]:
+        """Archives compressées, de la plus ancienne à la plus récente."""
+        return sorted(glob.glob(f"{glob.escape(self.archive_prefix)}*.log.gz"), key=os.path.getmtime)
+
+
+def read_log_tail(path: str, max_bytes: int) -> str:
+    """
+    Lit au plus les max_bytes derniers octets d'un fichier de log, sans ligne tronquée
+    au début. La lecture reste bornée quelle que soit la taille du fichier.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        start = max(0, size - max_bytes)
+        f.seek(start)
+        data = f.read(size - start)
+    if start > 0:
+        newline = data.find(b"\n")
+        data = data[newline + 1:] if newline != -1 else b""
+    return data.decode("utf-8", errors="replace")
@@ -1,20 +1,79 @@
 # app_maker_backend/core/logging_config.py
 
+import json
 import logging
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from typing import Any, Dict
+
+from core.config import LOG_MAX_BYTES, LOG_RETENTION_DAYS, LOG_MAX_ARCHIVES, LOG_TAIL_BYTES, LOG_INDEX_ENABLED
+from core.log_index import LogIndexHandler, search_logs
+from core.log_rotation import RotatingCompressedFileHandler, read_log_tail
 
 # Assurez-vous que le répertoire des logs existe
-LOGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs')
+# APP_MAKER_LOGS_DIR permet de pointer vers un autre dossier (benchmarks, tests)
+LOGS_DIR = os.getenv("APP_MAKER_LOGS_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs')
 os.makedirs(LOGS_DIR, exist_ok=True)
 
 # Configuration de base du logger
-# Le nom du fichier de log peut inclure la date pour une meilleure organisation
-log_file_name = datetime.now().strftime("app_maker_%Y-%m-%d.log")
-log_file_path = os.path.join(LOGS_DIR, log_file_name)
+# Fichier actif à nom fixe : les rotations l'archivent en app_maker_<date>.log.gz (voir log_rotation)
+log_file_name = "app_maker.log"
+log_file_path = os.path.abspath(os.path.join(LOGS_DIR, log_file_name))
+log_index_path = os.path.join(LOGS_DIR, "log_index.sqlite3")
+
+# Contexte de corrélation (request_id, project_id, provider, span...) porté par chaque log.
+# Hérité par les tâches asyncio et les threads de asyncio.to_thread.
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("app_maker_log_context", default={})
+
+
+def get_log_context() -> Dict[str, Any]:
+    """Retourne le contexte de log courant (ne pas modifier : utiliser log_context)."""
+    return _log_context.get()
+
+
+@contextmanager
+def log_context(**fields):
+    """Ajoute des champs (non None) au contexte de log le temps du bloc `with`."""
+    token = _log_context.set({**_log_context.get(), **{key: value for key, value in fields.items() if value is not None}})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """Un enregistrement JSON par ligne : horodatage, niveau, message, contexte et champs."""
+
+    def to_entry(self, record: logging.LogRecord) -> Dict[str, Any]:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "context", {}))
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return entry
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(self.to_entry(record), ensure_ascii=False, default=str)
+
+
+class ContextTextFormatter(logging.Formatter):
+    """Format texte de la console, suffixé de l'identifiant de requête s'il existe."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "context", {}).get("request_id")
+        return f"{line} [{request_id[:8]}]" if request_id else line
+
 
 # Créer un formateur qui inclut l'heure, le niveau et le message
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+formatter = ContextTextFormatter('%(asctime)s - %(levelname)s - %(message)s')
 
 # Configurer le logger principal
 # Le niveau global peut être INFO, DEBUG, WARNING, ERROR, CRITICAL
@@ -29,12 +88,24 @@ console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
-# Handler pour le fichier
-file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
-file_handler.setFormatter(formatter)
+# Handler pour le fichier : JSON par ligne (corrélation par requête, durées), avec rotation
+file_handler = RotatingCompressedFileHandler(
+    log_file_path,
+    max_bytes=LOG_MAX_BYTES,
+    retention_days=LOG_RETENTION_DAYS,
+    max_archives=LOG_MAX_ARCHIVES
+)
+json_formatter = JsonFormatter()
+file_handler.setFormatter(json_formatter)
 logger.addHandler(file_handler)
 
-def add_log(message: str, level: str = "INFO"):
+# Handler d'indexation : alimente l'index de recherche des logs (écriture asynchrone par lots)
+log_index_handler = None
+if LOG_INDEX_ENABLED:
+    log_index_handler = LogIndexHandler(log_index_path, json_formatter.to_entry, retention_days=LOG_RETENTION_DAYS)
+    logger.addHandler(log_index_handler)
+
+def add_log(message: str, level: str = "INFO", **fields):
     """
     Ajoute un message au système de log.
 
@@ -42,32 +113,58 @@ def add_log(message: str, level: str = "INFO"):
         message (str): Le message à loguer.
         level (str): Le niveau de log (INFO, WARNING, ERROR, DEBUG, CRITICAL).
                      Par défaut, INFO.
+        **fields: Champs structurés ajoutés à l'enregistrement JSON (ex. duration_ms).
+                  Le contexte courant (request_id, project_id...) est ajouté automatiquement.
     """
     level = level.upper()
+    extra = {"context": _log_context.get(), "fields": fields}
 
     if level == "DEBUG":
-        logger.debug(message)
+        logger.debug(message, extra=extra)
     elif level == "INFO":
-        logger.info(message)
+        logger.info(message, extra=extra)
     elif level == "WARNING":
-        logger.warning(message)
+        logger.warning(message, extra=extra)
     elif level == "ERROR":
-        logger.error(message)
+        logger.error(message, extra=extra)
     elif level == "CRITICAL":
-        logger.critical(message)
+        logger.critical(message, extra=extra)
     else:
-        logger.info(f"Niveau de log inconnu '{level}'. Logué comme INFO: {message}")
+        logger.info(f"Niveau de log inconnu '{level}'. Logué comme INFO: {message}", extra=extra)
 
 
 # NOUVELLE FONCTION À AJOUTER POUR RÉSOUDRE L'IMPORTERROR
-def get_all_logs() -> str:
+def get_all_logs(max_bytes: int = LOG_TAIL_BYTES) -> str:
     """
-    Lit et retourne tout le contenu du fichier de log actuel.
+    Retourne la fin (au plus max_bytes octets, lignes entières) du fichier de log actif.
+    Le chemin actif ne change pas lors des rotations : la lecture suit toujours le bon fichier.
     """
     try:
-        with open(log_file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return read_log_tail(file_handler.baseFilename, max_bytes)
     except FileNotFoundError:
         return "Aucun fichier de log trouvé."
     except Exception as e:
-        return f"Erreur lors de la lecture du fichier de log : {e}"
\ No newline at end of file
+        return f"Erreur lors de la lecture du fichier de log : {e}"
+
+
+def start_log_maintenance():
+    """Compresse et purge en arrière-plan les archives laissées par les exécutions précédentes."""
+    threading.Thread(target=file_handler.archive_and_prune, name="log-archiver", daemon=True).start()
+
+
+def get_log_archives() -> list:
+    """Archives compressées du log (chemins), de la plus ancienne à la plus récente."""
+    return file_handler.list_archives()
+
+
+def query_logs(**filters) -> Dict[str, Any]:
+    """Recherche dans l'index des logs (voir log_index.search_logs pour les filtres)."""
+    if log_index_handler is None:
+        raise RuntimeError("L'index des logs est désactivé (LOG_INDEX_ENABLED=0).")
+    return search_logs(log_index_path, **filters)
+
+
+def close_log_index():
+    """Écrit les enregistrements en attente et arrête le thread d'indexation."""
+    if log_index_handler is not None:
+        log_index_handler.close()
@@ -0,0 +1,299 @@
+# app_maker_backend/core/metrics.py
+"""
+Registre de métriques léger, exposé au format texte Prometheus sur /metrics.
+Compteurs, jauges et histogrammes à labels ; une observation coûte un verrou et une
+recherche dichotomique, sans dépendance externe. Les métriques sont propres au processus.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bornes (secondes) adaptées aux requêtes HTTP et aux opérations disque
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bornes (secondes) des opérations longues : appels LLM, pip, lancement d'application
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Jauge ; avec `callback`, la valeur est calculée au moment de l'export (dict labels -> valeur)."""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                items = list(self._callback().items())
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Par labels : [compteurs par seau (non cumulés, dernier = +Inf), somme, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Chronomètre le bloc `with` (aussi en cas d'exception)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+        lines = self.header()
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée : {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, label_names: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, label_names))
+
+
+def gauge(name: str, documentation: str, label_names: Iterable[str] = (), callback=None) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, label_names, callback))
+
+
+def histogram(name: str, documentation: str, label_names: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, label_names, buckets))
+
+
+def render_metrics() -> str:
+    """Exporte toutes les métriques au format texte Prometheus."""
+    return REGISTRY.render()
+
+
+# --- Métriques de l'application ---
+
+HTTP_REQUEST_DURATION = histogram(
+    "app_maker_http_request_duration_seconds", "Durée des requêtes HTTP par route.", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_PROGRESS = gauge(
+    "app_maker_http_requests_in_progress", "Requêtes HTTP en cours de traitement.", ("method",)
+)
+
+LLM_REQUEST_DURATION = histogram(
+    "app_maker_llm_request_duration_seconds", "Durée des appels LLM (hors attente du sémaphore).",
+    ("provider", "model", "outcome"), SLOW_BUCKETS
+)
+LLM_ERRORS = counter("app_maker_llm_errors_total", "Appels LLM en erreur.", ("provider", "model"))
+LLM_TOKENS = counter("app_maker_llm_tokens_total", "Jetons consommés par les appels LLM.", ("provider", "model", "kind"))
+LLM_QUEUE_DEPTH = gauge("app_maker_llm_queue_depth", "Appels LLM en attente du sémaphore du fournisseur.", ("provider",))
+LLM_IN_FLIGHT = gauge("app_maker_llm_in_flight", "Appels LLM en cours par fournisseur.", ("provider",))
+LLM_RESPONSE_REPAIRS = counter(
+    "app_maker_llm_response_repairs_total", "Réponses LLM réparées, tronquées ou complétées par une relance.", ("provider", "kind")
+)
+
+RUNNER_STAGE_DURATION = histogram(
+    "app_maker_runner_stage_duration_seconds",
+    "Durée des étapes de lancement (venv, pyside6_check, pyside6_install, requirements, inferred_packages, spawn, time_to_crash).",
+    ("stage",), SLOW_BUCKETS
+)
+RUNNER_STAGE_ERRORS = counter("app_maker_runner_stage_errors_total", "Échecs par étape de lancement.", ("stage",))
+
+STORE_OPERATION_DURATION = histogram(
+    "app_maker_store_operation_duration_seconds", "Durée des opérations du magasin de projets.", ("operation",)
+)
+
+STARTUP_DURATION = gauge(
+    "app_maker_startup_duration_seconds", "Durée du démarrage à froid par phase (imports, lifespan, total).", ("phase",)
+)
+
+
+def timed_store_operation(operation: str):
+    """Décorateur : mesure la durée d'une opération du magasin de projets."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                STORE_OPERATION_DURATION.observe(time.perf_counter() - start, operation=operation)
+        return wrapper
+    return decorator
+
+
+def _route_template(scope: Scope) -> str:
+    """
+    Gabarit de la route appelée (ex. /api/projects/{project_id}/files) : les valeurs des
+    paramètres de chemin sont remplacées par leur nom, préfixe des routeurs inclus.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        value = str(value)
+        if value:
+            path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : durée des requêtes par gabarit de route (ex. /api/projects/{project_id}/files),
+    pour garder une cardinalité bornée. Le chemin brut n'est jamais utilisé comme label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec(method=method)
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=method,
+                route=_route_template(scope),
+                status=str(status_code)
+            )
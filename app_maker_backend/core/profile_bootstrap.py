@@ -0,0 +1,194 @@
+# app_maker_backend/core/profile_bootstrap.py
+"""
+Lanceur du mode profilage, exécuté par l'interpréteur du .venv du projet (bibliothèque standard
+seulement, aucun module du backend) :
+
+    python -X importtime profile_bootstrap.py <rapport.json> <point_d_entrée> <durée_s> <intervalle_ms>
+
+Le point d'entrée s'exécute comme __main__ pendant qu'un thread échantillonne la pile du thread
+principal. L'appel à exec() de l'application Qt est intercepté pour dater l'entrée dans la boucle
+d'événements et le premier événement traité ; les échantillons pris pendant que la boucle attend
+sont comptés à part. À l'échéance (ou à la fin du programme), les mesures brutes sont écrites en
+JSON et le processus se termine. L'analyse est faite par core/profiler.py.
+"""
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import traceback
+
+_START = time.perf_counter()
+_QT_MODULES = {"PySide6.QtCore", "PySide6.QtGui", "PySide6.QtWidgets"}
+_APPLICATION_CLASSES = ("QCoreApplication", "QGuiApplication", "QApplication")
+# Cadres ignorés dans les piles : ce lanceur, runpy et la mécanique d'import (modules gelés)
+_IGNORED_FILES = {os.path.abspath(__file__), os.path.abspath(runpy.__file__)}
+# Ligne écrite sur stderr au démarrage du point d'entrée : les imports précédents sont ceux du lanceur
+ENTRY_MARKER = "[app-maker-profile] entry"
+# Nombre de fonctions retenues dans le rapport brut
+_MAX_FUNCTIONS = 60
+
+
+def _elapsed_ms(moment):
+    return None if moment is None else round((moment - _START) * 1000, 2)
+
+
+class _Profile:
+    def __init__(self, report_path, interval):
+        self.report_path = report_path
+        self.interval = interval
+        self.main_thread_id = threading.main_thread().ident
+        self.samples = 0
+        self.idle_samples = 0
+        self.self_counts = {}
+        self.total_counts = {}
+        self.exec_called_at = None
+        self.exec_frame = None
+        self.first_event_at = None
+        self._write_lock = threading.Lock()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return
+        self.samples += 1
+        if frame is self.exec_frame:
+            self.idle_samples += 1  # boucle d'événements en attente (aucun code Python en cours)
+            return
+        seen = set()
+        leaf = True
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename not in _IGNORED_FILES and not code.co_filename.startswith("<frozen "):
+                key = (code.co_filename, code.co_firstlineno, code.co_name)
+                if leaf:
+                    self.self_counts[key] = self.self_counts.get(key, 0) + 1
+                    leaf = False
+                if key not in seen:
+                    seen.add(key)
+                    self.total_counts[key] = self.total_counts.get(key, 0) + 1
+            frame = frame.f_back
+
+    def mark_first_event(self):
+        if self.first_event_at is None:
+            self.first_event_at = time.perf_counter()
+
+    def write(self, outcome, exit_code=None):
+        """Écrit le rapport brut (une seule fois). Retourne False s'il a déjà été écrit."""
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        ranked = sorted(self.self_counts, key=self.self_counts.get, reverse=True)[:_MAX_FUNCTIONS // 2]
+        ranked += [key for key in sorted(self.total_counts, key=self.total_counts.get, reverse=True) if key not in ranked]
+        functions = [
+            {"file": key[0], "line": key[1], "function": key[2],
+             "self_samples": self.self_counts.get(key, 0), "total_samples": self.total_counts[key]}
+            for key in ranked[:_MAX_FUNCTIONS]
+        ]
+        data = {
+            "outcome": outcome,
+            "exit_code": exit_code,
+            "elapsed_ms": _elapsed_ms(time.perf_counter()),
+            "exec_called_ms": _elapsed_ms(self.exec_called_at),
+            "first_event_ms": _elapsed_ms(self.first_event_at),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "functions": functions,
+        }
+        temporary_path = self.report_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temporary_path, self.report_path)
+        return True
+
+
+def _wrap_exec(profile, cls, name):
+    original = getattr(cls, name)
+
+    def exec_wrapper(*args, **kwargs):
+        if profile.exec_called_at is None:
+            profile.exec_called_at = time.perf_counter()
+            profile.exec_frame = sys._getframe()
+            try:
+                from PySide6.QtCore import QTimer
+                QTimer.singleShot(0, profile.mark_first_event)
+            except Exception:
+                pass
+        return original(*args, **kwargs)
+
+    # exec() est une méthode statique des classes d'application Qt
+    setattr(cls, name, staticmethod(exec_wrapper))
+
+
+class _QtExecPatcher:
+    """Chercheur d'import : intercepte exec() des classes d'application dès le chargement des modules Qt."""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in _QT_MODULES:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        original_exec_module = loader.exec_module
+
+        def exec_module(module):
+            original_exec_module(module)
+            for class_name in _APPLICATION_CLASSES:
+                cls = module.__dict__.get(class_name)
+                for name in ("exec", "exec_"):
+                    if cls is not None and name in cls.__dict__:
+                        try:
+                            _wrap_exec(self.profile, cls, name)
+                        except Exception:
+                            pass  # mesure de la boucle d'événements indisponible, le reste du profil est conservé
+
+        loader.exec_module = exec_module
+        return spec
+
+
+def main():
+    report_path, entry_file = sys.argv[1], os.path.abspath(sys.argv[2])
+    duration, interval = float(sys.argv[3]), float(sys.argv[4]) / 1000
+    profile = _Profile(report_path, interval)
+    sys.meta_path.insert(0, _QtExecPatcher(profile))
+
+    def sampler():
+        deadline = _START + duration
+        while time.perf_counter() < deadline:
+            profile.sample()
+            time.sleep(interval)
+        if profile.write("deadline"):
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(0)
+
+    threading.Thread(target=sampler, name="profile-sampler", daemon=True).start()
+
+    sys.argv = [entry_file]
+    sys.path[0] = os.path.dirname(entry_file)
+    outcome, exit_code = "exited", 0
+    print(ENTRY_MARKER, file=sys.stderr, flush=True)
+    try:
+        runpy.run_path(entry_file, run_name="__main__")
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        outcome, exit_code = "crashed", 1
+    if profile.write(outcome, exit_code):
+        sys.exit(exit_code)
+    time.sleep(5)  # rapport en cours d'écriture par le thread d'échantillonnage, qui termine le processus
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# app_maker_backend/core/profiler.py
+"""
+Mode profilage des applications générées : le point d'entrée est lancé (avec ou sans affichage)
+sous un profileur par échantillonnage (core/profile_bootstrap.py, exécuté par le .venv du projet)
+pendant une durée limitée. Le rapport réunit la durée des imports (-X importtime), le délai
+jusqu'à la boucle d'événements Qt et au premier événement traité, et les fonctions les plus
+coûteuses. Il est enregistré dans le dossier .profiles/ du projet et peut être joint au prompt
+suivant (format_profile_for_prompt) pour des optimisations ciblées.
+"""
+import os
+import re
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from core.app_runner import _detect_entrypoint, _kill_process_group, _read_chunks, _drain_stderr, _wait_process_exit, STOP_TIMEOUT_SECONDS
+from core.config import PROFILE_DEFAULT_SECONDS, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_REPORTS_KEPT
+from core.env_manager import ensure_project_environment
+from core.json_utils import load_file
+from core.logging_config import add_log
+from core.profile_bootstrap import ENTRY_MARKER
+from core.project_manager import _get_project_path, _atomic_write_json, PROFILES_DIR_NAME, ProjectNotFoundException
+
+_BOOTSTRAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile_bootstrap.py")
+# Délai laissé au lanceur après l'échéance pour écrire son rapport, avant arrêt forcé
+PROFILE_GRACE_SECONDS = 5
+# Nombre d'imports et de fonctions retenus dans le rapport, puis dans le prompt
+REPORT_TOP_IMPORTS = 15
+REPORT_TOP_FUNCTIONS = 25
+PROMPT_TOP_IMPORTS = 8
+PROMPT_TOP_FUNCTIONS = 12
+REPORT_STDERR_TAIL_CHARS = 2000
+
+_IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S.*)$")
+_RUN_ID_RE = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{6}$")
+
+
+def _get_profiles_dir(project_id: str) -> str:
+    return os.path.join(_get_project_path(project_id), PROFILES_DIR_NAME)
+
+
+def _parse_import_times(stderr_output: str):
+    """
+    Sépare la sortie de -X importtime du reste de stderr, à partir du démarrage du point d'entrée
+    (les imports de l'interpréteur et du lanceur sont ignorés). Retourne (imports de premier niveau
+    [{module, self_ms, cumulative_ms}] triés par durée cumulée, durée totale en ms, stderr de l'application).
+    """
+    imports, other_lines = [], []
+    _, marker, application_output = stderr_output.partition(ENTRY_MARKER + "\n")
+    for line in (application_output if marker else stderr_output).splitlines():
+        match = _IMPORT_TIME_RE.match(line)
+        if match is None:
+            if not line.startswith("import time: self [us]"):
+                other_lines.append(line)
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        if len(indent) == 1:  # import de premier niveau (les imports imbriqués sont en retrait)
+            imports.append({"module": module, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    total_ms = round(sum(entry["cumulative_ms"] for entry in imports), 2)
+    imports.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+    return imports, total_ms, "\n".join(other_lines)
+
+
+def _summarize_functions(functions: List[Dict[str, Any]], project_path: str, interval_ms: float) -> List[Dict[str, Any]]:
+    """Fonctions échantillonnées en millisecondes estimées ; chemins du projet rendus relatifs."""
+    venv_prefix = os.path.join(project_path, ".venv") + os.sep
+    summary = []
+    for entry in functions:
+        path = entry["file"]
+        in_project = path.startswith(project_path + os.sep) and not path.startswith(venv_prefix)
+        summary.append({
+            "function": entry["function"],
+            "file": os.path.relpath(path, project_path).replace(os.sep, "/") if in_project else path,
+            "line": entry["line"],
+            "in_project": in_project,
+            "self_ms": round(entry["self_samples"] * interval_ms, 1),
+            "total_ms": round(entry["total_samples"] * interval_ms, 1)
+        })
+    summary.sort(key=lambda entry: (entry["self_ms"], entry["total_ms"]), reverse=True)
+    return summary[:REPORT_TOP_FUNCTIONS]
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return "non atteint" if value is None else f"{value:.0f} ms"
+
+
+def _prune_reports(profiles_dir: str):
+    """Ne conserve que les PROFILE_REPORTS_KEPT rapports les plus récents."""
+    reports = sorted(name for name in os.listdir(profiles_dir) if name.endswith(".json"))
+    for name in reports[:-PROFILE_REPORTS_KEPT] if PROFILE_REPORTS_KEPT > 0 else []:
+        try:
+            os.remove(os.path.join(profiles_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+async def profile_project(project_id: str, seconds: float = PROFILE_DEFAULT_SECONDS, headless: bool = False) -> Dict[str, Any]:
+    """
+    Lance le point d'entrée d'un projet sous le profileur pendant au plus `seconds` secondes
+    (plateforme Qt "offscreen" si `headless`), enregistre le rapport dans .profiles/ et le retourne.
+    Ne touche ni à problem.json ni à l'application lancée par l'utilisateur.
+    """
+    project_path = _get_project_path(project_id)
+    if not os.path.isdir(project_path):
+        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+    entry_file = _detect_entrypoint(project_path)
+    python_executable = await ensure_project_environment(project_path)
+
+    run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    profiles_dir = _get_profiles_dir(project_id)
+    os.makedirs(profiles_dir, exist_ok=True)
+    raw_path = os.path.join(profiles_dir, f"{run_id}.raw")
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    if headless:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+
+    add_log(f"Profilage du projet {project_id} ({seconds}s, {'sans affichage' if headless else 'avec affichage'}).", level="INFO")
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        python_executable, "-X", "importtime", _BOOTSTRAP_PATH, raw_path, entry_file, str(seconds), str(PROFILE_SAMPLE_INTERVAL_MS),
+        cwd=project_path,
+        env=env,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True  # groupe de processus propre : les sous-processus sont tués avec l'application
+    )
+    stderr_chunks: List[bytes] = []
+    stderr_task = asyncio.create_task(_read_chunks(process.stderr, stderr_chunks))
+    killed = False
+    try:
+        await _wait_process_exit(process, seconds + PROFILE_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        killed = True
+        _kill_process_group(process)
+        await _wait_process_exit(process, STOP_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        _kill_process_group(process)
+        stderr_task.cancel()
+        raise
+    _kill_process_group(process)  # sous-processus restés en vie après la fin du profilage
+    wall_seconds = round(time.perf_counter() - start, 3)
+    imports, import_total_ms, app_stderr = _parse_import_times(await _drain_stderr(stderr_task, stderr_chunks))
+
+    try:
+        raw = await asyncio.to_thread(load_file, raw_path)
+        os.remove(raw_path)
+    except (OSError, ValueError):
+        raw = {}  # processus tué avant d'avoir écrit ses mesures
+    interval_ms = raw.get("interval_ms", PROFILE_SAMPLE_INTERVAL_MS)
+    outcome = raw.get("outcome") or ("killed" if killed else "crashed")
+    if outcome == "exited" and process.returncode != 0:
+        outcome = "crashed"
+
+    report = {
+        "run_id": run_id,
+        "project_id": project_id,
+        "created_at": datetime.now().isoformat(),
+        "entrypoint": os.path.relpath(entry_file, project_path).replace(os.sep, "/"),
+        "headless": headless,
+        "time_limit_seconds": seconds,
+        "wall_seconds": wall_seconds,
+        "outcome": outcome,  # deadline (toujours en cours à l'échéance), exited, crashed, killed
+        "returncode": None if outcome == "deadline" else process.returncode,
+        "import_time_ms": import_total_ms,
+        "top_imports": imports[:REPORT_TOP_IMPORTS],
+        "startup_to_event_loop_ms": raw.get("exec_called_ms"),
+        "startup_to_first_event_ms": raw.get("first_event_ms"),
+        "sample_interval_ms": interval_ms,
+        "samples": raw.get("samples", 0),
+        "event_loop_idle_ms": round(raw.get("idle_samples", 0) * interval_ms, 1),
+        "hot_functions": _summarize_functions(raw.get("functions", []), project_path, interval_ms),
+        "stderr_tail": app_stderr[-REPORT_STDERR_TAIL_CHARS:]
+    }
+    await asyncio.to_thread(_atomic_write_json, os.path.join(profiles_dir, f"{run_id}.json"), report)
+    await asyncio.to_thread(_prune_reports, profiles_dir)
+    add_log(
+        f"Profilage du projet {project_id} terminé ({outcome}) : imports {import_total_ms:.0f} ms, "
+        f"boucle d'événements {_format_ms(report['startup_to_event_loop_ms'])}.",
+        level="INFO", run_id=run_id
+    )
+    return report
+
+
+def list_profile_reports(project_id: str) -> List[Dict[str, Any]]:
+    """Résumés des rapports de profilage d'un projet, du plus récent au plus ancien."""
+    if not os.path.isdir(_get_project_path(project_id)):
+        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+    profiles_dir = _get_profiles_dir(project_id)
+    if not os.path.isdir(profiles_dir):
+        return []
+    summaries = []
+    for name in sorted((name for name in os.listdir(profiles_dir) if name.endswith(".json")), reverse=True):
+        try:
+            report = load_file(os.path.join(profiles_dir, name))
+        except (OSError, ValueError):
+            continue
+        summaries.append({key: report.get(key) for key in (
+            "run_id", "created_at", "outcome", "headless", "time_limit_seconds",
+            "import_time_ms", "startup_to_event_loop_ms", "startup_to_first_event_ms"
+        )})
+    return summaries
+
+
+def get_profile_report(project_id: str, run_id: str = "latest") -> Dict[str, Any]:
+    """Rapport de profilage complet (`run_id` = "latest" pour le plus récent). Lève ProjectNotFoundException s'il n'existe pas."""
+    if run_id == "latest":
+        reports = list_profile_reports(project_id)
+        if not reports:
+            raise ProjectNotFoundException(f"Aucun rapport de profilage pour le projet {project_id}.")
+        run_id = reports[0]["run_id"]
+    report_path = os.path.join(_get_profiles_dir(project_id), f"{run_id}.json")
+    if not _RUN_ID_RE.match(run_id) or not os.path.exists(report_path):
+        raise ProjectNotFoundException(f"Rapport de profilage {run_id} introuvable pour le projet {project_id}.")
+    return load_file(report_path)
+
+
+def format_profile_for_prompt(report: Dict[str, Any]) -> str:
+    """Résumé d'un rapport de profilage à joindre au prompt envoyé au LLM."""
+    lines = [
+        f"--- RAPPORT DE PROFILAGE (exécution {report['run_id']}, {report['time_limit_seconds']:g}s"
+        f"{', sans affichage' if report.get('headless') else ''}, issue : {report['outcome']}) ---",
+        f"Durée des imports : {_format_ms(report.get('import_time_ms'))}",
+        f"Démarrage jusqu'à la boucle d'événements (app.exec) : {_format_ms(report.get('startup_to_event_loop_ms'))}",
+        f"Démarrage jusqu'au premier événement traité : {_format_ms(report.get('startup_to_first_event_ms'))}",
+    ]
+    if report.get("top_imports"):
+        lines.append("Imports les plus coûteux : " + ", ".join(
+            f"{entry['module']} ({entry['cumulative_ms']:.0f} ms)" for entry in report["top_imports"][:PROMPT_TOP_IMPORTS]
+        ))
+    functions = [entry for entry in report.get("hot_functions", []) if entry["self_ms"] or entry["total_ms"]]
+    if functions:
+        lines.append("Fonctions les plus coûteuses (échantillonnage ; temps propre / temps cumulé) :")
+        for entry in functions[:PROMPT_TOP_FUNCTIONS]:
+            origin = "code du projet" if entry["in_project"] else "bibliothèque"
+            lines.append(f"- {entry['file']}:{entry['line']} {entry['function']} : {entry['self_ms']:.0f} ms / {entry['total_ms']:.0f} ms ({origin})")
+    lines.append(f"Boucle d'événements inactive : {report.get('event_loop_idle_ms', 0):.0f} ms.")
+    if report.get("stderr_tail"):
+        lines.append(f"Sortie d'erreur (fin) :\n{report['stderr_tail'][-1000:]}")
+    lines.append(
+        "Utilisez ces mesures pour des optimisations ciblées (imports différés, travail long hors du thread "
+        "de l'interface, démarrage allégé) sans changer le comportement de l'application."
+    )
+    return "\n".join(lines)
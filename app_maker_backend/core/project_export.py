@@ -0,0 +1,122 @@
+# app_maker_backend/core/project_export.py
+import io
+import os
+import re
+import zlib
+import tarfile
+import zipfile
+from typing import Iterator
+
+from core.config import EXPORT_CHUNK_SIZE, PROJECT_RUNTIME_EXCLUSIONS
+from core.project_manager import iter_project_files
+
+EXPORT_FORMATS = {
+    "zip": "application/zip",
+    "tar.gz": "application/gzip",
+}
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Flux en écriture seule, non positionnable : zipfile y écrit l'archive en mode streaming
+    (descripteurs de données) et le générateur vide le tampon au fur et à mesure.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        """Retourne et vide les octets accumulés depuis le dernier appel."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_file_name(project_name: str, project_id: str, export_format: str) -> str:
+    """Nom de fichier de l'archive, dérivé du nom du projet (caractères sûrs uniquement)."""
+    base = re.sub(r"[^A-Za-z0-9._-]+", "_", project_name).strip("._") or project_id
+    return f"{base[:80]}.{export_format}"
+
+
+def iter_project_zip(project_id: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Produit une archive zip du projet bloc par bloc : chaque fichier est lu par morceaux
+    de chunk_size octets, la mémoire utilisée ne dépend pas de la taille du projet.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for relative_path, absolute_path in iter_project_files(project_id, PROJECT_RUNTIME_EXCLUSIONS):
+            info = zipfile.ZipInfo.from_file(absolute_path, arcname=relative_path)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(absolute_path, "rb") as source, \
+                    archive.open(info, "w", force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as destination:
+                while chunk := source.read(chunk_size):
+                    destination.write(chunk)
+                    data = buffer.take()
+                    if data:
+                        yield data
+            data = buffer.take()
+            if data:
+                yield data
+    # Répertoire central écrit à la fermeture de l'archive
+    yield buffer.take()
+
+
+def iter_project_tar_gz(project_id: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Produit une archive tar.gz du projet bloc par bloc : en-têtes tar et contenus sont
+    compressés à la volée par un compresseur gzip incrémental.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # en-tête gzip
+    for relative_path, absolute_path in iter_project_files(project_id, PROJECT_RUNTIME_EXCLUSIONS):
+        with open(absolute_path, "rb") as source:
+            stat = os.fstat(source.fileno())
+            info = tarfile.TarInfo(relative_path)
+            info.size = stat.st_size
+            info.mtime = int(stat.st_mtime)
+            info.mode = stat.st_mode & 0o777
+            data = compressor.compress(info.tobuf(format=tarfile.PAX_FORMAT))
+            if data:
+                yield data
+
+            # Exactement info.size octets, même si le fichier change pendant la lecture
+            remaining = info.size
+            while remaining > 0:
+                chunk = source.read(min(chunk_size, remaining))
+                if not chunk:
+                    chunk = b"\0" * remaining
+                remaining -= len(chunk)
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+
+        padding = (tarfile.BLOCKSIZE - info.size % tarfile.BLOCKSIZE) % tarfile.BLOCKSIZE
+        data = compressor.compress(b"\0" * padding)
+        if data:
+            yield data
+
+    # Fin d'archive tar : deux blocs nuls
+    yield compressor.compress(b"\0" * (2 * tarfile.BLOCKSIZE)) + compressor.flush()
+
+
+def iter_project_archive(project_id: str, export_format: str) -> Iterator[bytes]:
+    """Retourne le générateur d'archive correspondant au format demandé ('zip' ou 'tar.gz')."""
+    if export_format == "zip":
+        return iter_project_zip(project_id)
+    if export_format == "tar.gz":
+        return iter_project_tar_gz(project_id)
+    raise ValueError(f"Format d'export '{export_format}' non supporté.")
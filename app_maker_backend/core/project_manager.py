@@ -1,25 +1,261 @@
 import os
+import sys
+import base64
 import shutil
 import json
 import uuid
-from typing import Dict, Any, List, Optional
+import time
+import errno
+import tempfile
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-
-from core.config import BASE_PROJECTS_DIR
+import codecs
+import fnmatch
+import hashlib
+import mimetypes
+
+from core.config import (
+    BASE_PROJECTS_DIR,
+    STATE_DIR,
+    PROJECT_LOCKS_DIR,
+    PROJECT_RUNTIME_EXCLUSIONS,
+    MAX_FILE_CONTENT_BYTES,
+    MAX_PROJECT_CONTENT_BYTES,
+    BINARY_SNIFF_BYTES
+)
 from core.logging_config import add_log
-
-os.makedirs(BASE_PROJECTS_DIR, exist_ok=True)
+from core.file_lock import interprocess_lock
+from core.json_utils import dumps_bytes, load_file
+from core.metrics import timed_store_operation
+from core import code_index
+from core.events import publish_project_event
+from core.state_store import (
+    upsert_project_meta, delete_project_meta, get_all_project_meta, delete_environment_state, delete_venv_usage,
+    record_project_file_count, list_direct_forks, list_project_summaries, PROJECT_SORT_KEYS
+)
+from core.tracing import span
+
+# Dossier (dans chaque projet) contenant les variantes générées en parallèle
+VARIANTS_DIR_NAME = ".variants"
+# Dossier (dans chaque projet) contenant les rapports du mode profilage
+PROFILES_DIR_NAME = ".profiles"
 
 class ProjectNotFoundException(Exception):
     """Exception levée quand un projet n'est pas trouvé."""
     pass
 
+class ProjectFileNotFoundException(ProjectNotFoundException):
+    """Exception levée quand un fichier n'existe pas (ou n'est pas exposé) dans un projet."""
+    pass
+
+def init_project_store():
+    """Crée le dossier des projets s'il n'existe pas (appelé au démarrage du serveur)."""
+    os.makedirs(BASE_PROJECTS_DIR, exist_ok=True)
+
+# --- Verrous par projet et écritures atomiques ---
+
+# Un verrou par projet : les écritures d'un même projet sont sérialisées, celles de projets
+# différents restent parallèles. Le verrou combine un RLock (threads du processus) et un fichier
+# verrouillé (autres workers uvicorn qui partagent generated_projects).
+class _ProjectLock:
+    def __init__(self, project_id: str):
+        self.rlock = threading.RLock()
+        self.depth = 0 # Niveau de réentrance du thread propriétaire
+        self.lock_path = os.path.join(PROJECT_LOCKS_DIR, f"{project_id}.lock")
+        self.file_lock = None
+
+
+_project_locks: Dict[str, _ProjectLock] = {}
+_project_locks_guard = threading.Lock()
+
+
+def _get_project_lock(project_id: str) -> _ProjectLock:
+    """Retourne (en le créant si besoin) le verrou associé à un projet."""
+    with _project_locks_guard:
+        lock = _project_locks.get(project_id)
+        if lock is None:
+            lock = _ProjectLock(project_id)
+            _project_locks[project_id] = lock
+        return lock
+
+
+@contextmanager
+def project_lock(project_id: str):
+    """
+    Context manager sérialisant les lectures-modifications-écritures d'un projet, entre threads
+    et entre workers. Réentrant dans un même thread (le fichier n'est verrouillé qu'au premier niveau).
+    Utilisable depuis un thread (asyncio.to_thread) comme depuis du code synchrone.
+    """
+    lock = _get_project_lock(project_id)
+    with lock.rlock:
+        if lock.depth == 0:
+            lock.file_lock = interprocess_lock(lock.lock_path)
+            lock.file_lock.__enter__()
+        lock.depth += 1
+        try:
+            yield
+        finally:
+            lock.depth -= 1
+            if lock.depth == 0:
+                file_lock, lock.file_lock = lock.file_lock, None
+                file_lock.__exit__(None, None, None)
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """
+    Écrit un fichier de façon atomique : fichier temporaire dans le même dossier,
+    fsync, puis rename. Un lecteur voit toujours l'ancienne ou la nouvelle version, jamais un fichier tronqué.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crée le fichier en 0600 : on conserve le mode de l'ancien fichier, sinon 0644
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # fsync du dossier pour rendre le rename durable (non supporté sous Windows)
+    if sys.platform != "win32":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _atomic_write_text(path: str, content: str):
+    """Écrit un fichier texte UTF-8 de façon atomique."""
+    _atomic_write_bytes(path, content.encode("utf-8"))
+
+
+def _atomic_write_json(path: str, data: Any):
+    """Sérialise des données en JSON compact et les écrit de façon atomique."""
+    _atomic_write_bytes(path, dumps_bytes(data))
+
+
+def _is_temporary_write_file(file_name: str) -> bool:
+    """Indique si un fichier est un temporaire laissé par _atomic_write_bytes."""
+    return file_name.startswith(".") and file_name.endswith(".tmp")
+
+# --- Règles d'exclusion des fichiers d'un projet ---
+
+def is_path_excluded(relative_path: str, patterns: List[str]) -> bool:
+    """
+    Indique si un chemin relatif de projet correspond à l'un des patterns d'exclusion :
+    dossier (finissant par '/'), wildcard (ex: '*.log') ou nom de fichier exact.
+    """
+    relative_path = relative_path.replace(os.sep, "/")
+    for pattern in patterns:
+        if pattern.endswith('/'): # C'est un dossier (ex: ".venv/")
+            # Le chemin commence par le dossier exclu ou le contient (ex: "src/.venv/file.py")
+            if relative_path.startswith(pattern) or f"/{pattern}" in relative_path:
+                return True
+        elif '*' in pattern: # C'est un pattern de wildcard (ex: "*.log")
+            if fnmatch.fnmatch(relative_path, pattern):
+                return True
+        elif relative_path == pattern: # C'est un nom de fichier exact (ex: "history.json")
+            return True
+    return False
+
+
+def iter_project_files(project_id: str, patterns: List[str] = PROJECT_RUNTIME_EXCLUSIONS):
+    """
+    Parcourt les fichiers d'un projet et produit des couples (chemin_relatif, chemin_absolu),
+    triés, en ignorant les exclusions. Les dossiers exclus (.venv...) ne sont pas parcourus.
+    """
+    project_path = _get_project_path(project_id)
+    if not os.path.exists(project_path):
+        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+
+    for root, dirs, files in os.walk(project_path):
+        relative_root = os.path.relpath(root, project_path)
+        relative_root = "" if relative_root == "." else relative_root.replace(os.sep, "/") + "/"
+        dirs[:] = sorted(d for d in dirs if not is_path_excluded(f"{relative_root}{d}/", patterns))
+        for file in sorted(files):
+            if _is_temporary_write_file(file):
+                continue
+            relative_path = f"{relative_root}{file}"
+            if not is_path_excluded(relative_path, patterns):
+                yield relative_path, os.path.join(root, file)
+
+# --- Index de recherche du code ---
+
+def _refresh_code_index(project_id: str):
+    """
+    Réindexe les fichiers modifiés d'un projet et reporte leur nombre dans la base d'état
+    (liste des projets) ; une erreur d'indexation n'interrompt pas l'écriture.
+    """
+    try:
+        files = list(iter_project_files(project_id))
+        code_index.refresh_project(project_id, files)
+        record_project_file_count(project_id, len(files))
+    except Exception as e:
+        add_log(f"Erreur lors de l'indexation du code du projet {project_id}: {e}", level="WARNING")
+
+
+def sync_code_index():
+    """
+    Aligne la base d'état et l'index du code sur le dossier des projets : métadonnées des
+    projets créés, modifiés ou supprimés hors du backend mises à jour, projets réindexés
+    (fichiers changés seulement), projets disparus retirés. Un seul worker à la fois, les autres
+    attendent puis n'ont plus rien à faire.
+    """
+    if not os.path.isdir(BASE_PROJECTS_DIR):
+        return
+    start = time.perf_counter()
+    with interprocess_lock(os.path.join(STATE_DIR, "code_index.lock")):
+        # Métadonnées d'abord : le nombre de fichiers n'est reporté que pour un projet enregistré
+        list_all_projects()
+        project_ids = {entry.name for entry in os.scandir(BASE_PROJECTS_DIR) if entry.is_dir()}
+        for project_id in sorted(project_ids):
+            with project_lock(project_id):
+                if os.path.isdir(_get_project_path(project_id)):
+                    _refresh_code_index(project_id)
+        stale = code_index.indexed_project_ids() - project_ids
+        if stale:
+            code_index.remove_projects(stale)
+    add_log(f"Index du code synchronisé ({len(project_ids)} projet(s)) en {time.perf_counter() - start:.2f}s.", level="INFO")
+
+
+def _schedule_environment_preparation(project_id: str):
+    """Préparation anticipée de l'environnement virtuel pour le code qui vient d'être enregistré."""
+    from core.env_manager import schedule_environment_preparation  # import local : env_manager dépend de ce module
+    schedule_environment_preparation(project_id)
+
+
+def start_code_index_sync():
+    """Lance sync_code_index en arrière-plan (démarrage du serveur)."""
+    def run():
+        try:
+            sync_code_index()
+        except Exception as e:
+            add_log(f"Erreur lors de la synchronisation de l'index du code : {e}", level="ERROR")
+    threading.Thread(target=run, name="code-indexer", daemon=True).start()
+
 # --- Fonctions de gestion des projets ---
 
 def _get_project_path(project_id: str) -> str:
     """Retourne le chemin complet du répertoire d'un projet."""
     return os.path.join(BASE_PROJECTS_DIR, project_id)
 
+@timed_store_operation("create_new_project")
 def create_new_project(initial_prompt: str, files_content: Dict[str, str]) -> str:
     """
     Crée un nouveau répertoire de projet avec un ID unique,
@@ -31,153 +267,684 @@ def create_new_project(initial_prompt: str, files_content: Dict[str, str]) -> st
     os.makedirs(project_path, exist_ok=True) # Crée le répertoire principal du projet
     add_log(f"Création d'un nouveau projet: {project_id} dans {project_path}")
 
-    for file_name, content in files_content.items():
-        file_path = os.path.join(project_path, file_name)
-        
-        # Crée tous les répertoires parents si ils n'existent pas
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
-        add_log(f"Fichier sauvegardé: {file_name} pour le projet {project_id}")
-
-    default_project_name = initial_prompt.splitlines()[0][:50]
-    if len(initial_prompt.splitlines()[0]) > 50:
-        default_project_name += "..."
-
-    project_history = {
-        "project_name": default_project_name,
-        "prompts": [
-            {"type": "user", "content": initial_prompt, "timestamp": datetime.now().isoformat()},
-            {"type": "llm_response", "content": files_content, "timestamp": datetime.now().isoformat()}
-        ]
-    }
-    save_project_history(project_id, project_history)
-    clear_project_problem(project_id)
-
+    with project_lock(project_id), span("store.write_files", files=len(files_content)):
+        for file_name, content in files_content.items():
+            file_path = os.path.join(project_path, file_name)
+            # Écriture atomique (crée aussi les répertoires parents si besoin)
+            _atomic_write_text(file_path, content)
+            add_log(f"Fichier sauvegardé: {file_name} pour le projet {project_id}")
+
+        default_project_name = initial_prompt.splitlines()[0][:50]
+        if len(initial_prompt.splitlines()[0]) > 50:
+            default_project_name += "..."
+
+        project_history = {
+            "project_name": default_project_name,
+            "prompts": [
+                {"type": "user", "content": initial_prompt, "timestamp": datetime.now().isoformat()},
+                {"type": "llm_response", "content": files_content, "timestamp": datetime.now().isoformat()}
+            ]
+        }
+        save_project_history(project_id, project_history)
+        clear_project_problem(project_id)
+        _refresh_code_index(project_id)
+
+    _schedule_environment_preparation(project_id)
     return project_id
 
+@timed_store_operation("update_project_files")
 def update_project_files(project_id: str, new_files_content: Dict[str, str], prompt: str = None, llm_response: Dict[str, str] = None):
     """
     Met à jour les fichiers d'un projet existant.
     Si un prompt et une réponse LLM sont fournis, ils sont ajoutés à l'historique.
+    Les écritures d'un même projet sont sérialisées par project_lock.
     """
     project_path = _get_project_path(project_id)
     if not os.path.exists(project_path):
         raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
     add_log(f"Mise à jour du projet: {project_id}")
 
-    for file_name, content in new_files_content.items():
-        file_path = os.path.join(project_path, file_name)
-        # Crée tous les répertoires parents si ils n'existent pas
-        os.makedirs(os.path.dirname(file_path), exist_ok=True) # Assure que les sous-dossiers existent
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
-        add_log(f"Fichier mis à jour: {file_name} pour le projet {project_id}")
+    with project_lock(project_id), span("store.write_files", files=len(new_files_content)):
+        for file_name, content in new_files_content.items():
+            file_path = os.path.join(project_path, file_name)
+            # Écriture atomique (crée aussi les sous-dossiers si besoin)
+            _atomic_write_text(file_path, content)
+            add_log(f"Fichier mis à jour: {file_name} pour le projet {project_id}")
 
-    if prompt or llm_response:
-        history = get_project_history(project_id)
-        if prompt:
-            history["prompts"].append({"type": "user", "content": prompt, "timestamp": datetime.now().isoformat()})
-        if llm_response:
-            history["prompts"].append({"type": "llm_response", "content": llm_response, "timestamp": datetime.now().isoformat()})
-        save_project_history(project_id, history)
-    
-    clear_project_problem(project_id)
+        # Lecture-modification-écriture de l'historique sous le verrou : aucun tour n'est perdu
+        if prompt or llm_response:
+            history = get_project_history(project_id)
+            if prompt:
+                history["prompts"].append({"type": "user", "content": prompt, "timestamp": datetime.now().isoformat()})
+            if llm_response:
+                history["prompts"].append({"type": "llm_response", "content": llm_response, "timestamp": datetime.now().isoformat()})
+            save_project_history(project_id, history)
 
-def get_project_files_content(project_id: str) -> Dict[str, str]:
+        clear_project_problem(project_id)
+        _refresh_code_index(project_id)
+
+    _schedule_environment_preparation(project_id)
+
+def _is_binary_content(head: bytes) -> bool:
     """
-    Récupère le contenu de tous les fichiers Python (.py) d'un projet.
-    Utile pour fournir le contexte au LLM.
+    Détecte un contenu binaire à partir de ses premiers octets : octet nul ou séquence
+    UTF-8 invalide (une séquence multi-octets coupée en fin de bloc est tolérée).
+    """
+    if b"\0" in head:
+        return True
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return False
+    except UnicodeDecodeError:
+        return True
+
+
+@timed_store_operation("load_project_files")
+def load_project_files(
+    project_id: str,
+    max_file_bytes: int = MAX_FILE_CONTENT_BYTES,
+    max_project_bytes: int = MAX_PROJECT_CONTENT_BYTES
+) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+    """
+    Charge le contenu texte des fichiers d'un projet avec une mémoire bornée.
+    Retourne (fichiers_texte, ressources) : les fichiers binaires, trop gros (> max_file_bytes)
+    ou au-delà du budget du projet (max_project_bytes) ne sont pas lus et apparaissent dans
+    ressources sous forme de descriptif {path, size, content_type, reason}.
     """
-    project_path = _get_project_path(project_id)
-    if not os.path.exists(project_path):
-        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
-
     files_content = {}
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            relative_path = os.path.relpath(os.path.join(root, file), project_path)
-            
-            if ".venv" in relative_path or "history.json" in relative_path or "__pycache__" in relative_path or "app_run.log" in relative_path or "problem.json" in relative_path:
-                continue
+    assets = []
+    loaded_bytes = 0
+    for relative_path, absolute_path in iter_project_files(project_id):
+        content_type = mimetypes.guess_type(relative_path)[0] or "application/octet-stream"
+        try:
+            size = os.path.getsize(absolute_path)
+            reason = None
+            if size > max_file_bytes:
+                reason = "too_large"
+            elif loaded_bytes + size > max_project_bytes:
+                reason = "project_budget"
+            else:
+                with open(absolute_path, "rb") as f:
+                    head = f.read(BINARY_SNIFF_BYTES)
+                    if _is_binary_content(head):
+                        reason = "binary"
+                    else:
+                        # Lecture bornée : le fichier a pu grossir depuis le stat
+                        data = head + f.read(max_file_bytes + 1 - len(head))
+                        if len(data) > max_file_bytes:
+                            reason = "too_large"
+                        else:
+                            files_content[relative_path] = data.decode("utf-8")
+                            loaded_bytes += len(data)
+            if reason:
+                assets.append({"path": relative_path, "size": size, "content_type": content_type, "reason": reason})
+        except UnicodeDecodeError:
+            assets.append({"path": relative_path, "size": size, "content_type": content_type, "reason": "binary"})
+        except Exception as e:
+            add_log(f"Erreur de lecture du fichier {relative_path} pour le projet {project_id}: {e}", level="WARNING")
+    if assets:
+        add_log(f"{len(assets)} fichier(s) du projet {project_id} non chargé(s) (binaires ou trop volumineux).", level="DEBUG")
+    return files_content, assets
 
-            try:
-                with open(os.path.join(root, file), "r", encoding="utf-8") as f:
-                    files_content[relative_path] = f.read()
-            except Exception as e:
-                add_log(f"Erreur de lecture du fichier {relative_path} pour le projet {project_id}: {e}", level="WARNING")
+
+def get_project_files_content(project_id: str) -> Dict[str, str]:
+    """
+    Récupère le contenu des fichiers texte d'un projet, hors artefacts d'exécution
+    (PROJECT_RUNTIME_EXCLUSIONS), dans les limites de taille configurées.
+    Utile pour fournir le contexte au LLM. Voir load_project_files pour les fichiers ignorés.
+    """
+    files_content, _ = load_project_files(project_id)
     add_log(f"Contenu des fichiers du projet {project_id} récupéré.", level="INFO")
     return files_content
 
+# Cache des empreintes (LRU borné) : chemin absolu -> (taille, mtime_ns, inode, sha256).
+# Une écriture atomique change l'inode, donc une entrée obsolète n'est jamais réutilisée.
+_file_hash_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_file_hash_cache_guard = threading.Lock()
+_FILE_HASH_CACHE_MAX_ENTRIES = 20000
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_sha256(absolute_path: str, stat: os.stat_result) -> str:
+    """Retourne le SHA-256 d'un fichier, recalculé seulement si taille/mtime/inode ont changé."""
+    signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    with _file_hash_cache_guard:
+        cached = _file_hash_cache.get(absolute_path)
+        if cached and cached[:3] == signature:
+            _file_hash_cache.move_to_end(absolute_path)
+            return cached[3]
+    digest = hashlib.sha256()
+    with open(absolute_path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    with _file_hash_cache_guard:
+        _file_hash_cache[absolute_path] = (*signature, sha256)
+        _file_hash_cache.move_to_end(absolute_path)
+        while len(_file_hash_cache) > _FILE_HASH_CACHE_MAX_ENTRIES:
+            _file_hash_cache.popitem(last=False)
+    return sha256
+
+
+@timed_store_operation("get_project_manifest")
+def get_project_manifest(project_id: str) -> List[Dict[str, Any]]:
+    """
+    Retourne la liste des fichiers d'un projet (hors artefacts d'exécution) avec
+    chemin, taille, date de modification et empreinte SHA-256 du contenu.
+    """
+    manifest = []
+    for relative_path, absolute_path in iter_project_files(project_id):
+        try:
+            stat = os.stat(absolute_path)
+            manifest.append({
+                "path": relative_path,
+                "size": stat.st_size,
+                "mtime": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "sha256": _file_sha256(absolute_path, stat)
+            })
+        except FileNotFoundError:
+            continue  # supprimé pendant le parcours
+    return manifest
+
+
+def get_project_file_path(project_id: str, relative_path: str) -> str:
+    """
+    Retourne le chemin absolu d'un fichier du projet, en refusant les chemins qui sortent
+    du projet ou qui désignent un artefact d'exécution exclu.
+    """
+    project_path = os.path.realpath(_get_project_path(project_id))
+    if not os.path.isdir(project_path):
+        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+    absolute_path = os.path.realpath(os.path.join(project_path, relative_path))
+    if not absolute_path.startswith(project_path + os.sep) \
+            or is_path_excluded(os.path.relpath(absolute_path, project_path), PROJECT_RUNTIME_EXCLUSIONS) \
+            or not os.path.isfile(absolute_path):
+        raise ProjectFileNotFoundException(f"Fichier {relative_path} non trouvé dans le projet {project_id}.")
+    return absolute_path
+
+
+def get_project_file_sha256(absolute_path: str) -> str:
+    """Retourne l'empreinte SHA-256 (mise en cache) d'un fichier."""
+    return _file_sha256(absolute_path, os.stat(absolute_path))
+
+@timed_store_operation("delete_project")
 def delete_project(project_id: str):
     """Supprime un projet et tous ses fichiers."""
     project_path = _get_project_path(project_id)
-    if os.path.exists(project_path):
-        shutil.rmtree(project_path)
-        add_log(f"Projet {project_id} supprimé.", level="INFO")
-    else:
-        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
-
+    with project_lock(project_id):
+        if os.path.exists(project_path):
+            _materialize_fork_histories(project_id)
+            shutil.rmtree(project_path)
+            add_log(f"Projet {project_id} supprimé.", level="INFO")
+        else:
+            raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+        delete_project_meta([project_id])
+        delete_environment_state([project_id])
+        delete_venv_usage([project_id])
+        code_index.remove_projects([project_id])
+    # Le verrou du projet (entrée et fichier) est conservé : d'autres threads ou workers peuvent
+    # l'attendre, le recréer sur un autre inode romprait l'exclusion mutuelle pour cet ID.
+    project_prefix = project_path + os.sep
+    with _file_hash_cache_guard:
+        for cached_path in [path for path in _file_hash_cache if path.startswith(project_prefix)]:
+            del _file_hash_cache[cached_path]
+
+@timed_store_operation("list_all_projects")
 def list_all_projects() -> List[Dict[str, Any]]:
     """
     Liste tous les projets disponibles avec leur ID et leur nom.
     Gère les cas où l'historique est manquant ou corrompu.
     """
     projects_list = []
-    for project_id in os.listdir(BASE_PROJECTS_DIR):
-        project_path = _get_project_path(project_id)
-        if os.path.isdir(project_path):
-            try:
-                history = get_project_history(project_id)
-                project_name = history.get("project_name", "Projet sans nom")
-                projects_list.append({"project_id": project_id, "name": project_name})
-            except (ProjectNotFoundException, json.JSONDecodeError) as e:
-                # Si l'historique est manquant ou corrompu, on ajoute quand même le projet
-                # avec un nom par défaut et on log un avertissement.
-                add_log(f"Historique du projet {project_id} introuvable ou corrompu ({e}), ajout avec un nom par défaut.", level="WARNING")
-                projects_list.append({"project_id": project_id, "name": f"Projet Corrompu ({project_id[:8]})"})
-            except Exception as e:
-                # Gérer toute autre exception inattendue lors du chargement de l'historique
-                add_log(f"Erreur inattendue lors du chargement de l'historique pour le projet {project_id}: {e}", level="ERROR")
-                projects_list.append({"project_id": project_id, "name": f"Projet Erreur ({project_id[:8]})"})
+    if not os.path.isdir(BASE_PROJECTS_DIR):
+        return projects_list
+
+    # Les noms viennent de la base d'état partagée ; un history.json n'est relu que si le projet
+    # y est inconnu ou si le fichier a changé depuis (date de modification différente).
+    known = get_all_project_meta()
+    seen = set()
+    for entry in os.scandir(BASE_PROJECTS_DIR):
+        if not entry.is_dir():
+            continue
+        project_id = entry.name
+        seen.add(project_id)
+        try:
+            history_mtime_ns = os.stat(_get_history_file_path(project_id)).st_mtime_ns
+        except FileNotFoundError:
+            history_mtime_ns = None
+        meta = known.get(project_id)
+        if meta is not None and meta["history_mtime_ns"] == history_mtime_ns:
+            projects_list.append({"project_id": project_id, "name": meta["name"]})
+            continue
+        try:
+            history = get_project_history(project_id)
+            _record_project_meta(project_id, history, history_mtime_ns)
+            project_name = history.get("project_name", "Projet sans nom")
+            projects_list.append({"project_id": project_id, "name": project_name})
+        except (ProjectNotFoundException, json.JSONDecodeError) as e:
+            # Si l'historique est manquant ou corrompu, on ajoute quand même le projet
+            # avec un nom par défaut et on log un avertissement.
+            add_log(f"Historique du projet {project_id} introuvable ou corrompu ({e}), ajout avec un nom par défaut.", level="WARNING")
+            projects_list.append({"project_id": project_id, "name": f"Projet Corrompu ({project_id[:8]})"})
+        except Exception as e:
+            # Gérer toute autre exception inattendue lors du chargement de l'historique
+            add_log(f"Erreur inattendue lors du chargement de l'historique pour le projet {project_id}: {e}", level="ERROR")
+            projects_list.append({"project_id": project_id, "name": f"Projet Erreur ({project_id[:8]})"})
+
+    # Projets supprimés hors du backend
+    stale = set(known) - seen
+    if stale:
+        delete_project_meta(stale)
     return projects_list
 
+def _encode_project_cursor(sort: str, sort_value: str, project_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort, sort_value, project_id]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_project_cursor(cursor: str, sort: str) -> List[str]:
+    """Position [clé de tri, project_id] d'un curseur ; ValueError s'il est invalide ou d'un autre tri."""
+    try:
+        cursor_sort, sort_value, project_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Curseur de pagination invalide.") from e
+    if cursor_sort != sort or not isinstance(sort_value, str) or not isinstance(project_id, str):
+        raise ValueError("Curseur de pagination invalide pour ce tri.")
+    return [sort_value, project_id]
+
+
+@timed_store_operation("list_project_page")
+def list_project_page(sort: str = "updated", order: str = "desc", name_filter: Optional[str] = None,
+                      limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Page de la liste des projets avec leur résumé, lue dans la base d'état seule (aucun
+    history.json relu, aucun parcours du dossier des projets) : le coût d'une page ne dépend
+    pas du nombre de projets. Tri `sort` ("name", "created", "updated"), ordre "asc" ou "desc",
+    filtre optionnel sur le nom. `cursor` : valeur next_cursor de la page précédente.
+    Retourne {"items": [...], "next_cursor": str | None}. Lève ValueError si un paramètre est invalide.
+    """
+    if sort not in PROJECT_SORT_KEYS:
+        raise ValueError(f"Tri inconnu : {sort} (attendu : {', '.join(PROJECT_SORT_KEYS)}).")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Ordre inconnu : {order} (attendu : asc, desc).")
+    after = _decode_project_cursor(cursor, sort) if cursor else None
+    rows = list_project_summaries(sort, order == "desc", name_filter, limit + 1, after)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_project_cursor(sort, rows[-1]["sort_value"], rows[-1]["project_id"])
+    items = [
+        {
+            "project_id": row["project_id"],
+            "name": row["name"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "last_prompt_at": row["last_prompt_at"],
+            "turn_count": row["prompt_count"],
+            "file_count": row["file_count"],
+            "last_run_state": row["last_run_state"]
+        }
+        for row in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+@timed_store_operation("rename_project")
 def rename_project(project_id: str, new_name: str):
     """Renomme un projet en mettant à jour son nom dans le fichier d'historique."""
     add_log(f"Requête: Renommage du projet {project_id} en '{new_name}'.", level="INFO")
-    history = get_project_history(project_id)
-    history["project_name"] = new_name
-    save_project_history(project_id, history)
+    with project_lock(project_id):
+        history = get_project_history(project_id)
+        history["project_name"] = new_name
+        save_project_history(project_id, history)
     add_log(f"Projet {project_id} renommé avec succès en '{new_name}'.", level="INFO")
 
+# --- Duplication (fork) de projets ---
+
+# ioctl Linux FICLONE : copie copy-on-write (reflink) sur btrfs, XFS, bcachefs...
+_FICLONE = 0x40049409
+# Éléments de la racine d'un projet non dupliqués par fork_project
+_FORK_EXCLUDED = {".venv", VARIANTS_DIR_NAME, PROFILES_DIR_NAME, "__pycache__", "history.json", "problem.json", "app_run.log"}
+
+
+class _CloneStrategy:
+    """
+    Duplique des fichiers par reflink si le système de fichiers le permet, sinon par lien dur
+    (si autorisé) ou copie. Mémorise l'échec du reflink pour ne pas le retenter à chaque fichier.
+    """
+
+    def __init__(self):
+        self.reflink_supported = sys.platform.startswith("linux")
+        self.stats = {"reflink": 0, "hardlink": 0, "copy": 0, "symlink": 0}
+
+    def _try_reflink(self, src: str, dst: str) -> bool:
+        if not self.reflink_supported:
+            return False
+        import fcntl
+        try:
+            with open(src, "rb") as source, open(dst, "wb") as destination:
+                fcntl.ioctl(destination.fileno(), _FICLONE, source.fileno())
+            shutil.copystat(src, dst)
+            return True
+        except OSError as e:
+            if os.path.exists(dst):
+                os.remove(dst)
+            if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                self.reflink_supported = False
+            return False
+
+    def clone_file(self, src: str, dst: str, allow_hardlink: bool):
+        """Duplique un fichier (ou lien symbolique) de src vers dst."""
+        if os.path.islink(src):
+            os.symlink(os.readlink(src), dst)
+            self.stats["symlink"] += 1
+        elif self._try_reflink(src, dst):
+            self.stats["reflink"] += 1
+        elif allow_hardlink:
+            try:
+                os.link(src, dst)
+                self.stats["hardlink"] += 1
+                return
+            except OSError:
+                shutil.copy2(src, dst)
+                self.stats["copy"] += 1
+        else:
+            shutil.copy2(src, dst)
+            self.stats["copy"] += 1
+
+    def clone_tree(self, src_dir: str, dst_dir: str, allow_hardlink: bool, excluded: Optional[set] = None):
+        """Duplique récursivement un dossier (les liens symboliques de dossiers sont conservés tels quels)."""
+        os.makedirs(dst_dir, exist_ok=True)
+        for entry in os.scandir(src_dir):
+            if excluded and entry.name in excluded:
+                continue
+            if _is_temporary_write_file(entry.name):
+                continue
+            destination = os.path.join(dst_dir, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                self.clone_tree(entry.path, destination, allow_hardlink)
+            else:
+                self.clone_file(entry.path, destination, allow_hardlink)
+
+
+def _relocate_venv_scripts(venv_path: str, source_venv_path: str):
+    """
+    Réécrit les scripts du venv dupliqué (shebangs, activate) qui contiennent le chemin absolu
+    du venv source. Ces petits fichiers sont copiés ; le reste du venv reste partagé.
+    """
+    scripts_dir = os.path.join(venv_path, "Scripts" if sys.platform == "win32" else "bin")
+    if not os.path.isdir(scripts_dir):
+        return
+    old_prefix = source_venv_path.encode("utf-8")
+    new_prefix = venv_path.encode("utf-8")
+    for entry in os.scandir(scripts_dir):
+        if entry.is_symlink() or not entry.is_file():
+            continue
+        with open(entry.path, "rb") as f:
+            data = f.read()
+        if old_prefix in data:
+            _atomic_write_bytes(entry.path, data.replace(old_prefix, new_prefix))
+
+
+@timed_store_operation("fork_project")
+def fork_project(source_project_id: str, new_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Crée un nouveau projet à partir d'un projet existant.
+    - Fichiers source : reflink si possible, sinon copie (ils peuvent être modifiés par l'application).
+    - .venv : reflink si possible, sinon liens durs (aucune donnée copiée). Les écritures du backend
+      passent par un rename atomique et pip remplace les fichiers au lieu de les modifier,
+      ce qui rompt le lien au lieu d'altérer le projet source.
+    - Historique : référence vers le projet source (forked_from) au lieu d'une copie.
+    Retourne {project_id, name, forked_from, clone_stats, duration_seconds}.
+    """
+    start = time.perf_counter()
+    source_path = _get_project_path(source_project_id)
+    if not os.path.isdir(source_path):
+        raise ProjectNotFoundException(f"Projet avec l'ID {source_project_id} non trouvé.")
+
+    project_id = str(uuid.uuid4())
+    project_path = _get_project_path(project_id)
+    cloner = _CloneStrategy()
+
+    with project_lock(source_project_id):
+        source_history = get_project_history(source_project_id)
+        cloner.clone_tree(source_path, project_path, allow_hardlink=False, excluded=_FORK_EXCLUDED)
+
+    source_venv = os.path.join(source_path, ".venv")
+    if os.path.isdir(source_venv):
+        fork_venv = os.path.join(project_path, ".venv")
+        cloner.clone_tree(source_venv, fork_venv, allow_hardlink=True)
+        _relocate_venv_scripts(fork_venv, source_venv)
+
+    name = new_name or f"{source_history.get('project_name', 'Projet sans nom')} (fork)"
+    forked_from = {
+        "project_id": source_project_id,
+        "history_length": len(source_history.get("prompts", [])),
+        "forked_at": datetime.now().isoformat()
+    }
+    save_project_history(project_id, {"project_name": name, "forked_from": forked_from, "prompts": []})
+    _refresh_code_index(project_id)
+
+    duration = round(time.perf_counter() - start, 3)
+    add_log(f"Projet {source_project_id} dupliqué en {project_id} en {duration}s ({cloner.stats}).", level="INFO")
+    return {
+        "project_id": project_id,
+        "name": name,
+        "forked_from": forked_from,
+        "clone_stats": cloner.stats,
+        "duration_seconds": duration
+    }
+
+
+def _own_prompts(history: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tours propres d'un historique (sans les tours hérités recopiés à la suppression du projet source)."""
+    return history.get("prompts", [])[history.get("forked_from", {}).get("inherited_prompts", 0):]
+
+
+def resolve_project_history(project_id: str) -> Dict[str, Any]:
+    """
+    Retourne l'historique complet d'un projet : pour un fork, les tours du projet source
+    (jusqu'au moment du fork, récursivement) précèdent ceux du fork.
+    Quand le projet source est supprimé, les tours hérités sont recopiés dans le fork
+    (forked_from.inherited_prompts) : l'historique est alors déjà complet.
+    """
+    history = get_project_history(project_id)
+    forked_from = history.get("forked_from")
+    if not forked_from or "inherited_prompts" in forked_from:
+        return history
+    try:
+        parent_own_prompts = _own_prompts(get_project_history(forked_from["project_id"]))
+        parent_prompts = resolve_project_history(forked_from["project_id"]).get("prompts", [])
+    except (ProjectNotFoundException, json.JSONDecodeError):
+        return history
+    # Tours hérités par le parent lui-même + ses propres tours au moment du fork
+    inherited_count = len(parent_prompts) - len(parent_own_prompts) + forked_from.get("history_length", 0)
+    return {**history, "prompts": parent_prompts[:inherited_count] + history.get("prompts", [])}
+
+
+def _materialize_fork_histories(source_project_id: str):
+    """
+    Avant la suppression d'un projet : recopie dans chacun de ses forks les tours qu'ils en
+    héritent, pour que leur historique reste complet une fois le projet source supprimé.
+    Les forks directs sont lus dans la base d'état (colonne forked_from_id indexée), sans parcourir les projets.
+    """
+    for fork_id in list_direct_forks(source_project_id):
+        with project_lock(fork_id):
+            try:
+                history = get_project_history(fork_id)
+                forked_from = history.get("forked_from") or {}
+                if forked_from.get("project_id") != source_project_id or "inherited_prompts" in forked_from:
+                    continue
+                prompts = resolve_project_history(fork_id)["prompts"]
+            except (ProjectNotFoundException, json.JSONDecodeError):
+                continue
+            inherited = len(prompts) - len(history.get("prompts", []))
+            save_project_history(fork_id, {**history, "forked_from": {**forked_from, "inherited_prompts": inherited}, "prompts": prompts})
+            add_log(f"{inherited} tour(s) hérité(s) du projet {source_project_id} recopié(s) dans le fork {fork_id}.", level="INFO")
+
+
+# --- Fonctions de gestion des variantes ---
+
+def _get_variants_dir(project_id: str) -> str:
+    """Retourne le dossier contenant les variantes d'un projet."""
+    return os.path.join(_get_project_path(project_id), VARIANTS_DIR_NAME)
+
+
+def _get_variants_index_path(project_id: str) -> str:
+    """Retourne le chemin du fichier d'index des variantes d'un projet."""
+    return os.path.join(_get_variants_dir(project_id), "variants.json")
+
+
+def list_project_variants(project_id: str) -> Dict[str, Any]:
+    """
+    Retourne l'index des variantes d'un projet :
+    {"active_variant_id": ..., "variants": [{variant_id, llm_provider, model_name, ...}]}.
+    """
+    if not os.path.exists(_get_project_path(project_id)):
+        raise ProjectNotFoundException(f"Projet avec l'ID {project_id} non trouvé.")
+    index_path = _get_variants_index_path(project_id)
+    if not os.path.exists(index_path):
+        return {"active_variant_id": None, "variants": []}
+    return load_file(index_path)
+
+
+def save_project_variant(project_id: str, variant_id: str, files_content: Dict[str, str], metadata: Dict[str, Any], active: bool = False):
+    """
+    Sauvegarde une variante (fichiers + métadonnées) dans le dossier .variants du projet.
+    Si active est vrai, la variante est marquée comme celle actuellement en place dans le projet.
+    """
+    variant_path = os.path.join(_get_variants_dir(project_id), variant_id)
+    with project_lock(project_id), span("store.write_files", files=len(files_content)):
+        for file_name, content in files_content.items():
+            _atomic_write_text(os.path.join(variant_path, file_name), content)
+
+        index = list_project_variants(project_id)
+        index["variants"] = [v for v in index["variants"] if v.get("variant_id") != variant_id]
+        index["variants"].append({
+            **metadata,
+            "variant_id": variant_id,
+            "files": sorted(files_content.keys()),
+            "created_at": datetime.now().isoformat()
+        })
+        if active:
+            index["active_variant_id"] = variant_id
+        _atomic_write_json(_get_variants_index_path(project_id), index)
+    add_log(f"Variante {variant_id} sauvegardée pour le projet {project_id}.", level="INFO")
+
+
+def get_project_variant_files(project_id: str, variant_id: str) -> Dict[str, str]:
+    """Retourne le contenu des fichiers d'une variante."""
+    variant_path = os.path.join(_get_variants_dir(project_id), variant_id)
+    index = list_project_variants(project_id)
+    if not os.path.isdir(variant_path) or not any(v.get("variant_id") == variant_id for v in index["variants"]):
+        raise ProjectNotFoundException(f"Variante {variant_id} non trouvée pour le projet {project_id}.")
+
+    files_content = {}
+    for root, _, files in os.walk(variant_path):
+        for file in files:
+            if _is_temporary_write_file(file):
+                continue
+            relative_path = os.path.relpath(os.path.join(root, file), variant_path)
+            with open(os.path.join(root, file), "r", encoding="utf-8") as f:
+                files_content[relative_path] = f.read()
+    return files_content
+
+
+def promote_project_variant(project_id: str, variant_id: str) -> Dict[str, Any]:
+    """
+    Remplace le code courant du projet par celui d'une variante.
+    Seuls les fichiers de la variante précédemment active absents de la nouvelle sont supprimés :
+    les autres fichiers du projet (ajoutés hors variante) sont conservés et signalés.
+    L'historique reçoit une entrée de promotion ; l'environnement virtuel et les autres
+    variantes sont conservés.
+    Retourne {"files": fichiers de la variante promue, "removed_files": [...], "extra_files": [...]}.
+    """
+    with project_lock(project_id):
+        variant_files = get_project_variant_files(project_id, variant_id)
+        project_path = _get_project_path(project_id)
+
+        index = list_project_variants(project_id)
+        previous_variant_id = index.get("active_variant_id")
+        previous_files = set()
+        if previous_variant_id and previous_variant_id != variant_id:
+            try:
+                previous_files = set(get_project_variant_files(project_id, previous_variant_id))
+            except ProjectNotFoundException:
+                add_log(f"Variante active précédente {previous_variant_id} introuvable pour le projet {project_id} : aucun fichier retiré.", level="WARNING")
+
+        removed_files, extra_files = [], []
+        for relative_path in get_project_files_content(project_id):
+            if relative_path in variant_files:
+                continue
+            if relative_path in previous_files:
+                os.remove(os.path.join(project_path, relative_path))
+                removed_files.append(relative_path)
+                add_log(f"Fichier {relative_path} retiré du projet {project_id} (variante {previous_variant_id} remplacée par {variant_id}).", level="INFO")
+            else:
+                extra_files.append(relative_path)
+
+        update_project_files(project_id, variant_files)
+
+        history = get_project_history(project_id)
+        history["prompts"].append({
+            "type": "variant_promotion",
+            "variant_id": variant_id,
+            "previous_variant_id": previous_variant_id,
+            "content": variant_files,
+            "removed_files": removed_files,
+            "extra_files": extra_files,
+            "timestamp": datetime.now().isoformat()
+        })
+        save_project_history(project_id, history)
+
+        index["active_variant_id"] = variant_id
+        _atomic_write_json(_get_variants_index_path(project_id), index)
+    if extra_files:
+        add_log(f"Fichiers hors variante conservés dans le projet {project_id} : {', '.join(extra_files)}.", level="INFO")
+    add_log(f"Variante {variant_id} promue pour le projet {project_id}.", level="INFO")
+    return {"files": variant_files, "removed_files": removed_files, "extra_files": extra_files}
+
 # --- Fonctions de gestion de l'historique ---
 
 def _get_history_file_path(project_id: str) -> str:
     """Retourne le chemin complet du fichier d'historique d'un projet."""
     return os.path.join(_get_project_path(project_id), "history.json")
 
+def _record_project_meta(project_id: str, history: Dict[str, Any], history_mtime_ns: Optional[int]):
+    """
+    Reporte dans la base d'état partagée le nom et le résumé de l'historique : dates de création,
+    de modification (celle de history.json) et du dernier prompt, nombre de tours (prompts utilisateur).
+    """
+    prompts = _own_prompts(history)
+    created_at = (prompts[0].get("timestamp") if prompts else None) or history.get("forked_from", {}).get("forked_at")
+    user_prompts = [prompt for prompt in prompts if prompt.get("type") == "user"]
+    last_prompt_at = user_prompts[-1].get("timestamp") if user_prompts else None
+    updated_at = datetime.fromtimestamp(history_mtime_ns / 1e9).isoformat() if history_mtime_ns is not None else None
+    upsert_project_meta(
+        project_id, history.get("project_name", "Projet sans nom"), created_at, len(user_prompts), history_mtime_ns,
+        updated_at=updated_at, last_prompt_at=last_prompt_at, forked_from_id=history.get("forked_from", {}).get("project_id")
+    )
+
+@timed_store_operation("save_project_history")
 def save_project_history(project_id: str, history: Dict[str, Any]):
-    """Sauvegarde l'historique d'un projet dans un fichier JSON."""
+    """Sauvegarde l'historique d'un projet dans un fichier JSON (et ses métadonnées dans la base d'état)."""
     history_path = _get_history_file_path(project_id)
     try:
-        # Assurer que le répertoire existe avant de sauvegarder l'historique
-        os.makedirs(os.path.dirname(history_path), exist_ok=True) 
-        with open(history_path, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=4, ensure_ascii=False)
+        # Écriture atomique : un crash en cours d'écriture ne laisse jamais un history.json tronqué
+        with project_lock(project_id):
+            _atomic_write_json(history_path, history)
+            _record_project_meta(project_id, history, os.stat(history_path).st_mtime_ns)
         add_log(f"Historique du projet {project_id} sauvegardé.", level="INFO")
     except Exception as e:
         add_log(f"Erreur lors de la sauvegarde de l'historique pour {project_id}: {e}", level="ERROR")
 
 
+@timed_store_operation("get_project_history")
 def get_project_history(project_id: str) -> Dict[str, Any]:
     """Charge l'historique d'un projet depuis un fichier JSON."""
     history_path = _get_history_file_path(project_id)
     if not os.path.exists(history_path):
         raise ProjectNotFoundException(f"Historique pour le projet {project_id} non trouvé à {history_path}.")
     try:
-        with open(history_path, "r", encoding="utf-8") as f:
-            history = json.load(f)
+        history = load_file(history_path)
         add_log(f"Historique du projet {project_id} chargé.", level="INFO")
         return history
     except json.JSONDecodeError as e:
@@ -193,65 +960,46 @@ def _get_problem_file_path(project_id: str) -> str:
     """Retourne le chemin complet du fichier problem.json d'un projet."""
     return os.path.join(_get_project_path(project_id), "problem.json")
 
-
-
-
-
+@timed_store_operation("save_project_problem")
 def save_project_problem(project_id: str, problem_data: Dict[str, Any]):
-    """Sauvegarde les données d'un problème pour un projet dans problem.json."""
+    """Sauvegarde les données d'un problème pour un projet dans problem.json et publie l'événement "problem"."""
     problem_path = _get_problem_file_path(project_id)
     try:
-        # Assurer que le répertoire existe avant de sauvegarder le problème
-        os.makedirs(os.path.dirname(problem_path), exist_ok=True)
-        with open(problem_path, "w", encoding="utf-8") as f:
-            json.dump(problem_data, f, indent=4, ensure_ascii=False)
+        with project_lock(project_id):
+            _atomic_write_json(problem_path, problem_data)
+            publish_project_event(project_id, "problem", problem_data)
         add_log(f"Problème enregistré pour le projet {project_id}.", level="INFO")
     except Exception as e:
         add_log(f"Erreur lors de la sauvegarde du problème pour {project_id}: {e}", level="ERROR")
 
 
-
-
-
-
-
-
+@timed_store_operation("get_project_problem")
 def get_project_problem(project_id: str) -> Optional[Dict[str, Any]]:
-    """Charge les données d'un problème pour un projet depuis problem.json."""
+    """Charge les données d'un problème pour un projet depuis problem.json (None s'il n'y en a pas)."""
     problem_path = _get_problem_file_path(project_id)
-    add_log(f"DEBUG: Tente de charger problem.json pour projet {project_id}. Chemin attendu: {problem_path}", level="DEBUG")
-
-    if not os.path.exists(problem_path):
-        add_log(f"DEBUG: problem.json NON trouvé à {problem_path}. Retourne None.", level="DEBUG")
-        return None # Pas de problème enregistré
-    
-    add_log(f"DEBUG: problem.json trouvé à {problem_path}. Tente de lire.", level="DEBUG")
     try:
-        with open(problem_path, "r", encoding="utf-8") as f:
-            problem = json.load(f)
-        add_log(f"DEBUG: Problème chargé pour le projet {project_id}. Contenu: {problem}", level="INFO") # Log le contenu pour être sûr
-        return problem
+        return load_file(problem_path)
+    except FileNotFoundError:
+        return None # Pas de problème enregistré
     except json.JSONDecodeError as e:
-        add_log(f"DEBUG: Erreur de décodage JSON pour problem.json du projet {project_id}: {e}. Le fichier sera considéré comme vide.", level="ERROR")
+        add_log(f"Erreur de décodage JSON pour problem.json du projet {project_id}: {e}. Le fichier sera considéré comme vide.", level="ERROR")
         clear_project_problem(project_id) # Effacer le fichier corrompu
         return None
     except Exception as e:
-        add_log(f"DEBUG: Erreur inattendue lors du chargement de problem.json pour {project_id}: {e}", level="ERROR")
+        add_log(f"Erreur inattendue lors du chargement de problem.json pour {project_id}: {e}", level="ERROR")
         return None
 
 
-
-
-
-
-
-
 def clear_project_problem(project_id: str):
-    """Supprime le fichier problem.json pour un projet."""
+    """Supprime le fichier problem.json pour un projet (et publie l'événement "problem" s'il existait)."""
     problem_path = _get_problem_file_path(project_id)
     if os.path.exists(problem_path):
         try:
-            os.remove(problem_path)
+            with project_lock(project_id):
+                os.remove(problem_path)
+                publish_project_event(project_id, "problem", None)
             add_log(f"Fichier problem.json effacé pour le projet {project_id}.", level="INFO")
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            add_log(f"Erreur lors de l'effacement de problem.json pour {project_id}: {e}", level="ERROR")
\ No newline at end of file
+            add_log(f"Erreur lors de l'effacement de problem.json pour {project_id}: {e}", level="ERROR")
@@ -0,0 +1,140 @@
+# app_maker_backend/core/smoke_runner.py
+import os
+import json
+import time
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from core.app_runner import smoke_run_project
+from core.env_manager import ensure_project_environment, _get_venv_executables
+from core.config import BASE_PROJECTS_DIR, SMOKE_TEST_TIMEOUT_SECONDS, SMOKE_TEST_WORKERS
+from core.logging_config import add_log
+from core.project_manager import _get_project_path
+
+# Nombre de caractères de stderr conservés par projet dans le rapport
+REPORT_STDERR_TAIL_CHARS = 1000
+
+
+def list_project_ids() -> List[str]:
+    """Retourne les IDs de tous les projets stockés, triés."""
+    if not os.path.isdir(BASE_PROJECTS_DIR):
+        return []
+    return sorted(
+        entry for entry in os.listdir(BASE_PROJECTS_DIR)
+        if os.path.isdir(os.path.join(BASE_PROJECTS_DIR, entry))
+    )
+
+
+async def _smoke_test_one(
+    project_id: str,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    prepare_environments: bool,
+    python_executable: Optional[str]
+) -> Dict[str, Any]:
+    """Teste un projet sous le sémaphore du pool ; ne lève jamais d'exception."""
+    async with semaphore:
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"project_id": project_id, "passed": False, "reason": None, "returncode": None, "stderr": ""}
+        project_path = _get_project_path(project_id)
+        try:
+            if not os.path.isdir(project_path):
+                result["reason"] = "not_found"
+            else:
+                interpreter = python_executable
+                if interpreter is None:
+                    venv_python, _ = _get_venv_executables(os.path.join(project_path, ".venv"))
+                    if os.path.exists(venv_python):
+                        interpreter = venv_python
+                    elif prepare_environments:
+                        interpreter = await ensure_project_environment(project_path)
+                if interpreter is None:
+                    result["reason"] = "no_environment"
+                else:
+                    smoke = await smoke_run_project(project_path, interpreter, timeout=timeout)
+                    result.update(smoke)
+                    result["stderr"] = smoke["stderr"][-REPORT_STDERR_TAIL_CHARS:]
+        except HTTPException as e:
+            result["reason"] = "environment_error"
+            result["stderr"] = str(e.detail)[-REPORT_STDERR_TAIL_CHARS:]
+        except Exception as e:
+            result["reason"] = "runner_error"
+            result["stderr"] = str(e)
+        result["duration_seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+
+async def smoke_test_projects(
+    project_ids: Optional[List[str]] = None,
+    timeout: float = SMOKE_TEST_TIMEOUT_SECONDS,
+    workers: Optional[int] = None,
+    prepare_environments: bool = False,
+    python_executable: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Lance sans affichage (Qt offscreen) les applications des projets donnés (tous si None),
+    au plus `workers` à la fois (par défaut SMOKE_TEST_WORKERS, soit le nombre de cœurs).
+    Un projet réussit s'il est toujours vivant après `timeout` secondes sans trace d'exception.
+    Sans `python_executable`, le .venv de chaque projet est utilisé ; s'il manque, le projet
+    échoue (no_environment) sauf si `prepare_environments` est vrai.
+    Retourne un rapport {summary, results}.
+    """
+    if project_ids is None:
+        project_ids = list_project_ids()
+    workers = max(1, workers or SMOKE_TEST_WORKERS)
+    semaphore = asyncio.Semaphore(workers)
+    add_log(f"Smoke test batch: {len(project_ids)} projets, {workers} workers, délai {timeout}s.")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        _smoke_test_one(project_id, semaphore, timeout, prepare_environments, python_executable)
+        for project_id in project_ids
+    ))
+    passed = sum(1 for result in results if result["passed"])
+    summary = {
+        "total": len(results),
+        "passed": passed,
+        "failed": len(results) - passed,
+        "workers": workers,
+        "timeout_seconds": timeout,
+        "duration_seconds": round(time.perf_counter() - start, 3),
+        "finished_at": datetime.now().isoformat()
+    }
+    add_log(f"Smoke test batch terminé: {passed}/{len(results)} réussis en {summary['duration_seconds']}s.")
+    return {"summary": summary, "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée CLI (voir smoke_test.py). Retourne 0 si tous les projets passent."""
+    import argparse  # import local : argparse (et gettext) ralentit le démarrage du serveur
+
+    parser = argparse.ArgumentParser(description="Smoke test headless des projets PySide6 générés.")
+    parser.add_argument("project_ids", nargs="*", help="IDs des projets à tester (tous si omis).")
+    parser.add_argument("--timeout", type=float, default=SMOKE_TEST_TIMEOUT_SECONDS, help="Durée de survie exigée (secondes).")
+    parser.add_argument("--workers", type=int, default=SMOKE_TEST_WORKERS, help="Nombre d'applications lancées simultanément.")
+    parser.add_argument("--python", dest="python_executable", help="Interpréteur (avec PySide6) partagé par tous les projets.")
+    parser.add_argument("--prepare-env", action="store_true", help="Crée les .venv manquants avant le test.")
+    parser.add_argument("--output", help="Fichier JSON où écrire le rapport complet.")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(smoke_test_projects(
+        project_ids=args.project_ids or None,
+        timeout=args.timeout,
+        workers=args.workers,
+        prepare_environments=args.prepare_env,
+        python_executable=args.python_executable
+    ))
+
+    for result in report["results"]:
+        status = "PASS" if result["passed"] else "FAIL"
+        print(f"{status}  {result['project_id']}  {result['duration_seconds']:.2f}s  {result['reason']}")
+    summary = report["summary"]
+    print(f"\n{summary['passed']}/{summary['total']} réussis en {summary['duration_seconds']:.2f}s ({summary['workers']} workers)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0 if summary["failed"] == 0 else 1
@@ -0,0 +1,380 @@
+# app_maker_backend/core/state_store.py
+"""
+État partagé entre les workers du backend, dans une base SQLite locale (WAL, verrouillage de
+fichier géré par SQLite) : métadonnées des projets (nom, dates, taille de l'historique) et
+applications PySide6 lancées (projet, PID, worker propriétaire). Les métadonnées
+portent aussi les champs de résumé de la liste paginée (dernier prompt, nombre de tours et
+de fichiers, état de la dernière exécution). N'importe quel worker peut
+ainsi lister les projets ou arrêter une application lancée par un autre. L'état des
+environnements virtuels (préparation en cours, prêt, échec, date de dernière utilisation,
+taille sur disque) y est aussi partagé. Le journal
+d'événements (problèmes, état d'exécution) donne à chaque projet un numéro de version commun
+à tous les workers.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.config import STATE_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    prompt_count INTEGER NOT NULL DEFAULT 0,
+    history_mtime_ns INTEGER,
+    last_prompt_at TEXT,
+    file_count INTEGER,
+    last_run_state TEXT,
+    forked_from_id TEXT
+);
+CREATE TABLE IF NOT EXISTS running_apps (
+    project_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    worker_pid INTEGER NOT NULL,
+    command TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    stopping INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS environments (
+    project_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    fingerprint TEXT,
+    packages TEXT,
+    missing_packages TEXT,
+    error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS venv_usage (
+    project_id TEXT PRIMARY KEY,
+    last_used_at TEXT,
+    size_bytes INTEGER,
+    signature TEXT,
+    measured_at TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT,
+    origin_pid INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_project ON events (project_id, seq);
+"""
+
+# Colonnes ajoutées après coup à une table existante (CREATE TABLE IF NOT EXISTS ne les crée pas)
+_ADDED_COLUMNS = {
+    "projects": [("last_prompt_at", "TEXT"), ("file_count", "INTEGER"), ("last_run_state", "TEXT"), ("forked_from_id", "TEXT")],
+    "environments": [("missing_packages", "TEXT")],
+}
+# Après l'ajout de colonnes : histoires à relire une fois (list_all_projects) pour remplir les nouveaux champs
+_AFTER_ADDED_COLUMNS = {
+    "projects": "UPDATE projects SET history_mtime_ns = NULL",
+}
+
+# Index de la liste paginée des projets (une page = un parcours d'index, quel que soit le nombre de projets)
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_projects_name ON projects (name COLLATE NOCASE, project_id);
+CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (COALESCE(created_at, ''), project_id);
+CREATE INDEX IF NOT EXISTS idx_projects_updated ON projects (COALESCE(updated_at, ''), project_id);
+CREATE INDEX IF NOT EXISTS idx_projects_forked_from ON projects (forked_from_id);
+"""
+
+# Clés de tri de list_project_summaries (expressions identiques à celles des index)
+PROJECT_SORT_KEYS = {
+    "name": "name COLLATE NOCASE",
+    "created": "COALESCE(created_at, '')",
+    "updated": "COALESCE(updated_at, '')",
+}
+
+# Nombre d'événements conservés dans le journal (les plus anciens sont purgés)
+EVENT_LOG_RETENTION = 10000
+
+# Une connexion par thread (les appels viennent de la boucle et des threads de asyncio.to_thread)
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def init_state_store():
+    """Crée la base et son schéma si besoin (appelé au démarrage, sinon au premier accès)."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        os.makedirs(os.path.dirname(STATE_DB_PATH), exist_ok=True)
+        connection = sqlite3.connect(STATE_DB_PATH, timeout=10)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            for table, columns in _ADDED_COLUMNS.items():
+                existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+                missing = [(column, column_type) for column, column_type in columns if column not in existing]
+                for column, column_type in missing:
+                    try:
+                        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    except sqlite3.OperationalError as e:
+                        if "duplicate column" not in str(e):  # ajoutée entre-temps par un autre worker
+                            raise
+                if missing and table in _AFTER_ADDED_COLUMNS:
+                    with connection:
+                        connection.execute(_AFTER_ADDED_COLUMNS[table])
+            connection.executescript(_INDEXES)
+        finally:
+            connection.close()
+        _schema_ready = True
+
+
+def _connection() -> sqlite3.Connection:
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        init_state_store()
+        connection = sqlite3.connect(STATE_DB_PATH, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA synchronous=NORMAL")
+        _local.connection = connection
+    return connection
+
+
+# --- Métadonnées des projets ---
+
+def upsert_project_meta(project_id: str, name: str, created_at: Optional[str], prompt_count: int, history_mtime_ns: Optional[int],
+                        updated_at: Optional[str] = None, last_prompt_at: Optional[str] = None, forked_from_id: Optional[str] = None):
+    """
+    Enregistre (ou met à jour) les métadonnées d'un projet ; created_at n'est fixé qu'à la création.
+    forked_from_id est l'ID du projet source pour un fork (voir list_direct_forks).
+    Le nombre de fichiers et l'état de la dernière exécution sont tenus à part (record_project_file_count, append_event).
+    """
+    with _connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO projects (project_id, name, created_at, updated_at, prompt_count, history_mtime_ns, last_prompt_at, forked_from_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (project_id) DO UPDATE SET
+                name = excluded.name,
+                created_at = COALESCE(projects.created_at, excluded.created_at),
+                updated_at = excluded.updated_at,
+                prompt_count = excluded.prompt_count,
+                history_mtime_ns = excluded.history_mtime_ns,
+                last_prompt_at = excluded.last_prompt_at,
+                forked_from_id = excluded.forked_from_id
+            """,
+            (project_id, name, created_at, updated_at or datetime.now().isoformat(), prompt_count, history_mtime_ns, last_prompt_at,
+             forked_from_id)
+        )
+
+
+def record_project_file_count(project_id: str, file_count: int):
+    """Met à jour le nombre de fichiers d'un projet déjà enregistré."""
+    with _connection() as connection:
+        connection.execute("UPDATE projects SET file_count = ? WHERE project_id = ?", (file_count, project_id))
+
+
+def delete_project_meta(project_ids: Iterable[str]):
+    """Supprime les métadonnées des projets donnés."""
+    with _connection() as connection:
+        connection.executemany("DELETE FROM projects WHERE project_id = ?", [(project_id,) for project_id in project_ids])
+
+
+def list_direct_forks(project_id: str) -> List[str]:
+    """Retourne les IDs des projets forkés directement depuis project_id (index sur forked_from_id)."""
+    rows = _connection().execute("SELECT project_id FROM projects WHERE forked_from_id = ?", (project_id,)).fetchall()
+    return [row["project_id"] for row in rows]
+
+
+def get_all_project_meta() -> Dict[str, Dict[str, Any]]:
+    """Retourne {project_id: métadonnées} pour tous les projets enregistrés."""
+    rows = _connection().execute("SELECT * FROM projects").fetchall()
+    return {row["project_id"]: dict(row) for row in rows}
+
+
+def list_project_summaries(sort: str = "updated", descending: bool = True, name_filter: Optional[str] = None,
+                           limit: int = 50, after: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Page de la liste des projets, triée par `sort` (clé de PROJECT_SORT_KEYS) puis par project_id.
+    Pagination par curseur : `after` = [clé de tri, project_id] du dernier projet de la page
+    précédente ; la requête reprend l'index à cette position au lieu de sauter des lignes.
+    `name_filter` : sous-chaîne du nom (insensible à la casse).
+    """
+    key = PROJECT_SORT_KEYS[sort]
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+    conditions, params = [], []
+    if name_filter:
+        escaped = name_filter.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append("name LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    if after is not None:
+        # Forme "clé <= ? AND (...)" plutôt qu'une comparaison de lignes : SQLite positionne l'index directement
+        conditions.append(f"{key} {comparison}= ? AND ({key} {comparison} ? OR project_id {comparison} ?)")
+        params.extend([after[0], after[0], after[1]])
+    sql = f"SELECT *, {key} AS sort_value FROM projects"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {key} {direction}, project_id {direction} LIMIT ?"
+    params.append(limit)
+    return [dict(row) for row in _connection().execute(sql, params).fetchall()]
+
+
+# --- Applications lancées ---
+
+def register_running_app(project_id: str, pid: int, command: str):
+    """Enregistre l'application lancée par le worker courant (remplace une entrée précédente du projet)."""
+    with _connection() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO running_apps (project_id, pid, worker_pid, command, started_at, stopping) VALUES (?, ?, ?, ?, ?, 0)",
+            (project_id, pid, os.getpid(), command, datetime.now().isoformat())
+        )
+
+
+def list_running_apps() -> List[Dict[str, Any]]:
+    """Applications enregistrées, tous workers confondus."""
+    rows = _connection().execute("SELECT * FROM running_apps ORDER BY started_at").fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_running_app(project_id: str) -> Optional[Dict[str, Any]]:
+    row = _connection().execute("SELECT * FROM running_apps WHERE project_id = ?", (project_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def mark_running_app_stopping(project_id: str, pid: int):
+    """Signale que l'arrêt est demandé : la sortie du processus ne sera pas comptée comme un plantage."""
+    with _connection() as connection:
+        connection.execute("UPDATE running_apps SET stopping = 1 WHERE project_id = ? AND pid = ?", (project_id, pid))
+
+
+def remove_running_app(project_id: str, pid: int):
+    """Retire l'entrée d'une application (seulement si elle correspond toujours à ce PID)."""
+    with _connection() as connection:
+        connection.execute("DELETE FROM running_apps WHERE project_id = ? AND pid = ?", (project_id, pid))
+
+
+# --- Environnements virtuels des projets ---
+
+def set_environment_state(project_id: str, state: str, fingerprint: Optional[str] = None,
+                          packages: Optional[List[str]] = None, error: Optional[str] = None,
+                          missing_packages: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Enregistre l'état de l'environnement d'un projet (preparing, ready, failed, pending) et le retourne.
+    missing_packages : modules importés hors liste blanche, non installés automatiquement.
+    """
+    entry = {
+        "project_id": project_id,
+        "state": state,
+        "fingerprint": fingerprint,
+        "packages": packages or [],
+        "missing_packages": missing_packages or [],
+        "error": error,
+        "updated_at": datetime.now().isoformat()
+    }
+    with _connection() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO environments (project_id, state, fingerprint, packages, missing_packages, error, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (project_id, state, fingerprint, json.dumps(entry["packages"]), json.dumps(entry["missing_packages"]), error, entry["updated_at"])
+        )
+    return entry
+
+
+def get_environment_state(project_id: str) -> Optional[Dict[str, Any]]:
+    row = _connection().execute("SELECT * FROM environments WHERE project_id = ?", (project_id,)).fetchone()
+    if row is None:
+        return None
+    return {**dict(row), "packages": json.loads(row["packages"] or "[]"), "missing_packages": json.loads(row["missing_packages"] or "[]")}
+
+
+def delete_environment_state(project_ids: Iterable[str]):
+    with _connection() as connection:
+        connection.executemany("DELETE FROM environments WHERE project_id = ?", [(project_id,) for project_id in project_ids])
+
+
+def touch_venv_usage(project_id: str):
+    """Enregistre l'utilisation (lancement, préparation) de l'environnement d'un projet."""
+    with _connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO venv_usage (project_id, last_used_at) VALUES (?, ?)
+            ON CONFLICT (project_id) DO UPDATE SET last_used_at = excluded.last_used_at
+            """,
+            (project_id, datetime.now().isoformat())
+        )
+
+
+def record_venv_size(project_id: str, size_bytes: Optional[int], signature: Optional[str]):
+    """Mémorise la taille mesurée du .venv d'un projet et la signature du dossier au moment de la mesure."""
+    with _connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO venv_usage (project_id, size_bytes, signature, measured_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (project_id) DO UPDATE SET
+                size_bytes = excluded.size_bytes, signature = excluded.signature, measured_at = excluded.measured_at
+            """,
+            (project_id, size_bytes, signature, datetime.now().isoformat())
+        )
+
+
+def get_all_venv_usage() -> Dict[str, Dict[str, Any]]:
+    """Retourne {project_id: {last_used_at, size_bytes, signature, measured_at}}."""
+    rows = _connection().execute("SELECT * FROM venv_usage").fetchall()
+    return {row["project_id"]: dict(row) for row in rows}
+
+
+def delete_venv_usage(project_ids: Iterable[str]):
+    with _connection() as connection:
+        connection.executemany("DELETE FROM venv_usage WHERE project_id = ?", [(project_id,) for project_id in project_ids])
+
+
+# --- Journal d'événements ---
+
+def _event_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "seq": row["seq"],
+        "project_id": row["project_id"],
+        "kind": row["kind"],
+        "data": json.loads(row["data"]) if row["data"] is not None else None,
+        "origin_pid": row["origin_pid"],
+        "created_at": row["created_at"]
+    }
+
+
+def append_event(project_id: str, kind: str, data: Any) -> Dict[str, Any]:
+    """Ajoute un événement au journal ; son numéro (seq) devient la version du projet."""
+    created_at = datetime.now().isoformat()
+    with _connection() as connection:
+        cursor = connection.execute(
+            "INSERT INTO events (project_id, kind, data, origin_pid, created_at) VALUES (?, ?, ?, ?, ?)",
+            (project_id, kind, json.dumps(data, ensure_ascii=False, default=str), os.getpid(), created_at)
+        )
+        seq = cursor.lastrowid
+        if kind == "run" and data:
+            # État de la dernière exécution, affiché dans la liste des projets
+            connection.execute("UPDATE projects SET last_run_state = ? WHERE project_id = ?", (data.get("state"), project_id))
+        if seq % 1000 == 0:
+            connection.execute("DELETE FROM events WHERE seq <= ?", (seq - EVENT_LOG_RETENTION,))
+    return {"seq": seq, "project_id": project_id, "kind": kind, "data": data, "origin_pid": os.getpid(), "created_at": created_at}
+
+
+def events_since(seq: int, project_id: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+    """Événements postérieurs à seq (tous projets si project_id est None), du plus ancien au plus récent."""
+    if project_id is None:
+        rows = _connection().execute("SELECT * FROM events WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)).fetchall()
+    else:
+        rows = _connection().execute(
+            "SELECT * FROM events WHERE project_id = ? AND seq > ? ORDER BY seq LIMIT ?", (project_id, seq, limit)
+        ).fetchall()
+    return [_event_from_row(row) for row in rows]
+
+
+def latest_event_seq(project_id: Optional[str] = None) -> int:
+    """Version courante d'un projet (dernier seq de ses événements), ou du journal entier ; 0 si aucun."""
+    if project_id is None:
+        row = _connection().execute("SELECT MAX(seq) FROM events").fetchone()
+    else:
+        row = _connection().execute("SELECT MAX(seq) FROM events WHERE project_id = ?", (project_id,)).fetchone()
+    return row[0] or 0
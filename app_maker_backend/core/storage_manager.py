@@ -0,0 +1,196 @@
+# app_maker_backend/core/storage_manager.py
+"""
+Espace disque des projets : mesure des .venv (mise en cache tant que le dossier et son
+site-packages n'ont pas changé) et des fichiers des projets, et quota sur le total des .venv.
+Au-delà du quota, les environnements des projets utilisés le moins récemment sont supprimés
+(jamais celui d'une application lancée ni un environnement en cours de préparation) ; ils sont
+recréés au lancement suivant. La vérification tourne en arrière-plan dans chaque worker,
+un seul à la fois grâce à un fichier verrouillé.
+"""
+import os
+import glob
+import shutil
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from core.app_runner import get_running_apps
+from core.config import BASE_PROJECTS_DIR, STATE_DIR, VENV_QUOTA_BYTES, STORAGE_CHECK_INTERVAL_SECONDS
+from core.env_manager import environment_lock, record_environment_state
+from core.file_lock import async_interprocess_lock
+from core.logging_config import add_log
+from core.state_store import get_all_venv_usage, record_venv_size, delete_venv_usage
+
+# Un environnement utilisé il y a moins longtemps n'est jamais évincé (lancement en cours)
+VENV_MIN_IDLE_SECONDS = 600
+# Une taille mesurée est reprise telle quelle pendant ce délai si le .venv n'a pas changé ; au-delà
+# elle est remesurée (les liens durs partagés avec un fork ou un projet supprimé changent la part de chacun)
+VENV_REMEASURE_SECONDS = 86400
+
+_storage_task: Optional[asyncio.Task] = None
+
+
+def _disk_usage(path: str, excluded: tuple = ()) -> int:
+    """
+    Espace occupé par un dossier (blocs alloués). Un fichier à plusieurs liens durs (venv
+    dupliqué par fork_project) compte pour sa part : la somme sur les projets reste exacte.
+    """
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name in excluded and os.path.dirname(entry.path) == path:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    blocks = getattr(stat, "st_blocks", None)
+                    size = blocks * 512 if blocks is not None else stat.st_size
+                    total += size // max(1, stat.st_nlink)
+        except FileNotFoundError:
+            continue  # supprimé pendant le parcours
+    return total
+
+
+def _venv_signature(venv_path: str) -> Optional[str]:
+    """Dates de modification du .venv et de son site-packages : changent quand des paquets sont ajoutés ou retirés."""
+    try:
+        parts = [os.stat(venv_path).st_mtime_ns]
+    except FileNotFoundError:
+        return None
+    site_packages = glob.glob(os.path.join(venv_path, "lib", "python*", "site-packages")) \
+        + glob.glob(os.path.join(venv_path, "Lib", "site-packages"))
+    for path in sorted(site_packages):
+        parts.append(os.stat(path).st_mtime_ns)
+    return ":".join(str(part) for part in parts)
+
+
+def measure_storage() -> Dict[str, Any]:
+    """
+    Mesure l'espace disque de chaque projet (.venv et autres fichiers) ; seuls les .venv
+    modifiés depuis la dernière mesure sont reparcourus. Retourne le rapport complet,
+    projets triés par taille de .venv décroissante.
+    """
+    usage = get_all_venv_usage()
+    fresh_after = (datetime.now() - timedelta(seconds=VENV_REMEASURE_SECONDS)).isoformat()
+    projects: List[Dict[str, Any]] = []
+    if os.path.isdir(BASE_PROJECTS_DIR):
+        for entry in os.scandir(BASE_PROJECTS_DIR):
+            if not entry.is_dir():
+                continue
+            project_id = entry.name
+            venv_path = os.path.join(entry.path, ".venv")
+            cached = usage.get(project_id) or {}
+            signature = _venv_signature(venv_path)
+            if signature is None:
+                venv_bytes = 0
+            elif cached.get("signature") == signature and cached.get("size_bytes") is not None \
+                    and (cached.get("measured_at") or "") > fresh_after:
+                venv_bytes = cached["size_bytes"]
+            else:
+                venv_bytes = _disk_usage(venv_path)
+                record_venv_size(project_id, venv_bytes, signature)
+            last_used_at = cached.get("last_used_at")
+            if last_used_at is None and signature is not None:
+                # Projet jamais lancé depuis le suivi : date du .venv à défaut
+                last_used_at = datetime.fromtimestamp(os.stat(venv_path).st_mtime).isoformat()
+            projects.append({
+                "project_id": project_id,
+                "venv_bytes": venv_bytes,
+                "files_bytes": _disk_usage(entry.path, excluded=(".venv",)),
+                "last_used_at": last_used_at
+            })
+
+    stale = set(usage) - {project["project_id"] for project in projects}
+    if stale:
+        delete_venv_usage(stale)
+    projects.sort(key=lambda project: project["venv_bytes"], reverse=True)
+    return {
+        "quota_bytes": VENV_QUOTA_BYTES,
+        "venv_total_bytes": sum(project["venv_bytes"] for project in projects),
+        "files_total_bytes": sum(project["files_bytes"] for project in projects),
+        "projects": projects
+    }
+
+
+async def evict_project_venv(project_id: str) -> bool:
+    """
+    Supprime le .venv d'un projet (sous le verrou d'environnement : jamais pendant une
+    préparation), sauf si son application est lancée. Retourne True si le .venv a été supprimé.
+    """
+    venv_path = os.path.join(BASE_PROJECTS_DIR, project_id, ".venv")
+    async with environment_lock(project_id):
+        running = {app["project_id"] for app in await asyncio.to_thread(get_running_apps)}
+        if project_id in running or not os.path.isdir(venv_path):
+            return False
+        try:
+            await asyncio.to_thread(shutil.rmtree, venv_path)
+        except OSError as e:
+            add_log(f"Suppression du .venv du projet {project_id} impossible : {e}", level="WARNING")
+            return False
+        await asyncio.to_thread(record_venv_size, project_id, None, None)
+        await asyncio.to_thread(record_environment_state, project_id, "evicted")
+    return True
+
+
+async def enforce_venv_quota() -> List[Dict[str, Any]]:
+    """
+    Évince les .venv des projets utilisés le moins récemment jusqu'à repasser sous VENV_QUOTA_BYTES.
+    Retourne les environnements évincés ({project_id, venv_bytes, last_used_at}).
+    """
+    if VENV_QUOTA_BYTES <= 0:
+        return []
+    async with async_interprocess_lock(os.path.join(STATE_DIR, "storage.lock")):
+        report = await asyncio.to_thread(measure_storage)
+        total = report["venv_total_bytes"]
+        if total <= VENV_QUOTA_BYTES:
+            return []
+
+        running = {app["project_id"] for app in await asyncio.to_thread(get_running_apps)}
+        idle_before = (datetime.now() - timedelta(seconds=VENV_MIN_IDLE_SECONDS)).isoformat()
+        candidates = sorted(
+            (project for project in report["projects"]
+             if project["venv_bytes"] and project["project_id"] not in running and (project["last_used_at"] or "") < idle_before),
+            key=lambda project: project["last_used_at"] or ""
+        )
+        evicted = []
+        for project in candidates:
+            if total <= VENV_QUOTA_BYTES:
+                break
+            if await evict_project_venv(project["project_id"]):
+                total -= project["venv_bytes"]
+                evicted.append({key: project[key] for key in ("project_id", "venv_bytes", "last_used_at")})
+
+    freed = sum(project["venv_bytes"] for project in evicted)
+    add_log(
+        f"Quota des environnements dépassé : {len(evicted)} .venv évincé(s), {freed / 1024 ** 2:.0f} Mo libérés "
+        f"({total / 1024 ** 2:.0f} Mo / {VENV_QUOTA_BYTES / 1024 ** 2:.0f} Mo).",
+        level="INFO" if total <= VENV_QUOTA_BYTES else "WARNING",
+        evicted=[project["project_id"] for project in evicted]
+    )
+    return evicted
+
+
+async def _storage_loop():
+    while True:
+        try:
+            await enforce_venv_quota()
+        except Exception as e:
+            add_log(f"Erreur lors de la vérification du quota des environnements : {e}", level="ERROR")
+        await asyncio.sleep(STORAGE_CHECK_INTERVAL_SECONDS)
+
+
+def start_storage_manager():
+    """Lance la vérification périodique du quota (appelé au démarrage du serveur)."""
+    global _storage_task
+    _storage_task = asyncio.create_task(_storage_loop())
+
+
+def stop_storage_manager():
+    global _storage_task
+    if _storage_task is not None:
+        _storage_task.cancel()
+        _storage_task = None
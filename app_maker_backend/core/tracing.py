@@ -0,0 +1,114 @@
+# app_maker_backend/core/tracing.py
+"""
+Corrélation des logs par requête : middleware qui attribue un identifiant à chaque requête
+(en-tête X-Request-ID repris ou généré) et spans légers qui journalisent la durée d'une étape
+(appel LLM, écritures de fichiers, sous-processus). Chaque log JSON porte request_id,
+project_id et span_id : la chronologie d'une requête se reconstruit en filtrant sur request_id.
+"""
+import re
+import time
+import uuid
+from contextlib import contextmanager
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.logging_config import add_log, get_log_context, log_context
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+# Les routes de projets et de fichiers portent l'ID du projet dans le chemin
+_PROJECT_ID_IN_PATH = re.compile(r"/(?:projects|files)/([0-9a-fA-F-]{36})(?:/|$)")
+# Routes interrogées en boucle par le frontend ou le collecteur : pas de log par requête
+QUIET_PATHS = {"/api/get_logs", "/metrics"}
+# Au-delà de cette durée, la fin de requête est journalisée en WARNING
+SLOW_REQUEST_MS = 2000
+# Connexions longues par conception (flux SSE, long-polling) : jamais signalées comme lentes
+_LONG_LIVED_PATH = re.compile(r"/events$")
+_LONG_POLL_PATH = re.compile(r"/problem_status$")
+
+
+def _is_long_lived(scope: Scope) -> bool:
+    path = scope["path"]
+    return bool(_LONG_LIVED_PATH.search(path)) or (
+        bool(_LONG_POLL_PATH.search(path)) and b"since=" in scope.get("query_string", b"")
+    )
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def span(name: str, **fields):
+    """
+    Mesure une étape : les logs émis dans le bloc portent son span_id, puis un enregistrement
+    "span" est émis à la fin avec sa durée (duration_ms) et son statut (ok, error, cancelled).
+    Utilisable autour d'un `await` comme d'un appel bloquant.
+    """
+    parent_span_id = get_log_context().get("span_id")
+    status = "ok"
+    start = time.perf_counter()
+    with log_context(span_id=_new_id(), parent_span_id=parent_span_id):
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        except BaseException:
+            status = "cancelled"
+            raise
+        finally:
+            add_log(
+                f"Étape {name} terminée ({status})",
+                level="INFO" if status == "ok" else "WARNING",
+                span=name,
+                status=status,
+                duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                **fields
+            )
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI : place request_id (et project_id si présent dans le chemin) dans le
+    contexte de log, renvoie l'identifiant dans l'en-tête X-Request-ID et journalise la fin
+    de chaque requête avec son statut et sa durée.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        path = scope["path"]
+        project_match = _PROJECT_ID_IN_PATH.search(path)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        with log_context(request_id=request_id, project_id=project_match.group(1) if project_match else None):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration_ms = round((time.perf_counter() - start) * 1000, 2)
+                if path not in QUIET_PATHS:
+                    add_log(
+                        f"Requête {scope['method']} {path} terminée ({status_code})",
+                        level="WARNING" if duration_ms >= SLOW_REQUEST_MS and not _is_long_lived(scope) else "DEBUG",
+                        http_method=scope["method"],
+                        path=path,
+                        status_code=status_code,
+                        duration_ms=duration_ms
+                    )
@@ -1,22 +1,81 @@
 # app_maker_backend/main.py
+import time
+_import_started = time.perf_counter()  # début des imports : mesure du démarrage à froid
+
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from contextlib import asynccontextmanager
 from core.app_runner import stop_pyside_application  # coroutine de nettoyage
+from core.code_validator import shutdown_validation_pool
+from core.env_manager import start_env_manager, stop_env_manager
+from core.storage_manager import start_storage_manager, stop_storage_manager
+from core.compression import CompressionMiddleware
+from core.config import (
+    COMPRESSION_MIN_BYTES, GZIP_COMPRESSION_LEVEL, BROTLI_COMPRESSION_QUALITY,
+    STARTUP_BUDGET_MS, LLM_WARMUP_ON_STARTUP
+)
+from core.json_utils import FastJSONResponse
+from core.metrics import MetricsMiddleware, render_metrics, PROMETHEUS_CONTENT_TYPE, STARTUP_DURATION
+from core.llm_service import warm_up_providers
+from core.project_manager import init_project_store, start_code_index_sync
+from core.state_store import init_state_store
+from core.tracing import RequestContextMiddleware, REQUEST_ID_HEADER
+from core.logging_config import add_log, start_log_maintenance, close_log_index
 
 # Imports des routeurs
-from api import projects, files, runner, log
+from api import projects, files, runner, log, admin
+
+# Le .env est chargé par core.config (les constantes y sont lues à l'import)
+_import_ms = (time.perf_counter() - _import_started) * 1000
+
+
+def report_startup(lifespan_ms: float):
+    """Journalise la durée du démarrage à froid (WARNING au-delà de STARTUP_BUDGET_MS) et l'exporte en métrique."""
+    total_ms = _import_ms + lifespan_ms
+    for phase, duration_ms in (("imports", _import_ms), ("lifespan", lifespan_ms), ("total", total_ms)):
+        STARTUP_DURATION.set(duration_ms / 1000, phase=phase)
+    add_log(
+        f"Démarrage du backend en {total_ms:.0f} ms (imports {_import_ms:.0f} ms, lifespan {lifespan_ms:.0f} ms, budget {STARTUP_BUDGET_MS:.0f} ms).",
+        level="WARNING" if total_ms > STARTUP_BUDGET_MS else "INFO",
+        imports_ms=round(_import_ms, 2),
+        lifespan_ms=round(lifespan_ms, 2),
+        total_ms=round(total_ms, 2)
+    )
+
+
+async def _warm_up():
+    """Préchargement des SDKs LLM, lancé une fois le serveur prêt (n'allonge pas le démarrage)."""
+    try:
+        await warm_up_providers()
+        add_log("Préchargement des fournisseurs LLM terminé.", level="DEBUG")
+    except Exception as e:
+        add_log(f"Erreur lors du préchargement des fournisseurs LLM : {e}", level="WARNING")
 
-from dotenv import load_dotenv
-load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    lifespan_started = time.perf_counter()
+    init_project_store()
+    init_state_store()  # base partagée entre workers (métadonnées, applications lancées)
+    start_log_maintenance()  # archives des exécutions précédentes
+    start_code_index_sync()  # index de recherche du code (projets modifiés hors du backend)
+    start_env_manager()  # préparation anticipée des environnements à l'enregistrement du code
+    start_storage_manager()  # quota disque des .venv (éviction des moins récemment utilisés)
+    report_startup((time.perf_counter() - lifespan_started) * 1000)
+    warm_up_task = asyncio.create_task(_warm_up()) if LLM_WARMUP_ON_STARTUP else None
     yield  # démarrage
-    await stop_pyside_application()  # arrêt / Ctrl-C
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    stop_env_manager()
+    stop_storage_manager()
+    await stop_pyside_application(local_only=True)  # arrêt / Ctrl-C : seulement l'application de ce worker
+    shutdown_validation_pool()
+    close_log_index()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 origins = [
     "http://localhost",
@@ -30,13 +89,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[REQUEST_ID_HEADER],
 )
 
+# Compression des réponses volumineuses (contenu de fichiers, historiques)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_BYTES,
+    gzip_level=GZIP_COMPRESSION_LEVEL,
+    brotli_quality=BROTLI_COMPRESSION_QUALITY,
+)
+
+# Mesure des durées par route (ajouté en dernier : englobe la compression et CORS)
+app.add_middleware(MetricsMiddleware)
+
+# Identifiant de requête dans le contexte de log (middleware le plus externe)
+app.add_middleware(RequestContextMiddleware)
+
 # Montage des routeurs
 app.include_router(projects.router, prefix="/api")
 app.include_router(files.router,   prefix="/api")
 app.include_router(runner.router,  prefix="/api")
 app.include_router(log.router)     # déjà prefix="/api" interne
+app.include_router(admin.router,   prefix="/api")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métriques du processus au format texte Prometheus."""
+    return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.get("/")
 async def read_root():
@@ -1,15 +1,37 @@
 # run.py
+# Développement : python run.py (un processus, rechargement automatique)
+# Production    : python run.py --prod [--workers N] (N workers, état partagé dans state/)
+import argparse
+
 import uvicorn
 
+from core.config import WEB_WORKERS
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="127.0.0.1",
-        port=8000,
-        reload=True,
-        reload_excludes=[
-            "**/.venv",
-            "**/generated_projects/**/.venv",
-            "**/__pycache__",
-        ],
-    )
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lance le backend d'app_maker.")
+    parser.add_argument("--prod", action="store_true", help="Mode production : plusieurs workers, sans rechargement.")
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS, help="Nombre de workers en mode production.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.prod:
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=max(1, args.workers),
+            log_level="warning",  # les requêtes sont déjà journalisées par le backend
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            reload_excludes=[
+                "**/.venv",
+                "**/generated_projects/**/.venv",
+                "**/__pycache__",
+            ],
+        )
@@ -0,0 +1,8 @@
+# smoke_test.py
+# Exemple (test nocturne) : python smoke_test.py --python /opt/pyside/bin/python --output report.json
+import sys
+
+from core.smoke_runner import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,7 +18,7 @@ import CodeEditor from './components/CodeEditor'; // Assurez-vous que CodeEditor
 
 // Interface pour les entrées d'historique
 interface HistoryEntry {
-  type: 'user' | 'llm_response';
+  type: 'user' | 'llm_response' | 'variant_promotion';
   content: string | { [key: string]: string };
   timestamp: string;
 }
@@ -41,8 +41,21 @@ function App() {
 
   // Utilisation des hooks personnalisés
   const { llmOptions, selectedLlmProvider, setSelectedLlmProvider, selectedModel, setSelectedModel, error: llmError } = useLlmOptions();
-  const { projects, fetchProjects, handleProjectRename, handleProjectDelete, loading: projectsLoading, error: projectsError } = useProjects();
-  const { currentProblem, fetchProblemStatus, error: problemError } = useProblemStatus();
+  const {
+    projects,
+    fetchProjects,
+    loadMoreProjects,
+    hasMoreProjects,
+    projectSort,
+    setProjectSort,
+    projectFilter,
+    setProjectFilter,
+    handleProjectRename,
+    handleProjectDelete,
+    loading: projectsLoading,
+    error: projectsError
+  } = useProjects();
+  const { currentProblem, error: problemError } = useProblemStatus(projectId);
   const { logs, isPollingEnabled, setIsPollingEnabled, scrollToBottom, logsEndRef, error: logsError } = useLogs();
 
   // Combinaison des erreurs des différents hooks
@@ -111,7 +124,9 @@ function App() {
       
       const lastProjectId = localStorage.getItem('lastSelectedProjectId');
       if (lastProjectId) {
-        const projectExists = fetchedProjects.some(p => p.project_id === lastProjectId);
+        // La liste est paginée : un projet absent de la première page peut exister quand même
+        const projectExists = fetchedProjects.some(p => p.project_id === lastProjectId)
+          || (await fetch(`http://127.0.0.1:8000/api/projects/${lastProjectId}/history`).catch(() => null))?.ok === true;
         if (projectExists) {
           console.log(`[App.tsx] Chargement du dernier projet sélectionné: ${lastProjectId}`);
           setProjectId(lastProjectId);
@@ -138,14 +153,14 @@ function App() {
       // Assurez-vous que loadProjectFiles et fetchProjectHistory sont des callbacks stables
       loadProjectFiles(projectId);
       fetchProjectHistory(projectId);
-      fetchProblemStatus(projectId);
+      // Le problème courant arrive par le flux d'événements de useProblemStatus
     } else {
       console.log("[App.tsx] projectId est null. Réinitialisation des fichiers et de l'historique.");
       setProjectFiles({});
       setProjectHistory(null);
       setSelectedFileName(null);
     }
-  }, [projectId, loadProjectFiles, fetchProjectHistory, fetchProblemStatus]);
+  }, [projectId, loadProjectFiles, fetchProjectHistory]);
 
 
   // Utilisation du hook pour les actions de l'application
@@ -165,7 +180,6 @@ function App() {
     setSelectedFileName,
     prompt,
     currentProblem,
-    fetchProblemStatus,
     fetchProjects,
     selectedLlmProvider,
     selectedModel,
@@ -209,6 +223,12 @@ function App() {
       {/* Project Sidebar (conditionally rendered) */}
       <ProjectSidebar
         projects={projects}
+        hasMore={hasMoreProjects}
+        onLoadMore={loadMoreProjects}
+        sort={projectSort}
+        onSortChange={setProjectSort}
+        filter={projectFilter}
+        onFilterChange={setProjectFilter}
         selectedProjectId={projectId}
         onProjectSelect={handleProjectSelect}
         onProjectRename={handleProjectRename}
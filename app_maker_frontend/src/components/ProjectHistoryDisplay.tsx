@@ -24,9 +24,19 @@ export default function ProjectHistoryDisplay({ projectHistory }: Props) {
           }`}
         >
           <h4 className="font-semibold mb-1">
-            {entry.type === 'user' ? 'Votre prompt' : 'Réponse LLM'}
+            {entry.type === 'user'
+              ? 'Votre prompt'
+              : entry.type === 'variant_promotion'
+                ? `Variante promue (${entry.variant_id})`
+                : 'Réponse LLM'}
           </h4>
 
+          {entry.extra_files?.length ? (
+            <p className="text-xs text-amber-300 mb-1">
+              Fichiers hors variante conservés : {entry.extra_files.join(', ')}
+            </p>
+          ) : null}
+
           {typeof entry.content === 'string' ? (
             <pre className="whitespace-pre-wrap text-xs text-gray-200 bg-gray-800 p-2 rounded">
               {entry.content}
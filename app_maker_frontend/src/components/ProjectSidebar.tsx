@@ -1,18 +1,32 @@
 // ProjectSidebar.tsx
 import React, { useState } from 'react';
-import { Pencil, Save, X, Trash2, Folder, FolderOpen } from 'lucide-react';
+import { Pencil, Save, X, Trash2, Folder, FolderOpen, Search } from 'lucide-react';
+import type { ProjectInfo, ProjectSort } from '../types/api';
 
 // Supprimez cette ligne car la fonction apiFetch locale ne sera plus utilisée pour la suppression.
 // const apiFetch = (endpoint: string, init?: RequestInit) =>
 //   fetch(`http://127.0.0.1:8000${endpoint}`, init);
 
-interface ProjectInfo {
-  project_id: string;
-  name: string;
-}
+// Couleur de l'état de la dernière exécution
+const RUN_STATE_COLORS: Record<string, string> = {
+  running: 'bg-green-400',
+  starting: 'bg-yellow-400',
+  crashed: 'bg-red-500',
+  failed: 'bg-orange-500',
+  stopped: 'bg-gray-500',
+};
+
+const formatDate = (value?: string | null) =>
+  value ? new Date(value).toLocaleDateString(undefined, { day: '2-digit', month: 'short' }) : null;
 
 interface Props {
   projects: ProjectInfo[];
+  hasMore: boolean;
+  onLoadMore: () => Promise<void>;
+  sort: ProjectSort;
+  onSortChange: (sort: ProjectSort) => void;
+  filter: string;
+  onFilterChange: (filter: string) => void;
   selectedProjectId: string | null;
   onProjectSelect: (id: string) => void;
   onClose: () => void;
@@ -26,6 +40,12 @@ interface Props {
 
 export default function ProjectSidebar({
   projects,
+  hasMore,
+  onLoadMore,
+  sort,
+  onSortChange,
+  filter,
+  onFilterChange,
   selectedProjectId,
   onProjectSelect,
   onClose,
@@ -80,6 +100,28 @@ export default function ProjectSidebar({
         </button>
       </header>
 
+      <div className="flex items-center gap-2 mb-2">
+        <div className="relative flex-1">
+          <Search size={14} className="absolute left-2 top-1/2 -translate-y-1/2 text-gray-500" />
+          <input
+            value={filter}
+            onChange={(e) => onFilterChange(e.target.value)}
+            placeholder="Filtrer…"
+            className="w-full pl-7 pr-2 py-1 text-sm bg-gray-800 border border-gray-600 rounded focus:ring-1 focus:ring-teal-500"
+          />
+        </div>
+        <select
+          value={sort}
+          onChange={(e) => onSortChange(e.target.value as ProjectSort)}
+          className="px-1 py-1 text-sm bg-gray-800 border border-gray-600 rounded focus:ring-1 focus:ring-teal-500"
+          aria-label="Trier les projets"
+        >
+          <option value="updated">Modifiés</option>
+          <option value="created">Créés</option>
+          <option value="name">Nom</option>
+        </select>
+      </div>
+
       {loading && <p className="text-sm text-center text-teal-300">Chargement…</p>}
 
       <ul className="mt-3 space-y-1 overflow-y-auto flex-1">
@@ -127,7 +169,22 @@ export default function ProjectSidebar({
                   ) : (
                     <Folder size={16} />
                   )}
-                  <span title={p.name}>{p.name}</span>
+                  <span className="flex flex-col min-w-0">
+                    <span className="flex items-center gap-1.5">
+                      {p.last_run_state && (
+                        <span
+                          className={`inline-block w-2 h-2 rounded-full flex-shrink-0 ${RUN_STATE_COLORS[p.last_run_state] || 'bg-gray-500'}`}
+                          title={`Dernière exécution : ${p.last_run_state}`}
+                        />
+                      )}
+                      <span className="truncate" title={p.name}>{p.name}</span>
+                    </span>
+                    <span className="text-xs font-normal text-gray-500">
+                      {p.turn_count} tour{p.turn_count > 1 ? 's' : ''}
+                      {p.file_count != null && ` · ${p.file_count} fichier${p.file_count > 1 ? 's' : ''}`}
+                      {formatDate(p.last_prompt_at || p.updated_at) && ` · ${formatDate(p.last_prompt_at || p.updated_at)}`}
+                    </span>
+                  </span>
                 </button>
                 <div className="hidden group-hover:flex gap-1">
                   <button
@@ -149,6 +206,17 @@ export default function ProjectSidebar({
             )}
           </li>
         ))}
+        {hasMore && (
+          <li>
+            <button
+              onClick={() => onLoadMore()}
+              disabled={loading}
+              className="w-full py-1.5 mt-1 text-sm text-teal-400 rounded hover:bg-gray-700 disabled:opacity-50"
+            >
+              Charger plus
+            </button>
+          </li>
+        )}
       </ul>
     </aside>
   );
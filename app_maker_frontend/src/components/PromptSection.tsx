@@ -7,7 +7,7 @@ interface LlmOptions {
 }
 
 interface HistoryEntry {
-  type: 'user' | 'llm_response';
+  type: 'user' | 'llm_response' | 'variant_promotion';
   content: string | { [key: string]: string };
   timestamp: string;
 }
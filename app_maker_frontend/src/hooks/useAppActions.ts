@@ -1,7 +1,6 @@
 import { useState, useCallback } from 'react';
 import { useLlmOptions } from './useLlmOptions';
 import { useProjects } from './useProjects';
-import { useProblemStatus } from './useProblemStatus';
 
 // Interfaces pour les données (répétées ici pour la clarté du hook, mais idéalement importées d'un fichier de types global)
 interface ProjectData {
@@ -23,7 +22,6 @@ interface UseAppActionsProps {
   setSelectedFileName: (fileName: string | null) => void;
   prompt: string;
   currentProblem: ProblemData | null;
-  fetchProblemStatus: (projectId: string) => Promise<void>;
   fetchProjects: () => Promise<void>;
   selectedLlmProvider: string;
   selectedModel: string;
@@ -47,7 +45,6 @@ export const useAppActions = ({
   setSelectedFileName,
   prompt,
   currentProblem,
-  fetchProblemStatus,
   fetchProjects,
   selectedLlmProvider,
   selectedModel,
@@ -89,7 +86,6 @@ export const useAppActions = ({
         const defaultFile = data.files['main.py'] ? 'main.py' : Object.keys(data.files)[0];
         setSelectedFileName(defaultFile || null);
         await fetchProjects();
-        await fetchProblemStatus(data.project_id); // Vérifier le problème après génération
       } else {
         const errorData = await response.json();
         setError(`Erreur lors de la génération de l'application: ${errorData.detail || response.statusText}`);
@@ -100,7 +96,7 @@ export const useAppActions = ({
     } finally {
       setLoading(false);
     }
-  }, [prompt, selectedLlmProvider, selectedModel, setProjectFiles, setProjectId, setSelectedFileName, fetchProjects, fetchProblemStatus]);
+  }, [prompt, selectedLlmProvider, selectedModel, setProjectFiles, setProjectId, setSelectedFileName, fetchProjects]);
 
   const handleUpdateApp = useCallback(async (event: React.FormEvent) => {
     event.preventDefault();
@@ -128,7 +124,6 @@ export const useAppActions = ({
             const defaultFile = data.files['main.py'] ? 'main.py' : Object.keys(data.files)[0];
             setSelectedFileName(defaultFile || null);
         }
-        await fetchProblemStatus(projectId); // Vérifier le problème après mise à jour
       } else {
         const errorData = await response.json();
         setError(`Erreur lors de la mise à jour de l'application: ${errorData.detail || response.statusText}`);
@@ -139,7 +134,7 @@ export const useAppActions = ({
     } finally {
       setLoading(false);
     }
-  }, [projectId, prompt, selectedLlmProvider, selectedModel, setProjectFiles, setSelectedFileName, fetchProblemStatus]);
+  }, [projectId, prompt, selectedLlmProvider, selectedModel, setProjectFiles, setSelectedFileName]);
 
 
 
@@ -158,11 +153,8 @@ export const useAppActions = ({
       const response = await fetch(`http://127.0.0.1:8000/api/runner/run`, commonFetchOptions('POST', { project_id: projectId }));
 
       if (response.ok) {
-        console.log("handleRunApp: Application lancée avec succès, attente de 5 secondes..."); // NOUVEAU LOG
-        // Attendre 5 secondes pour laisser le temps au backend de créer problem.json si l'app crashe
-        await new Promise(resolve => setTimeout(resolve, 5000));
-        console.log("handleRunApp: Attente de 5 secondes terminée, récupération du statut du problème..."); // NOUVEAU LOG
-        await fetchProblemStatus(projectId);
+        // Un plantage (même tardif) arrive par le flux d'événements du projet (useProblemStatus)
+        console.log("handleRunApp: Application lancée avec succès."); // NOUVEAU LOG
         alert("Application lancée.");
       } else {
         const errorData = await response.json();
@@ -175,7 +167,7 @@ export const useAppActions = ({
     } finally {
       setLoading(false);
     }
-  }, [projectId, fetchProblemStatus]);
+  }, [projectId]);
 
 
 
@@ -241,7 +233,6 @@ export const useAppActions = ({
             const defaultFile = data.files['main.py'] ? 'main.py' : Object.keys(data.files)[0];
             setSelectedFileName(defaultFile || null);
         }
-        await fetchProblemStatus(projectId);
         alert("Tentative de résolution du problème effectuée. Veuillez relancer l'application pour vérifier.");
       } else {
         const errorData = await response.json();
@@ -253,7 +244,7 @@ export const useAppActions = ({
     } finally {
       setLoading(false);
     }
-  }, [projectId, currentProblem, projectFiles, selectedLlmProvider, selectedModel, setProjectFiles, setSelectedFileName, fetchProblemStatus]);
+  }, [projectId, currentProblem, projectFiles, selectedLlmProvider, selectedModel, setProjectFiles, setSelectedFileName]);
 
   return { loading, error, handleGenerateApp, handleUpdateApp, handleRunApp, handleStopApp, handleFixProblem };
 };
\ No newline at end of file
@@ -4,8 +4,51 @@ interface LogEntry {
   timestamp: string;
   level: string;
   message: string;
+  requestId?: string;
+  projectId?: string;
+  durationMs?: number;
 }
 
+// Ancien format texte : "2024-01-01 12:00:00,000 - INFO - message"
+const parseTextLine = (line: string): LogEntry => {
+  let timestamp = "N/A";
+  let level = "UNKNOWN";
+  let message = line;
+  const match = line.match(/^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (INFO|WARNING|ERROR|DEBUG|CRITICAL) - (.*)$/);
+  if (match) {
+    timestamp = match[1];
+    level = match[2];
+    message = match[3];
+  } else {
+    const partialLevelMatch = line.match(/(INFO|WARNING|ERROR|DEBUG|CRITICAL):?\s*(.*)$/);
+    if (partialLevelMatch) {
+        level = partialLevelMatch[1];
+        message = partialLevelMatch[2];
+    }
+  }
+  return { timestamp, level, message };
+};
+
+// Format actuel : un objet JSON par ligne (timestamp, level, message, request_id, project_id, duration_ms...)
+const parseLogLine = (line: string): LogEntry => {
+  if (line.startsWith('{')) {
+    try {
+      const record = JSON.parse(line);
+      return {
+        timestamp: record.timestamp ?? "N/A",
+        level: record.level ?? "UNKNOWN",
+        message: record.message ?? line,
+        requestId: record.request_id,
+        projectId: record.project_id,
+        durationMs: record.duration_ms,
+      };
+    } catch {
+      // Ligne tronquée ou non JSON : analyse en texte
+    }
+  }
+  return parseTextLine(line);
+};
+
 interface UseLogsResult {
   logs: LogEntry[];
   isPollingEnabled: boolean;
@@ -33,24 +76,7 @@ export const useLogs = (): UseLogsResult => {
         const data = await response.json();
         if (typeof data.logs === 'string') {
           const logLines = data.logs.split('\n').filter((line: string) => line.trim() !== '');
-          const parsedLogs: LogEntry[] = logLines.map((line: string) => {
-            let timestamp = "N/A";
-            let level = "UNKNOWN";
-            let message = line;
-            const match = line.match(/^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (INFO|WARNING|ERROR|DEBUG|CRITICAL) - (.*)$/);
-            if (match) {
-              timestamp = match[1];
-              level = match[2];
-              message = match[3];
-            } else {
-              const partialLevelMatch = line.match(/(INFO|WARNING|ERROR|DEBUG|CRITICAL):?\s*(.*)$/);
-              if (partialLevelMatch) {
-                  level = partialLevelMatch[1];
-                  message = partialLevelMatch[2];
-              }
-            }
-            return { timestamp, level, message };
-          });
+          const parsedLogs: LogEntry[] = logLines.map(parseLogLine);
           setLogs(parsedLogs);
         } else {
           console.warn("Les logs reçus ne sont pas une chaîne de caractères:", data.logs);
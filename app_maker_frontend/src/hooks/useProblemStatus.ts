@@ -8,56 +8,73 @@ interface ProblemData {
   timestamp: string;
 }
 
+export interface RunState {
+  state: 'starting' | 'running' | 'stopped' | 'crashed' | 'failed'; // failed : lancement impossible (environnement, processus)
+  pid?: number;
+  returncode?: number;
+  error?: string;
+}
+
 interface UseProblemStatusResult {
   currentProblem: ProblemData | null;
-  fetchProblemStatus: (projectId: string) => Promise<void>; // Correct interface
+  runState: RunState | null;
+  fetchProblemStatus: (projectId: string) => Promise<void>; // Lecture ponctuelle (le flux SSE tient l'état à jour)
   error: string | null;
 }
 
-export const useProblemStatus = (hookProjectId: string | null): UseProblemStatusResult => { // Renommé pour plus de clarté
+export const useProblemStatus = (hookProjectId: string | null): UseProblemStatusResult => {
   const [currentProblem, setCurrentProblem] = useState<ProblemData | null>(null);
+  const [runState, setRunState] = useState<RunState | null>(null);
   const [error, setError] = useState<string | null>(null);
 
-  // Modifiez fetchProblemStatus pour accepter projectId comme argument
-  const fetchProblemStatus = useCallback(async (projectIdToFetch: string) => { // Accepte projectId comme argument
+  const fetchProblemStatus = useCallback(async (projectIdToFetch: string) => {
     if (!projectIdToFetch) {
-      console.log(`fetchProblemStatus: Pas de projectId fourni, annulation.`); // Log pour débogage
       return;
     }
-    console.log(`fetchProblemStatus: Appelée pour projectId: ${projectIdToFetch}`); // Utilise l'argument
     setError(null);
     try {
-      const response = await fetch(`http://127.0.0.1:8000/api/projects/${projectIdToFetch}/problem_status`); // Utilise l'argument
+      const response = await fetch(`http://127.0.0.1:8000/api/projects/${projectIdToFetch}/problem_status`);
       if (response.ok) {
         const data = await response.json();
-        console.log(`fetchProblemStatus: Réponse reçue pour projectId ${projectIdToFetch}:`, data.problem); // Utilise l'argument
         setCurrentProblem(data.problem || null);
       } else {
         const errorText = await response.text();
-        console.error(`fetchProblemStatus: Erreur de réponse HTTP pour projectId ${projectIdToFetch}: ${response.status} ${response.statusText}`, errorText); // Utilise l'argument
+        console.error(`fetchProblemStatus: Erreur de réponse HTTP pour projectId ${projectIdToFetch}: ${response.status} ${response.statusText}`, errorText);
         setError(`Erreur: ${response.statusText} (${response.status})`);
       }
     } catch (err) {
-      console.error(`fetchProblemStatus: Erreur réseau pour projectId ${projectIdToFetch}:`, err); // Utilise l'argument
+      console.error(`fetchProblemStatus: Erreur réseau pour projectId ${projectIdToFetch}:`, err);
       setError(`Erreur réseau: ${err instanceof Error ? err.message : String(err)}`);
     }
-  }, []); // Les dépendances sont vides car projectIdToFetch est un argument, ce qui rend la fonction plus stable.
+  }, []);
 
   useEffect(() => {
-    // Ce useEffect gère le polling, en utilisant le hookProjectId
+    // Flux SSE du projet : l'état courant est envoyé à la connexion, puis chaque changement
+    // (problème enregistré ou effacé, lancement, arrêt, plantage). Plus de polling.
+    setCurrentProblem(null);
+    setRunState(null);
     if (!hookProjectId) {
-      console.log('useEffect useProblemStatus: Pas de projectId, pas de polling.');
       return;
     }
-    console.log(`useEffect useProblemStatus: Démarrage du polling pour projectId: ${hookProjectId}`);
-    // Passe hookProjectId à fetchProblemStatus pour le polling
-    const pollFunction = () => fetchProblemStatus(hookProjectId);
-    const id = setInterval(pollFunction, 3000);
-    return () => {
-      console.log(`useEffect useProblemStatus: Arrêt du polling pour projectId: ${hookProjectId}`);
-      clearInterval(id);
+    setError(null);
+    const source = new EventSource(`http://127.0.0.1:8000/api/projects/${hookProjectId}/events`);
+    source.addEventListener('problem', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setCurrentProblem(data.problem || null);
+    });
+    source.addEventListener('run', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setRunState(data.run || null);
+    });
+    source.onopen = () => setError(null);
+    source.onerror = () => {
+      // EventSource se reconnecte seul (Last-Event-ID : les événements manqués sont rejoués)
+      if (source.readyState === EventSource.CLOSED) {
+        setError(`Flux d'événements interrompu pour le projet ${hookProjectId}.`);
+      }
     };
-  }, [hookProjectId, fetchProblemStatus]); // Dépendances: hookProjectId et la fonction fetchProblemStatus mémoïsée
+    return () => source.close();
+  }, [hookProjectId]);
 
-  return { currentProblem, fetchProblemStatus, error };
+  return { currentProblem, runState, fetchProblemStatus, error };
 };
@@ -1,13 +1,18 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
+import type { ProjectInfo, ProjectListResponse, ProjectSort } from '../types/api';
 
-interface ProjectInfo {
-  project_id: string;
-  name: string;
-}
+// Taille d'une page de la liste des projets (le backend pagine par curseur)
+const PROJECTS_PAGE_SIZE = 50;
 
 interface UseProjectsResult {
   projects: ProjectInfo[];
-  fetchProjects: () => Promise<ProjectInfo[]>; // NOUVEAU: La fonction retourne Promise<ProjectInfo[]>
+  fetchProjects: () => Promise<ProjectInfo[]>; // Recharge la première page et la retourne
+  loadMoreProjects: () => Promise<void>; // Ajoute la page suivante
+  hasMoreProjects: boolean;
+  projectSort: ProjectSort;
+  setProjectSort: (sort: ProjectSort) => void;
+  projectFilter: string;
+  setProjectFilter: (filter: string) => void;
   handleProjectRename: (id: string, newName: string) => Promise<void>;
   handleProjectDelete: (id: string) => Promise<void>;
   error: string | null;
@@ -18,28 +23,58 @@ export const useProjects = (): UseProjectsResult => {
   const [projects, setProjects] = useState<ProjectInfo[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState<boolean>(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [projectSort, setProjectSort] = useState<ProjectSort>('updated');
+  const [projectFilter, setProjectFilter] = useState<string>('');
+  const listInitialized = useRef(false);
+
+  const fetchProjectPage = useCallback(async (cursor: string | null): Promise<ProjectListResponse> => {
+    const params = new URLSearchParams({
+      sort: projectSort,
+      order: projectSort === 'name' ? 'asc' : 'desc',
+      limit: String(PROJECTS_PAGE_SIZE),
+    });
+    if (projectFilter.trim()) params.set('q', projectFilter.trim());
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`http://127.0.0.1:8000/api/projects/?${params}`);
+    if (!response.ok) {
+      throw new Error(response.statusText);
+    }
+    return response.json();
+  }, [projectSort, projectFilter]);
 
   const fetchProjects = useCallback(async () => {
     setLoading(true);
     setError(null);
     try {
-      const response = await fetch('http://127.0.0.1:8000/api/projects/');
-      if (response.ok) {
-        const data: ProjectInfo[] = await response.json();
-        setProjects(data);
-        return data; // NOUVEAU: Retourne les données récupérées
-      } else {
-        setError(`Erreur lors de la récupération de la liste des projets: ${response.statusText}`);
-        return []; // Retourne un tableau vide en cas d'erreur
-      }
+      const response = await fetchProjectPage(null);
+      setProjects(response.items);
+      setNextCursor(response.next_cursor);
+      return response.items;
     } catch (err) {
       console.error('Erreur lors de la récupération des projets:', err);
-      setError(`Erreur réseau lors de la récupération des projets: ${err instanceof Error ? err.message : String(err)}`);
-      return []; // Retourne un tableau vide en cas d'erreur réseau
+      setError(`Erreur lors de la récupération de la liste des projets: ${err instanceof Error ? err.message : String(err)}`);
+      return []; // Retourne un tableau vide en cas d'erreur
     } finally {
       setLoading(false);
     }
-  }, []);
+  }, [fetchProjectPage]);
+
+  const loadMoreProjects = useCallback(async () => {
+    if (!nextCursor) return;
+    setLoading(true);
+    setError(null);
+    try {
+      const response = await fetchProjectPage(nextCursor);
+      setProjects(previous => [...previous, ...response.items]);
+      setNextCursor(response.next_cursor);
+    } catch (err) {
+      console.error('Erreur lors de la récupération des projets:', err);
+      setError(`Erreur lors de la récupération de la liste des projets: ${err instanceof Error ? err.message : String(err)}`);
+    } finally {
+      setLoading(false);
+    }
+  }, [fetchProjectPage, nextCursor]);
 
   const handleProjectRename = useCallback(async (id: string, newName: string) => {
     setLoading(true);
@@ -86,13 +121,28 @@ export const useProjects = (): UseProjectsResult => {
   }, [fetchProjects]);
 
   useEffect(() => {
-    // La première exécution de fetchProjects se fera via le useEffect de App.tsx
-    // pour que la logique de chargement du dernier projet puisse utiliser les données.
-    // Cette ligne peut être retirée si la gestion de fetchProjects est centralisée dans App.tsx
-    // ou si on veut s'assurer que 'projects' est toujours à jour pour d'autres usages du hook.
-    // Pour l'instant, je la laisse pour la cohérence du hook, mais le chargement initial est géré par App.tsx.
-    // fetchProjects();
-  }, []); // Dépendances vides pour qu'il ne s'exécute qu'une fois au montage
+    // Le premier chargement est fait par App.tsx (sélection du dernier projet) ; ensuite,
+    // un changement de tri ou de filtre recharge la liste depuis la première page.
+    if (!listInitialized.current) {
+      listInitialized.current = true;
+      return;
+    }
+    const timer = setTimeout(() => { fetchProjects(); }, 250); // Filtre : attend la fin de la saisie
+    return () => clearTimeout(timer);
+  }, [fetchProjects]);
 
-  return { projects, fetchProjects, handleProjectRename, handleProjectDelete, error, loading };
+  return {
+    projects,
+    fetchProjects,
+    loadMoreProjects,
+    hasMoreProjects: nextCursor !== null,
+    projectSort,
+    setProjectSort,
+    projectFilter,
+    setProjectFilter,
+    handleProjectRename,
+    handleProjectDelete,
+    error,
+    loading,
+  };
 };
@@ -1,7 +1,9 @@
 export interface HistoryEntry {
-  type: 'user' | 'llm_response';
+  type: 'user' | 'llm_response' | 'variant_promotion';
   content: string | Record<string, string> | null;
   timestamp: string;
+  variant_id?: string; // Entrées 'variant_promotion' uniquement
+  extra_files?: string[];
 }
 
 export interface ProjectHistory {
@@ -23,4 +25,17 @@ export interface ProblemData {
 export interface ProjectInfo {
   project_id: string;
   name: string;
+  created_at?: string | null;
+  updated_at?: string | null;
+  last_prompt_at?: string | null;
+  turn_count: number;
+  file_count?: number | null;
+  last_run_state?: 'starting' | 'running' | 'stopped' | 'crashed' | 'failed' | null;
+}
+
+export type ProjectSort = 'updated' | 'created' | 'name';
+
+export interface ProjectListResponse {
+  items: ProjectInfo[];
+  next_cursor: string | null; // Curseur de la page suivante, null à la dernière page
 }
\ No newline at end of file